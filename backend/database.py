@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine, Column, String, DateTime, Float, Boolean, Text, JSON
+from sqlalchemy import create_engine, Column, String, DateTime, Float, Boolean, Text, JSON, Integer
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
 from datetime import datetime
@@ -28,6 +28,40 @@ class ClaimRecord(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+class CacheEntry(Base):
+    __tablename__ = "cache_entries"
+    
+    namespace = Column(String, primary_key=True)
+    cache_key = Column(String, primary_key=True)
+    value = Column(JSON)
+    size_bytes = Column(Integer, default=0)
+    hit_count = Column(Integer, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    last_accessed_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+class RevalidationJob(Base):
+    __tablename__ = "revalidation_jobs"
+    
+    job_id = Column(String, primary_key=True)
+    status = Column(String, default="pending")  # pending, running, paused, completed, failed
+    evaluation = Column(String, default="llm")  # llm (AI Judge at analysis_depth), batch (same, via message batches) or local (rule engine only)
+    analysis_depth = Column(Integer, default=1)
+    chunk_size = Column(Integer)
+    concurrency = Column(Integer)
+    requests_per_minute = Column(Float)  # 0 = unlimited
+    include_unvalidated = Column(Boolean, default=False)
+    constitution_version = Column(String)
+    last_claim_id = Column(String)  # keyset checkpoint - every claim up to here has been written back
+    total_claims = Column(Integer, default=0)
+    processed = Column(Integer, default=0)
+    failed = Column(Integer, default=0)
+    failures = Column(JSON)  # claim_id -> latest error, oldest first (only the most recent are kept)
+    error = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
 # Create tables
 Base.metadata.create_all(bind=engine)
 
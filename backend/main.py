@@ -1,7 +1,7 @@
 from fastapi import FastAPI, UploadFile, File, HTTPException
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, AsyncIterator
 import os
 import json
 import hashlib
@@ -27,6 +27,10 @@ from services.ai_judge import AIJudge
 from services.document_processor import DocumentProcessor
 from services.receipt_fetcher import ReceiptFetcher
 from services.claim_package_generator import generate_comprehensive_claim_package
+from services.upload_storage import save_upload_streaming, UploadTooLargeError
+from services.blob_store import blob_store, is_valid_blob_id
+from services.revalidation import RevalidationJobManager, REVALIDATION_RESUME_ON_STARTUP
+from services.iteration_scheduler import IterationScheduler
 from models.claim import ClaimPacket, ClaimValidation, ProofCard, Document, DocumentType
 from database import get_db
 
@@ -34,6 +38,9 @@ from sqlalchemy.orm import Session
 
 load_dotenv('../.env')
 
+# Start the iteration 2/3 enhancements alongside the first judge evaluation instead of after it
+SPECULATIVE_ENHANCEMENTS_ENABLED = os.getenv("SPECULATIVE_ENHANCEMENTS_ENABLED", "true").lower() == "true"
+
 app = FastAPI(title="KAVA API", version="1.0.0")
 
 # CORS middleware
@@ -58,6 +65,7 @@ app.add_middleware(
 ai_judge = AIJudge()
 doc_processor = DocumentProcessor()
 receipt_fetcher = ReceiptFetcher()
+revalidation_jobs = RevalidationJobManager(ai_judge)
 
 # ECDSA key pair for signing (in production, use secure key management)
 private_key = ec.generate_private_key(ec.SECP256R1(), default_backend())
@@ -651,44 +659,111 @@ async def sync_receipts(request: Dict[str, Any]):
         print(f"Error syncing receipts: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.on_event("startup")
+async def resume_background_jobs():
+    if REVALIDATION_RESUME_ON_STARTUP:
+        revalidation_jobs.resume_interrupted()
+
+@app.on_event("shutdown")
+async def shutdown_workers():
+    # Interrupted re-validation jobs keep their "running" status and checkpoint, so they resume on startup
+    await revalidation_jobs.shutdown()
+    doc_processor.pdf_extractor.shutdown()
+
+@app.get("/api/metrics")
+async def metrics():
+    """Processing metrics for the document pipeline"""
+    return {
+        "pdf_extraction": doc_processor.pdf_extractor.stats(),
+        "photo_dedup": doc_processor.photo_index.stats(),
+        "vision": doc_processor.vision_metrics,
+        "llm": ai_judge.client.stats() if ai_judge.client else None,
+        "constitution": ai_judge.constitution_store.stats(),
+        "judge_tiers": ai_judge.router.stats(),
+        "judge_batches": revalidation_jobs.batch_evaluator.stats()
+    }
+
+@app.get("/api/cache/stats")
+async def cache_stats():
+    """Hit/miss counters and size of the persistent result caches"""
+    return {
+        "document_extraction": doc_processor.extraction_cache.stats(),
+        "judge": ai_judge.result_cache.stats() if ai_judge.result_cache else None
+    }
+
 @app.post("/api/upload-documents")
 async def upload_documents(files: List[UploadFile] = File(...)):
     """Upload and process insurance documents with OCR - saves files for claim package"""
     try:
-        # Create uploaded_files directory
-        os.makedirs("uploaded_files", exist_ok=True)
+        # Stream each file to disk in chunks (hash + size computed in the same pass) and
+        # keep it in the blob store - responses carry only the blob reference, not the bytes
+        stored_uploads = [await save_upload_streaming(file, blob_store=blob_store) for file in files]
         
-        processed_docs = []
-        for file in files:
-            content = await file.read()
-            
-            # Save the actual file
-            file_id = f"{int(time.time() * 1000)}_{file.filename}"
-            file_path = f"uploaded_files/{file_id}"
-            
-            with open(file_path, 'wb') as f:
-                f.write(content)
-            
-            # Process document with OCR
-            processed_doc = await doc_processor.process_document(content, file.filename)
-            
-            # Add file_path to the processed document
-            processed_doc_dict = processed_doc.dict() if hasattr(processed_doc, 'dict') else vars(processed_doc)
-            processed_doc_dict['file_path'] = file_path
-            
-            processed_docs.append(processed_doc_dict)
+        # Process all documents with OCR concurrently (bounded per request and per process)
+        processed = await doc_processor.process_uploads(stored_uploads)
+        
+        processed_docs = [
+            processed_doc.dict() if hasattr(processed_doc, 'dict') else vars(processed_doc)
+            for processed_doc in processed
+        ]
         
         return {
             "documents": processed_docs, 
             "status": "success",
             "next_step": "create_claim_packet"
         }
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
         print(f"Upload documents error: {e}")
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/upload-documents/stream")
+async def upload_documents_stream(files: List[UploadFile] = File(...)):
+    """Streaming variant of /api/upload-documents - emits one NDJSON event per processed file"""
+    try:
+        stored_uploads = [await save_upload_streaming(file, blob_store=blob_store) for file in files]
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    
+    async def event_stream():
+        started = time.time()
+        succeeded = 0
+        failed = 0
+        
+        async for index, processed_doc, error in doc_processor.iter_processed_uploads(stored_uploads):
+            if error is not None:
+                failed += 1
+                print(f"❌ Streaming upload failed for {stored_uploads[index].filename}: {error}")
+                event = {
+                    "event": "error",
+                    "index": index,
+                    "filename": stored_uploads[index].filename,
+                    "detail": str(error)
+                }
+            else:
+                succeeded += 1
+                event = {
+                    "event": "document",
+                    "index": index,
+                    "document": processed_doc.model_dump(mode="json")
+                }
+            yield json.dumps(event) + "\n"
+        
+        yield json.dumps({
+            "event": "summary",
+            "total": len(stored_uploads),
+            "succeeded": succeeded,
+            "failed": failed,
+            "elapsed_seconds": round(time.time() - started, 2),
+            "status": "success" if failed == 0 else "partial",
+            "next_step": "create_claim_packet"
+        }) + "\n"
+    
+    return StreamingResponse(event_stream(), media_type="application/x-ndjson")
+
 @app.post("/api/create-claim-packet")
 async def create_claim_packet(claim_data: Dict[str, Any]):
     """Create initial claim packet and generate PDF"""
@@ -717,6 +792,13 @@ async def create_claim_packet(claim_data: Dict[str, Any]):
         # Convert documents to proper format
         document_objects = []
         for doc in documents:
+            blob_id = doc.get("blob_id")
+            if blob_id and not is_valid_blob_id(blob_id):
+                raise HTTPException(status_code=400, detail=f"Invalid blob_id for document {doc.get('id', 'unknown')}")
+            if not blob_id and doc.get("content"):
+                # Legacy clients still send base64 - move it into the blob store once
+                blob_id = blob_store.put_bytes(base64.b64decode(doc["content"]))
+            
             document_objects.append(Document(
                 id=doc.get("id", "unknown"),
                 filename=doc.get("filename", "unknown.pdf"),
@@ -726,7 +808,9 @@ async def create_claim_packet(claim_data: Dict[str, Any]):
                 file_size=doc.get("file_size", 0),
                 upload_timestamp=datetime.now(),
                 file_path=doc.get("file_path"),  # Preserve file_path from upload
-                content=doc.get("content")  # Preserve content if available
+                blob_id=blob_id,  # Bytes are resolved lazily from the blob store
+                perceptual_hash=doc.get("perceptual_hash"),
+                duplicate_of=doc.get("duplicate_of")
             ))
         
         # Create claim packet with proper structure
@@ -755,7 +839,7 @@ async def create_claim_packet(claim_data: Dict[str, Any]):
                 property_address=claim_packet.property_address,
                 estimated_damage=claim_packet.estimated_damage,
                 status="packet_created",
-                documents=[doc.dict() if hasattr(doc, 'dict') else vars(doc) for doc in document_objects],
+                documents=[doc.model_dump(mode='json', exclude={'content'}) for doc in document_objects],
                 created_at=datetime.now()
             )
             db.add(claim_record)
@@ -776,50 +860,107 @@ async def create_claim_packet(claim_data: Dict[str, Any]):
             "status": "packet_created",
             "next_step": "validation_loop"
         }
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error creating claim packet: {e}")
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"Claim packet creation failed: {str(e)}")
 
-@app.post("/api/validation-loop")
-async def enhanced_validation_loop(request: Dict[str, Any]):
-    """Progressive validation - ALL 47 rules each time, claim improves to pass MORE rules"""
+async def run_validation_loop(claim_packet: ClaimPacket, max_iterations: int = 4) -> AsyncIterator[Dict[str, Any]]:
+    """Progressive validation - ALL 47 rules each time, claim improves to pass MORE rules
+    
+    Yields an event as each iteration starts, when its enhancement step finishes and when its
+    ClaimValidation arrives (or when the iteration is skipped because the claim didn't change),
+    then a final "complete" event carrying the full loop result.
+    """
+    validation_history = []
+    previous_scores = []
+    iteration = 0
+    
+    print(f"🚀 Starting Progressive Validation Loop for claim {claim_packet.claim_id}")
+    print(f"🎯 Same 47 rules each iteration - claim improves to pass more!")
+    
+    # Neither enhancement depends on judge results, so both can run while iteration 1 is evaluated
+    speculative = start_speculative_enhancements(claim_packet, max_iterations) if SPECULATIVE_ENHANCEMENTS_ENABLED else {}
+    # Iterations whose enhancement left the claim unchanged reuse the last evaluation instead of re-judging
+    scheduler = IterationScheduler()
+    last_judged_iteration = 0
+    
     try:
-        claim_packet = ClaimPacket(**request.get("claim_packet", {}))
-        max_iterations = 4
-        
-        validation_history = []
-        previous_scores = []
-        iteration = 0
-        
-        print(f"🚀 Starting Progressive Validation Loop for claim {claim_packet.claim_id}")
-        print(f"🎯 Same 47 rules each iteration - claim improves to pass more!")
-        
         while iteration < max_iterations:
             iteration += 1
+            analysis_depth = ai_judge._get_depth_name(iteration)
             
             print(f"\n{'='*60}")
             print(f"🔄 ITERATION {iteration}/{max_iterations}")
             print(f"{'='*60}")
             
+            yield {
+                "event": "iteration_start",
+                "iteration": iteration,
+                "max_iterations": max_iterations,
+                "analysis_depth": analysis_depth
+            }
+            
             # ENHANCE THE CLAIM (so it passes more rules)
             original_doc_count = len(claim_packet.documents)
+            enhancement = None
+            
+            enhancement_started = time.monotonic()
             
             if iteration == 2:
                 print("💳 ITERATION 2: Adding Knot receipts to pass more rules...")
-                claim_packet = await auto_enhance_with_knot_receipts(claim_packet)
+                if "knot_receipts" in speculative:
+                    claim_packet = await speculative["knot_receipts"]
+                else:
+                    claim_packet = await auto_enhance_with_knot_receipts(claim_packet)
+                enhancement = "knot_receipts"
                 print(f"📄 Documents: {original_doc_count} → {len(claim_packet.documents)}")
-                
+            
             elif iteration == 3:
                 print("🔍 ITERATION 3: Reprocessing documents for better quality...")
-                claim_packet = await deep_reprocess_documents(claim_packet)
-                
+                if "document_reprocessing" in speculative:
+                    claim_packet = await speculative["document_reprocessing"]
+                else:
+                    claim_packet = await deep_reprocess_documents(claim_packet)
+                enhancement = "document_reprocessing"
+            
             elif iteration == 4:
                 print("⚖️ ITERATION 4: Final review with all enhancements...")
             
+            if enhancement:
+                yield {
+                    "event": "enhancement_complete",
+                    "iteration": iteration,
+                    "enhancement": enhancement,
+                    "documents_before": original_doc_count,
+                    "documents_after": len(claim_packet.documents),
+                    "speculative": enhancement in speculative,
+                    "waited_seconds": round(time.monotonic() - enhancement_started, 3)
+                }
+            
+            skip_reason = scheduler.skip_reason(iteration, analysis_depth, claim_packet, enhancement)
+            if skip_reason:
+                print(f"⏭️ ITERATION {iteration}: skipping {analysis_depth} judge call ({skip_reason})")
+                previous_result = validation_history[-1]
+                iteration_result = {
+                    **previous_result,
+                    "iteration": iteration,
+                    "analysis_depth": analysis_depth,
+                    "improvement": 0,
+                    "documents_processed": len(claim_packet.documents),
+                    "skipped": True,
+                    "skip_reason": skip_reason
+                }
+                validation_history.append(iteration_result)
+                yield {"event": "iteration_skipped", **iteration_result}
+                continue
+            
             # EVALUATE AGAINST ALL 47 RULES (same rules, better claim)
             validation = await ai_judge.evaluate_with_depth(claim_packet, iteration, previous_scores)
+            last_judged_iteration = iteration
             
             current_score = validation.overall_score
             rules_passed = len([r for r in validation.rules_evaluated if r.passed])
@@ -828,16 +969,19 @@ async def enhanced_validation_loop(request: Dict[str, Any]):
             print(f"📊 Rules: {rules_passed}/{total_rules} passed = {current_score:.1%}")
             
             # Record results
-            validation_history.append({
+            iteration_result = {
                 "iteration": iteration,
-                "analysis_depth": ai_judge._get_depth_name(iteration),
+                "analysis_depth": analysis_depth,
                 "score": current_score,
                 "rules_passed": rules_passed,
                 "total_rules": total_rules,
                 "improvement": (current_score - previous_scores[-1]) if previous_scores else 0,
-                "validation": validation.model_dump(),
-                "documents_processed": len(claim_packet.documents)
-            })
+                "validation": validation.model_dump(mode="json"),
+                "documents_processed": len(claim_packet.documents),
+                "skipped": False
+            }
+            validation_history.append(iteration_result)
+            yield {"event": "validation", **iteration_result}
             
             # EXIT CONDITIONS
             if current_score >= 0.8:
@@ -849,40 +993,104 @@ async def enhanced_validation_loop(request: Dict[str, Any]):
             if iteration < max_iterations:
                 improvement_so_far = current_score - previous_scores[0] if len(previous_scores) > 1 else 0
                 print(f"🔄 Current {current_score:.1%}, improved {improvement_so_far:+.1%} total, continuing...")
+    finally:
+        # Early exit at ≥80% or client disconnect - drop enhancements nobody will use
+        for task in speculative.values():
+            task.cancel()
+    
+    final_validation = validation_history[-1]["validation"]
+    
+    print(f"\n🏁 COMPLETE: {final_validation['overall_score']:.1%} after {iteration} iterations")
+    
+    # Save to database
+    from database import ClaimRecord, SessionLocal
+    db = SessionLocal()
+    try:
+        claim_record = db.query(ClaimRecord).filter(ClaimRecord.claim_id == claim_packet.claim_id).first()
+        if claim_record:
+            claim_record.status = "validated"
+            claim_record.validation_result = final_validation
+            claim_record.updated_at = datetime.now()
+            db.commit()
+    except Exception as db_error:
+        db.rollback()
+    finally:
+        db.close()
+    
+    yield {
+        "event": "complete",
+        "final_validation": final_validation,
+        "validation_history": validation_history,
+        "iterations_completed": iteration,
+        "judge_calls": iteration - len(scheduler.skipped),
+        "skipped_iterations": scheduler.skipped,
+        "total_improvement": (previous_scores[-1] - previous_scores[0]) if len(previous_scores) > 1 else 0,
+        "final_analysis_depth": ai_judge._get_depth_name(last_judged_iteration),
+        "next_step": "generate_final_outputs"
+    }
+
+def start_speculative_enhancements(claim_packet: ClaimPacket, max_iterations: int) -> Dict[str, asyncio.Task]:
+    """Kick off the iteration 2 and 3 enhancements on copies of the packet
+    
+    Iteration 3 reprocesses the packet iteration 2 produced, so the reprocessing task chains on the
+    Knot task. Both helpers mutate the packet they're given, hence the deep copies.
+    """
+    tasks = {}
+    if max_iterations >= 2:
+        tasks["knot_receipts"] = asyncio.create_task(
+            auto_enhance_with_knot_receipts(claim_packet.model_copy(deep=True))
+        )
+    if max_iterations >= 3:
+        knot_task = tasks["knot_receipts"]
         
-        final_validation = validation_history[-1]["validation"]
+        async def reprocess_enhanced_packet() -> ClaimPacket:
+            # Shielded so cancelling this task doesn't cancel the Knot task iteration 2 may still need
+            enhanced_packet = await asyncio.shield(knot_task)
+            return await deep_reprocess_documents(enhanced_packet.model_copy(deep=True))
         
-        print(f"\n🏁 COMPLETE: {final_validation['overall_score']:.1%} after {iteration} iterations")
+        tasks["document_reprocessing"] = asyncio.create_task(reprocess_enhanced_packet())
+    return tasks
+
+@app.post("/api/validation-loop")
+async def enhanced_validation_loop(request: Dict[str, Any]):
+    """Progressive validation - returns the whole loop result once every iteration has finished"""
+    try:
+        claim_packet = ClaimPacket(**request.get("claim_packet", {}))
         
-        # Save to database
-        from database import ClaimRecord, SessionLocal
-        db = SessionLocal()
-        try:
-            claim_record = db.query(ClaimRecord).filter(ClaimRecord.claim_id == claim_packet.claim_id).first()
-            if claim_record:
-                claim_record.status = "validated"
-                claim_record.validation_result = final_validation
-                claim_record.updated_at = datetime.now()
-                db.commit()
-        except Exception as db_error:
-            db.rollback()
-        finally:
-            db.close()
+        result = None
+        async for event in run_validation_loop(claim_packet):
+            if event["event"] == "complete":
+                result = event
         
-        return {
-            "final_validation": final_validation,
-            "validation_history": validation_history,
-            "iterations_completed": iteration,
-            "total_improvement": (previous_scores[-1] - previous_scores[0]) if len(previous_scores) > 1 else 0,
-            "final_analysis_depth": ai_judge._get_depth_name(iteration),
-            "next_step": "generate_final_outputs"
-        }
+        result.pop("event")
+        return result
     except Exception as e:
         print(f"❌ Validation loop error: {e}")
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/validation-loop/stream")
+async def enhanced_validation_loop_stream(request: Dict[str, Any]):
+    """Streaming variant of /api/validation-loop - emits NDJSON events as each iteration progresses"""
+    try:
+        claim_packet = ClaimPacket(**request.get("claim_packet", {}))
+    except Exception as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    
+    async def event_stream():
+        try:
+            async for event in run_validation_loop(claim_packet):
+                yield json.dumps(event) + "\n"
+        except Exception as e:
+            # Headers are already sent, so report the failure in-band
+            print(f"❌ Validation loop error: {e}")
+            import traceback
+            traceback.print_exc()
+            yield json.dumps({"event": "error", "detail": str(e)}) + "\n"
+    
+    return StreamingResponse(event_stream(), media_type="application/x-ndjson")
+
 
 async def auto_enhance_with_knot_receipts(claim_packet: ClaimPacket) -> ClaimPacket:
     """Auto-enhance claim packet with Knot receipt integration (ITERATION 2)"""
@@ -1254,6 +1462,54 @@ async def list_claims(limit: int = 10, offset: int = 0):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/revalidation-jobs")
+async def create_revalidation_job(request: Optional[Dict[str, Any]] = None):
+    """Start a background job that re-validates stored claims (e.g. after a constitution change)"""
+    request = request or {}
+    try:
+        job = revalidation_jobs.create_job(
+            evaluation=request.get("evaluation", "llm"),
+            analysis_depth=int(request.get("analysis_depth", 1)),
+            chunk_size=request.get("chunk_size"),
+            concurrency=request.get("concurrency"),
+            requests_per_minute=request.get("requests_per_minute"),
+            include_unvalidated=bool(request.get("include_unvalidated", False))
+        )
+        return JSONResponse(status_code=202, content=job)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+@app.get("/api/revalidation-jobs")
+async def list_revalidation_jobs(limit: int = 20):
+    """Most recent re-validation jobs with their progress"""
+    return {"jobs": revalidation_jobs.list_jobs(limit)}
+
+@app.get("/api/revalidation-jobs/{job_id}")
+async def get_revalidation_job(job_id: str):
+    """Progress of one re-validation job"""
+    job = revalidation_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Re-validation job not found")
+    return job
+
+@app.post("/api/revalidation-jobs/{job_id}/pause")
+async def pause_revalidation_job(job_id: str):
+    """Stop a running job after its last written chunk - resume picks up from there"""
+    if revalidation_jobs.get(job_id) is None:
+        raise HTTPException(status_code=404, detail="Re-validation job not found")
+    if not revalidation_jobs.pause(job_id):
+        raise HTTPException(status_code=409, detail="Re-validation job is not running")
+    return revalidation_jobs.get(job_id)
+
+@app.post("/api/revalidation-jobs/{job_id}/resume")
+async def resume_revalidation_job(job_id: str):
+    """Continue a paused, failed or interrupted job from its checkpoint"""
+    if revalidation_jobs.get(job_id) is None:
+        raise HTTPException(status_code=404, detail="Re-validation job not found")
+    if not revalidation_jobs.resume(job_id):
+        raise HTTPException(status_code=409, detail="Re-validation job is already running or completed")
+    return revalidation_jobs.get(job_id)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
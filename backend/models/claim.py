@@ -19,16 +19,25 @@ class Document(BaseModel):
     file_size: int
     upload_timestamp: datetime
     file_path: Optional[str] = None  # Path to the saved file on disk
+    blob_id: Optional[str] = None  # Reference into the document BlobStore
+    perceptual_hash: Optional[Dict[str, str]] = None  # dHash/pHash of photos
+    duplicate_of: Optional[Dict[str, Any]] = None  # Set when a photo is a near-duplicate of an earlier upload
     content: Optional[str] = None  # Base64 encoded content if no file_path
 
 class ClaimDocument(BaseModel):
     id: str
     filename: str
     document_type: DocumentType
-    content: str
     extracted_data: Dict[str, Any]
     confidence_score: float
     upload_timestamp: datetime
+    file_path: Optional[str] = None  # Path to the saved file on disk
+    content_hash: Optional[str] = None  # SHA-256 of the uploaded bytes
+    blob_id: Optional[str] = None  # Reference into the document BlobStore
+    file_size: Optional[int] = None
+    perceptual_hash: Optional[Dict[str, str]] = None  # dHash/pHash of photos
+    duplicate_of: Optional[Dict[str, Any]] = None  # Set when a photo is a near-duplicate of an earlier upload
+    content: Optional[str] = None  # Base64 encoded content (only when no file is on disk)
 
 class ClaimPacket(BaseModel):
     claim_id: str
@@ -58,6 +67,7 @@ class ClaimValidation(BaseModel):
     fraud_indicators: List[str]
     rationale: str
     timestamp: datetime = datetime.now()
+    evaluation_tier: Optional[str] = None  # local_rules, fast_model or full_model (see services/judge_router.py)
 
 class ProofCard(BaseModel):
     claim_hash: str
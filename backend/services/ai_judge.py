@@ -1,12 +1,27 @@
 import os
-import json
-import hashlib
+import time
 import aiohttp
-from typing import List, Dict, Any
-from datetime import datetime, timedelta
-import anthropic
+from typing import List, Dict, Any, Optional
+from datetime import datetime
 from models.claim import ClaimPacket, ClaimValidation, ValidationRule
-import yaml
+from services.claim_features import ClaimFeatureIndex
+from services.claim_digest import ClaimDigest, compact_json, compact_extracted_data, describe_document
+from services.llm_client import get_llm_client
+from services.judge_cache import JudgeResultCache, JUDGE_CACHE_ENABLED
+from services.judge_prompts import build_system_prompt, JUDGE_TOOLS, JUDGE_TOOL_LIST
+from services.constitution import Constitution, ConstitutionStore
+from services.judge_router import JudgeTierRouter, LOCAL_TIER
+
+JUDGE_MODEL = "claude-sonnet-4-20250514"
+
+# (max_tokens, temperature) of each judge stage's request
+STAGE_REQUEST_SETTINGS = {
+    "LOCAL_EVALUATION": (4000, 0.1),
+    "BASIC_SCREENING": (3000, 0.1),
+    "ENHANCED_WITH_RECEIPTS": (4000, 0.1),
+    "FORENSIC_ANALYSIS": (4500, 0.05),  # Lower temperature for more consistent forensic analysis
+    "EXPERT_REVIEW": (5000, 0.02)  # Very low temperature for consistent expert decisions
+}
 
 class AIJudge:
     def __init__(self):
@@ -17,335 +32,86 @@ class AIJudge:
         else:
             print(f"✅ CLAUDE_API_KEY loaded: {api_key[:10]}...{api_key[-10:]}")
             try:
-                self.client = anthropic.Anthropic(api_key=api_key)
+                # Shared async client - judge calls no longer block the event loop
+                self.client = get_llm_client()
                 print("✅ Claude API client initialized successfully")
             except Exception as e:
                 print(f"❌ Failed to initialize Claude API client: {e}")
                 self.client = None
         
-        self.constitution = self._load_constitution()
+        # Versioned YAML with precompiled rule logic, reloaded when the file changes
+        self.constitution_store = ConstitutionStore()
+        self._loaded_constitution = self.constitution_store.current()
         self.eigencloud_url = os.getenv("EIGENCLOUD_URL", "http://localhost:9000")
         
-    def _load_constitution(self) -> Dict[str, Any]:
-        """Load the wildfire insurance claim validation constitution"""
-        constitution = {
-            "rules": {
-                "completeness": [
-                    {
-                        "id": "COMP_001",
-                        "description": "Property photos must show both pre-fire condition AND post-fire damage",
-                        "weight": 0.15,
-                        "required": True
-                    },
-                    {
-                        "id": "COMP_002", 
-                        "description": "All replacement items >$100 require receipt or proof of purchase",
-                        "weight": 0.12,
-                        "required": True
-                    },
-                    {
-                        "id": "COMP_003",
-                        "description": "All expenses must be within policy coverage period",
-                        "weight": 0.18,
-                        "required": True
-                    },
-                    {
-                        "id": "COMP_004",
-                        "description": "Policy documentation must be present and valid",
-                        "weight": 0.10,
-                        "required": True
-                    },
-                    {
-                        "id": "COMP_005",
-                        "description": "Fire department incident report must be provided",
-                        "weight": 0.08,
-                        "required": True
-                    },
-                    {
-                        "id": "COMP_006",
-                        "description": "Evacuation orders or warnings must be documented",
-                        "weight": 0.06,
-                        "required": False
-                    },
-                    {
-                        "id": "COMP_007",
-                        "description": "Property deed or ownership proof required",
-                        "weight": 0.05,
-                        "required": True
-                    },
-                    {
-                        "id": "COMP_008",
-                        "description": "Utility disconnection notices if applicable",
-                        "weight": 0.03,
-                        "required": False
-                    },
-                    {
-                        "id": "COMP_009",
-                        "description": "Temporary housing receipts for additional living expenses",
-                        "weight": 0.04,
-                        "required": False
-                    },
-                    {
-                        "id": "COMP_010",
-                        "description": "Professional damage assessment or contractor estimates",
-                        "weight": 0.07,
-                        "required": True
-                    },
-                    {
-                        "id": "COMP_011",
-                        "description": "Inventory list of damaged/destroyed personal property",
-                        "weight": 0.06,
-                        "required": True
-                    },
-                    {
-                        "id": "COMP_012",
-                        "description": "Weather reports confirming fire conditions on incident date",
-                        "weight": 0.04,
-                        "required": False
-                    }
-                ],
-                "damage_assessment": [
-                    {
-                        "id": "DAMAGE_001",
-                        "description": "Damage must be directly attributable to wildfire",
-                        "weight": 0.20,
-                        "required": True
-                    },
-                    {
-                        "id": "DAMAGE_002",
-                        "description": "Replacement costs must align with local market rates",
-                        "weight": 0.08,
-                        "required": False
-                    },
-                    {
-                        "id": "DAMAGE_003",
-                        "description": "Structural damage consistent with fire/heat exposure",
-                        "weight": 0.12,
-                        "required": True
-                    },
-                    {
-                        "id": "DAMAGE_004",
-                        "description": "Smoke damage patterns must be consistent with wildfire",
-                        "weight": 0.08,
-                        "required": False
-                    },
-                    {
-                        "id": "DAMAGE_005",
-                        "description": "No evidence of pre-existing damage being claimed",
-                        "weight": 0.10,
-                        "required": True
-                    },
-                    {
-                        "id": "DAMAGE_006",
-                        "description": "Damage timeline consistent with fire progression",
-                        "weight": 0.06,
-                        "required": True
-                    },
-                    {
-                        "id": "DAMAGE_007",
-                        "description": "Heat damage patterns match wildfire characteristics",
-                        "weight": 0.05,
-                        "required": False
-                    },
-                    {
-                        "id": "DAMAGE_008",
-                        "description": "Ash and debris evidence consistent with wildfire",
-                        "weight": 0.04,
-                        "required": False
-                    },
-                    {
-                        "id": "DAMAGE_009",
-                        "description": "Neighboring property damage supports claim",
-                        "weight": 0.03,
-                        "required": False
-                    },
-                    {
-                        "id": "DAMAGE_010",
-                        "description": "No evidence of arson or intentional fire setting",
-                        "weight": 0.15,
-                        "required": True
-                    }
-                ],
-                "documentation_quality": [
-                    {
-                        "id": "DOC_001",
-                        "description": "Photos must be clear, dated, and show full context",
-                        "weight": 0.07,
-                        "required": False
-                    },
-                    {
-                        "id": "DOC_002",
-                        "description": "Receipts must be legible with clear merchant, date, and items",
-                        "weight": 0.10,
-                        "required": True
-                    },
-                    {
-                        "id": "DOC_003",
-                        "description": "Documents must be original or certified copies",
-                        "weight": 0.05,
-                        "required": True
-                    },
-                    {
-                        "id": "DOC_004",
-                        "description": "Photo metadata must be intact and verifiable",
-                        "weight": 0.04,
-                        "required": False
-                    },
-                    {
-                        "id": "DOC_005",
-                        "description": "Multiple angles of damage must be documented",
-                        "weight": 0.06,
-                        "required": True
-                    },
-                    {
-                        "id": "DOC_006",
-                        "description": "Before and after photos must show same perspectives",
-                        "weight": 0.05,
-                        "required": False
-                    }
-                ],
-                "temporal_validation": [
-                    {
-                        "id": "TIME_001",
-                        "description": "Claim filed within policy-specified timeframe",
-                        "weight": 0.12,
-                        "required": True
-                    },
-                    {
-                        "id": "TIME_002",
-                        "description": "Purchases made after incident date are valid",
-                        "weight": 0.08,
-                        "required": True
-                    },
-                    {
-                        "id": "TIME_003",
-                        "description": "Emergency expenses incurred within reasonable timeframe",
-                        "weight": 0.05,
-                        "required": False
-                    },
-                    {
-                        "id": "TIME_004",
-                        "description": "Contractor estimates obtained within 30 days of incident",
-                        "weight": 0.04,
-                        "required": False
-                    },
-                    {
-                        "id": "TIME_005",
-                        "description": "No suspicious pre-incident activity patterns",
-                        "weight": 0.10,
-                        "required": True
-                    }
-                ],
-                "geographic_validation": [
-                    {
-                        "id": "GEO_001",
-                        "description": "Property location within confirmed fire perimeter",
-                        "weight": 0.15,
-                        "required": True
-                    },
-                    {
-                        "id": "GEO_002",
-                        "description": "Evacuation zone matches property address",
-                        "weight": 0.08,
-                        "required": False
-                    },
-                    {
-                        "id": "GEO_003",
-                        "description": "Wind patterns support fire spread to property",
-                        "weight": 0.05,
-                        "required": False
-                    },
-                    {
-                        "id": "GEO_004",
-                        "description": "Topography consistent with fire behavior",
-                        "weight": 0.04,
-                        "required": False
-                    }
-                ],
-                "policy_compliance": [
-                    {
-                        "id": "POLICY_001",
-                        "description": "Claim amount within policy limits",
-                        "weight": 0.12,
-                        "required": True
-                    },
-                    {
-                        "id": "POLICY_002",
-                        "description": "Deductible properly calculated and applied",
-                        "weight": 0.08,
-                        "required": True
-                    },
-                    {
-                        "id": "POLICY_003",
-                        "description": "Coverage effective on incident date",
-                        "weight": 0.15,
-                        "required": True
-                    },
-                    {
-                        "id": "POLICY_004",
-                        "description": "No policy exclusions apply to claimed damages",
-                        "weight": 0.10,
-                        "required": True
-                    },
-                    {
-                        "id": "POLICY_005",
-                        "description": "Premium payments current at time of loss",
-                        "weight": 0.08,
-                        "required": True
-                    }
-                ],
-                "financial_validation": [
-                    {
-                        "id": "FIN_001",
-                        "description": "Claimed amounts supported by documentation",
-                        "weight": 0.12,
-                        "required": True
-                    },
-                    {
-                        "id": "FIN_002",
-                        "description": "No duplicate claims across multiple policies",
-                        "weight": 0.10,
-                        "required": True
-                    },
-                    {
-                        "id": "FIN_003",
-                        "description": "Depreciation properly calculated for personal property",
-                        "weight": 0.06,
-                        "required": False
-                    },
-                    {
-                        "id": "FIN_004",
-                        "description": "Labor costs align with local market rates",
-                        "weight": 0.05,
-                        "required": False
-                    },
-                    {
-                        "id": "FIN_005",
-                        "description": "Material costs verified against supplier pricing",
-                        "weight": 0.04,
-                        "required": False
-                    }
-                ]
-            },
-            "fraud_indicators": [
-                "Receipts dated before incident date",
-                "Duplicate receipts across multiple claims",
-                "Unusual purchasing patterns",
-                "Mismatched locations and incident area",
-                "Excessive luxury item purchases",
-                "Multiple claims filed simultaneously",
-                "Inconsistent damage descriptions",
-                "Suspicious contractor relationships",
-                "Inflated replacement cost estimates",
-                "Missing or altered photo metadata",
-                "Claim filed immediately after policy purchase",
-                "Previous fraud history on record",
-                "Inconsistent witness statements",
-                "Unusual payment method patterns",
-                "Backdated receipts or invoices"
-            ]
+        # Each depth runs on the cheapest tier (local rules / fast model) that gives a decisive answer
+        self.router = JudgeTierRouter(JUDGE_MODEL)
+        
+        # Re-validating an unchanged claim returns the stored evaluation instead of re-running Claude
+        self.result_cache = JudgeResultCache(self._constitution_version(), self.router.signature()) if JUDGE_CACHE_ENABLED else None
+        
+    def _current_constitution(self) -> Constitution:
+        """The constitution in effect, picking up edits to its file"""
+        loaded = self.constitution_store.current()
+        if loaded is not self._loaded_constitution:
+            self._loaded_constitution = loaded
+            if self.result_cache is not None:
+                self.result_cache.constitution_version = loaded.version
+        return loaded
+    
+    @property
+    def constitution(self) -> Dict[str, Any]:
+        return self._current_constitution().data
+    
+    @property
+    def constitution_text(self) -> str:
+        return self._current_constitution().text
+    
+    def _system_prompt(self, stage: str) -> List[Dict[str, Any]]:
+        """Cacheable system prompt for a judge stage (constitution + stage instructions + output schema)"""
+        return build_system_prompt(self.constitution_text, stage)
+    
+    def _stage_params(self, stage: str, claim_message: str, model: str = JUDGE_MODEL) -> Dict[str, Any]:
+        """messages.create parameters of a judge call for `stage`, apart from the tools"""
+        max_tokens, temperature = STAGE_REQUEST_SETTINGS[stage]
+        return {
+            "model": model,
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            "system": self._system_prompt(stage),
+            "messages": [{"role": "user", "content": claim_message}]
         }
-        return constitution
+    
+    def _stage_message(self, stage: str, claim_packet: ClaimPacket, previous_scores: list) -> str:
+        """The claim-specific user message of a judge stage"""
+        if stage == "LOCAL_EVALUATION":
+            return self._local_evaluation_message(claim_packet)
+        if stage == "BASIC_SCREENING":
+            return self._basic_screening_message(claim_packet)
+        if stage == "ENHANCED_WITH_RECEIPTS":
+            return self._enhanced_with_receipts_message(claim_packet, previous_scores)
+        if stage == "FORENSIC_ANALYSIS":
+            return self._forensic_analysis_message(claim_packet, previous_scores)
+        return self._expert_review_message(claim_packet, previous_scores)
+    
+    async def _request_analysis(self, stage: str, claim_message: str, model: str = JUDGE_MODEL) -> Dict[str, Any]:
+        """One judge call for `stage`, answered through the stage's tool schema and parsed as it streams"""
+        started = time.monotonic()
+        
+        def on_field(name: str, value: Any):
+            if name == "overall_score":
+                print(f"📈 {stage}: overall_score {value} streamed after {time.monotonic() - started:.1f}s")
+        
+        return await self.client.create_structured(
+            JUDGE_TOOLS[stage],
+            tools=JUDGE_TOOL_LIST,
+            on_field=on_field,
+            **self._stage_params(stage, claim_message, model)
+        )
+    
+    def _constitution_version(self) -> str:
+        """Declared version plus a digest of the rules, so editing a rule invalidates cached evaluations"""
+        return self._current_constitution().version
     
     async def evaluate_claim(self, claim_packet: ClaimPacket) -> ClaimValidation:
         """Evaluate a complete claim packet using Claude AI (skip TEE for now)"""
@@ -356,8 +122,11 @@ class AIJudge:
         # This ensures we get real AI-powered dynamic scoring instead of hardcoded TEE responses
         
         try:
-            # Use Claude AI evaluation directly (defaults to basic screening)
-            return await self._evaluate_locally(claim_packet)
+            # Use Claude AI evaluation directly (defaults to basic screening), cheapest decisive tier first
+            return await self._route(
+                "LOCAL_EVALUATION", claim_packet,
+                lambda model: self._evaluate_locally(claim_packet, model=model)
+            )
         except Exception as e:
             print(f"⚠️ Claude AI evaluation failed, falling back to basic rules: {e}")
             # Fallback to basic rules if Claude fails
@@ -365,23 +134,60 @@ class AIJudge:
     
     async def evaluate_with_depth(self, claim_packet: ClaimPacket, iteration: int, 
                                  previous_scores: list = []) -> ClaimValidation:
-        """Evaluate claim with progressive depth based on iteration number"""
+        """Evaluate claim with progressive depth based on iteration number (cached per claim fingerprint)"""
+        
+        depth = self._get_depth_name(iteration)
+        print(f"🔍 AI Judge Iteration {iteration} - Analysis Depth: {depth}")
+        # Pick up constitution edits before the cache key is built from its version
+        self._current_constitution()
         
-        print(f"🔍 AI Judge Iteration {iteration} - Analysis Depth: {self._get_depth_name(iteration)}")
+        if self.result_cache is None:
+            return await self._route_depth(claim_packet, iteration, previous_scores)
         
+        cache_key = self.result_cache.key(claim_packet, depth, previous_scores)
+        cached = self.result_cache.get(cache_key, claim_packet.claim_id)
+        if cached:
+            print(f"⚡ Judge cache hit: {depth} ({cached.overall_score:.1%})")
+            return cached
+        
+        validation = await self._route_depth(claim_packet, iteration, previous_scores)
+        
+        # Local-rule results are cheap to recompute, and fallbacks mean Claude was unavailable -
+        # don't pin them for the whole TTL
+        if validation.evaluation_tier != LOCAL_TIER:
+            self.result_cache.set(cache_key, validation)
+        return validation
+    
+    async def _route(self, depth: str, claim_packet: ClaimPacket, run_model) -> ClaimValidation:
+        """Run a depth through the tier router (local rules only when Claude isn't configured or is failing)"""
+        if not self.client:
+            return await self._evaluate_with_basic_rules(claim_packet)
+        if not self.client.available():
+            print(f"🔌 Claude circuit breaker open - evaluating {depth} with local rules")
+            return await self._evaluate_with_basic_rules(claim_packet)
+        return await self.router.evaluate(depth, lambda: self._evaluate_with_basic_rules(claim_packet), run_model)
+    
+    async def _route_depth(self, claim_packet: ClaimPacket, iteration: int, previous_scores: list) -> ClaimValidation:
+        return await self._route(
+            self._get_depth_name(iteration), claim_packet,
+            lambda model: self._evaluate_at_depth(claim_packet, iteration, previous_scores, model=model)
+        )
+    
+    async def _evaluate_at_depth(self, claim_packet: ClaimPacket, iteration: int, 
+                                 previous_scores: list, model: str = JUDGE_MODEL) -> ClaimValidation:
         try:
             if iteration == 1:
-                return await self._basic_screening(claim_packet)
+                return await self._basic_screening(claim_packet, model=model)
             elif iteration == 2:
-                return await self._enhanced_with_receipts(claim_packet, previous_scores)
+                return await self._enhanced_with_receipts(claim_packet, previous_scores, model=model)
             elif iteration == 3:
-                return await self._forensic_analysis(claim_packet, previous_scores)
+                return await self._forensic_analysis(claim_packet, previous_scores, model=model)
             else:
-                return await self._expert_review(claim_packet, previous_scores)
+                return await self._expert_review(claim_packet, previous_scores, model=model)
         except Exception as e:
             print(f"⚠️ Depth-based evaluation failed: {e}")
             # Fallback to basic evaluation
-            return await self._evaluate_locally(claim_packet)
+            return await self._evaluate_locally(claim_packet, model=model)
     
     def _get_depth_name(self, iteration: int) -> str:
         """Get human-readable depth name for iteration"""
@@ -458,7 +264,7 @@ class AIJudge:
             rationale=f"EigenCloud TEE Evaluation: {tee_result['rationale']} | TEE Address: {tee_result.get('evaluator_address', 'unknown')} | Attestation: {tee_result.get('attestation_hash', 'unknown')[:16]}..."
         )
     
-    async def _evaluate_locally(self, claim_packet: ClaimPacket) -> ClaimValidation:
+    async def _evaluate_locally(self, claim_packet: ClaimPacket, model: str = JUDGE_MODEL) -> ClaimValidation:
         """REAL AI-powered evaluation using Claude API instead of mock rules"""
         
         if not self.client:
@@ -469,122 +275,58 @@ class AIJudge:
         try:
             print("🤖 Starting REAL Claude AI evaluation...")
             
-            # Prepare claim data for Claude analysis
-            claim_summary = {
-                "claim_id": claim_packet.claim_id,
-                "claimant_name": claim_packet.claimant_name,
-                "incident_date": claim_packet.incident_date.isoformat(),
-                "property_address": claim_packet.property_address,
-                "estimated_damage": claim_packet.estimated_damage,
-                "document_count": len(claim_packet.documents),
-                "documents": []
-            }
-            
-            # Include document analysis data
-            for doc in claim_packet.documents:
-                doc_info = {
-                    "filename": doc.filename,
-                    "type": str(doc.document_type),
-                    "confidence": doc.confidence_score,
-                    "extracted_data": doc.extracted_data or {}
-                }
-                claim_summary["documents"].append(doc_info)
-            
-            # Calculate days since incident
-            from datetime import datetime
-            try:
-                incident_date = datetime.fromisoformat(str(claim_packet.incident_date).replace('Z', '+00:00'))
-                days_since = (datetime.now() - incident_date).days
-            except:
-                days_since = 0
-            
-            claim_summary["days_since_incident"] = days_since
-            
-            # Create comprehensive Claude prompt for REAL AI analysis
-            prompt = f"""You are an expert AI Judge for wildfire insurance claims. Analyze this claim comprehensively and provide a detailed validation score.
-
-CLAIM DATA:
-{json.dumps(claim_summary, indent=2)}
-
-ANALYSIS REQUIREMENTS:
-Evaluate this claim across these key areas:
-1. Document Completeness (photos, receipts, policy docs, fire reports)
-2. Damage Assessment (severity vs claim amount, wildfire evidence)
-3. Timing Analysis (claim filing timeline, coverage period)
-4. Fraud Risk Indicators (suspicious patterns, inconsistencies)
-5. Document Quality (OCR confidence, content analysis)
-
-For each document, analyze the extracted_data to determine:
-- If photos show actual fire/wildfire damage
-- If receipts are legitimate and match claim amounts
-- If reports are official and detailed
-- If timing is consistent and reasonable
-
-WILDFIRE CLAIM SPECIFIC RULES:
-- Photos must show clear fire damage (charring, ash, structural damage)
-- Receipts should be for fire-related repairs/replacement
-- Claims filed >60 days after incident are suspicious
-- High-value claims need substantial documentation
-- Look for evidence of wildfire causation vs other fire types
-
-Return a detailed JSON analysis:
-{{
-  "overall_score": 0.0-1.0,
-  "confidence": 0.0-1.0,
-  "approved": true/false,
-  "rules_passed": 0-28,
-  "rules_failed": 0-28,
-  "missing_documents": ["list of missing doc types"],
-  "fraud_indicators": ["list of specific concerns"],
-  "detailed_rationale": "Comprehensive explanation of score",
-  "key_findings": ["Critical observations"],
-  "recommendations": ["What claimant should do to improve"]
-}}
-
-Be thorough and realistic. Base your analysis on ACTUAL document content and real insurance industry standards."""
+            claim_message = self._local_evaluation_message(claim_packet)
 
             print("🔍 Sending claim to Claude for REAL AI analysis...")
             
             # Call Claude API for real analysis
             try:
-                response = self.client.messages.create(
-                    model="claude-sonnet-4-20250514",
-                    max_tokens=4000,
-                    temperature=0.1,
-                    messages=[{
-                        "role": "user", 
-                        "content": prompt
-                    }]
-                )
-                
-                # Parse Claude's response
-                analysis_text = response.content[0].text
-                print(f"🤖 Claude AI analysis received: {len(analysis_text)} characters")
-                print(f"🔍 Claude response preview: {analysis_text[:200]}...")
-                
+                claude_analysis = await self._request_analysis("LOCAL_EVALUATION", claim_message, model=model)
             except Exception as claude_error:
                 print(f"❌ Claude API call failed: {claude_error}")
                 print("📋 Falling back to basic rule evaluation")
                 return await self._evaluate_with_basic_rules(claim_packet)
             
-            # Extract JSON from Claude's response
-            import re
-            json_match = re.search(r'\{.*\}', analysis_text, re.DOTALL)
-            if json_match:
-                claude_analysis = json.loads(json_match.group())
-                print(f"✅ Claude analysis parsed successfully. Score: {claude_analysis.get('overall_score', 'N/A')}")
-                
-                # Convert Claude's analysis to our ClaimValidation format
-                return self._convert_claude_analysis_to_validation(claude_analysis, claim_packet)
-            else:
-                print("❌ Failed to parse Claude analysis JSON, falling back to basic rules")
-                return await self._evaluate_with_basic_rules(claim_packet)
+            print(f"✅ Claude analysis parsed successfully. Score: {claude_analysis['overall_score']}")
+            
+            # Convert Claude's analysis to our ClaimValidation format
+            return self._convert_claude_analysis_to_validation(claude_analysis, claim_packet)
                 
         except Exception as e:
             print(f"❌ Claude AI evaluation failed: {e}")
             print("📋 Falling back to basic rule evaluation")
             return await self._evaluate_with_basic_rules(claim_packet)
     
+    def _local_evaluation_message(self, claim_packet: ClaimPacket) -> str:
+        """Claim data for the LOCAL_EVALUATION stage"""
+        # Prepare claim data for Claude analysis - documents are digested to fit the prompt token budget
+        documents, omitted = ClaimDigest(claim_packet).documents(describe_document)
+        claim_summary = {
+            "claim_id": claim_packet.claim_id,
+            "claimant_name": claim_packet.claimant_name,
+            "incident_date": claim_packet.incident_date.isoformat(),
+            "property_address": claim_packet.property_address,
+            "estimated_damage": claim_packet.estimated_damage,
+            "document_count": len(claim_packet.documents),
+            "documents": documents
+        }
+        if omitted:
+            claim_summary["omitted_documents"] = omitted
+        
+        # Calculate days since incident
+        from datetime import datetime
+        try:
+            incident_date = datetime.fromisoformat(str(claim_packet.incident_date).replace('Z', '+00:00'))
+            days_since = (datetime.now() - incident_date).days
+        except:
+            days_since = 0
+        
+        claim_summary["days_since_incident"] = days_since
+        
+        # Claim-specific suffix - the LOCAL_EVALUATION instructions are in the cached system prompt
+        return f"""CLAIM DATA:
+{compact_json(claim_summary)}"""
+    
     def _convert_claude_analysis_to_validation(self, claude_analysis: Dict[str, Any], claim_packet: ClaimPacket, analysis_depth: str = "BASIC") -> ClaimValidation:
         """Convert Claude's analysis to ClaimValidation format using ALL 47 constitution rules"""
         
@@ -642,17 +384,20 @@ Be thorough and realistic. Base your analysis on ACTUAL document content and rea
             rationale=f"{depth_info} | Claude AI: {base_rationale}"
         )
     
-    async def _evaluate_with_basic_rules(self, claim_packet: ClaimPacket) -> ClaimValidation:
-        """Comprehensive basic rule evaluation (fallback when Claude API fails)"""
+    async def _evaluate_with_basic_rules(self, claim_packet: ClaimPacket, now: Optional[datetime] = None) -> ClaimValidation:
+        """Comprehensive basic rule evaluation (fallback when Claude API fails)
         
-        # Evaluate each rule category with actual logic
-        completeness_results = await self._evaluate_completeness(claim_packet)
-        damage_results = await self._evaluate_damage_assessment(claim_packet)
-        quality_results = await self._evaluate_documentation_quality(claim_packet)
-        fraud_results = await self._detect_fraud_indicators(claim_packet)
+        `now` pins the filing-delay rules to a point in time (backtests); it defaults to the current time.
+        """
+        constitution = self._current_constitution()
         
-        # Combine all rule evaluations
-        all_rules = completeness_results + damage_results + quality_results
+        # One pass over the documents - every rule below reads from this index
+        features = ClaimFeatureIndex(claim_packet, now=now)
+        feature_values = features.rule_features()
+        
+        # Evaluate each locally scored rule with its compiled constitution logic
+        all_rules = self._evaluate_rules(constitution, feature_values)
+        fraud_results = constitution.fraud_indicators(feature_values)
         
         # Calculate weighted score with actual rule weights
         total_weight = sum(rule.weight for rule in all_rules)
@@ -668,17 +413,16 @@ Be thorough and realistic. Base your analysis on ACTUAL document content and rea
             confidence = 0.0
         
         # Determine approval with strict criteria
-        approval_threshold = 0.75
-        has_critical_failures = any(not rule.passed and rule.weight >= 0.15 for rule in all_rules)
-        approved = (weighted_score >= approval_threshold and 
+        has_critical_failures = any(not rule.passed and rule.weight >= constitution.critical_weight for rule in all_rules)
+        approved = (weighted_score >= constitution.approval_threshold and 
                    len(fraud_results) == 0 and 
                    not has_critical_failures)
         
         # Generate detailed rationale
-        rationale = await self._generate_rationale(claim_packet, all_rules, weighted_score, fraud_results)
+        rationale = await self._generate_rationale(features, all_rules, weighted_score, fraud_results)
         
         # Identify missing documents
-        missing_docs = self._identify_missing_documents(claim_packet, all_rules)
+        missing_docs = self._identify_missing_documents(features, all_rules)
         
         return ClaimValidation(
             claim_id=claim_packet.claim_id,
@@ -688,152 +432,15 @@ Be thorough and realistic. Base your analysis on ACTUAL document content and rea
             rules_evaluated=all_rules,
             missing_documents=missing_docs,
             fraud_indicators=fraud_results,
-            rationale=f"Local Evaluation: {rationale}"
+            rationale=f"Local Evaluation: {rationale}",
+            evaluation_tier=LOCAL_TIER
         )
     
-    async def _evaluate_completeness(self, claim_packet: ClaimPacket) -> List[ValidationRule]:
-        """Evaluate completeness rules with real logic"""
-        results = []
-        
-        # Get document types present
-        doc_types = [doc.document_type.value if hasattr(doc.document_type, 'value') else str(doc.document_type) for doc in claim_packet.documents]
-        
-        for rule_config in self.constitution["rules"]["completeness"]:
-            rule_id = rule_config["id"]
-            
-            # Real validation logic for each completeness rule
-            if rule_id == "COMP_001":  # Property photos requirement
-                photo_docs = [doc for doc in claim_packet.documents if 'photo' in str(doc.document_type).lower()]
-                has_photos = len(photo_docs) >= 2
-                
-                if has_photos:
-                    # Check if photos show damage
-                    damage_evidence = any(
-                        doc.extracted_data and 
-                        isinstance(doc.extracted_data, dict) and
-                        any(keyword in str(doc.extracted_data).lower() 
-                            for keyword in ['damage', 'fire', 'burn', 'char', 'smoke'])
-                        for doc in photo_docs
-                    )
-                    passed = damage_evidence
-                    confidence = 0.9 if damage_evidence else 0.3
-                    rationale = f"Found {len(photo_docs)} photos with {'damage evidence' if damage_evidence else 'no clear damage evidence'}"
-                else:
-                    passed = False
-                    confidence = 0.95
-                    rationale = f"Only {len(photo_docs)} photos provided, need at least 2"
-                    
-            elif rule_id == "COMP_002":  # Receipt requirement for items >$100
-                if claim_packet.estimated_damage > 100:
-                    receipt_docs = [doc for doc in claim_packet.documents if 'receipt' in str(doc.document_type).lower()]
-                    passed = len(receipt_docs) > 0
-                    confidence = 0.9
-                    rationale = f"Found {len(receipt_docs)} receipts for ${claim_packet.estimated_damage:,.2f} claim"
-                else:
-                    passed = True
-                    confidence = 1.0
-                    rationale = "Low value claim, receipts not required"
-                    
-            elif rule_id == "COMP_003":  # Coverage period check
-                from datetime import datetime, timedelta
-                try:
-                    incident_date = datetime.fromisoformat(str(claim_packet.incident_date).replace('Z', '+00:00'))
-                    now = datetime.now()
-                    days_since_incident = (now - incident_date).days
-                    
-                    # Most policies require claims within 60 days
-                    passed = days_since_incident <= 60
-                    confidence = 0.95
-                    rationale = f"Claim filed {days_since_incident} days after incident"
-                except:
-                    passed = False
-                    confidence = 0.5
-                    rationale = "Unable to parse incident date"
-            else:
-                # Default evaluation for other rules
-                passed = len(claim_packet.documents) > 0
-                confidence = 0.7
-                rationale = "Basic document presence check"
-            
-            results.append(ValidationRule(
-                rule_id=rule_config["id"],
-                description=rule_config["description"],
-                weight=rule_config["weight"],
-                passed=passed,
-                confidence=confidence,
-                rationale=rationale
-            ))
-        
-        return results
-    
-    async def _evaluate_damage_assessment(self, claim_packet: ClaimPacket) -> List[ValidationRule]:
-        """Evaluate damage assessment rules with real logic"""
+    def _evaluate_rules(self, constitution: Constitution, feature_values: Dict[str, Any]) -> List[ValidationRule]:
+        """Evaluate the locally scored rules - rules without their own logic use their category's default"""
         results = []
-        
-        for rule_config in self.constitution["rules"]["damage_assessment"]:
-            rule_id = rule_config["id"]
-            
-            if rule_id == "DAMAGE_001":  # Damage severity assessment
-                photo_docs = [doc for doc in claim_packet.documents if 'photo' in str(doc.document_type).lower()]
-                
-                if photo_docs:
-                    # Analyze extracted data for severity indicators
-                    severe_indicators = 0
-                    total_photos = len(photo_docs)
-                    
-                    for doc in photo_docs:
-                        if doc.extracted_data and isinstance(doc.extracted_data, dict):
-                            data_str = str(doc.extracted_data).lower()
-                            if any(word in data_str for word in ['severe', 'total', 'complete', 'destroyed']):
-                                severe_indicators += 1
-                    
-                    severity_ratio = severe_indicators / total_photos if total_photos > 0 else 0
-                    damage_amount = claim_packet.estimated_damage
-                    
-                    # Cross-check severity with claim amount
-                    if damage_amount > 100000 and severity_ratio < 0.3:
-                        passed = False
-                        confidence = 0.8
-                        rationale = f"High damage claim (${damage_amount:,.0f}) but low severity evidence ({severity_ratio:.1%})"
-                    elif damage_amount < 10000 and severity_ratio > 0.7:
-                        passed = False
-                        confidence = 0.7
-                        rationale = f"Low damage claim (${damage_amount:,.0f}) but high severity evidence ({severity_ratio:.1%})"
-                    else:
-                        passed = True
-                        confidence = 0.85
-                        rationale = f"Damage severity consistent with claim amount (${damage_amount:,.0f})"
-                else:
-                    passed = False
-                    confidence = 0.9
-                    rationale = "No photos available for damage assessment"
-                    
-            elif rule_id == "DAMAGE_002":  # Wildfire causation
-                photo_docs = [doc for doc in claim_packet.documents if 'photo' in str(doc.document_type).lower()]
-                wildfire_evidence = 0
-                
-                for doc in photo_docs:
-                    if doc.extracted_data and isinstance(doc.extracted_data, dict):
-                        data_str = str(doc.extracted_data).lower()
-                        if any(word in data_str for word in ['fire', 'burn', 'char', 'smoke', 'ash', 'wildfire']):
-                            wildfire_evidence += 1
-                
-                if len(photo_docs) > 0:
-                    evidence_ratio = wildfire_evidence / len(photo_docs)
-                    passed = evidence_ratio >= 0.5
-                    confidence = 0.8
-                    rationale = f"Wildfire evidence in {wildfire_evidence}/{len(photo_docs)} photos ({evidence_ratio:.1%})"
-                else:
-                    passed = False
-                    confidence = 0.9
-                    rationale = "No photos to assess wildfire causation"
-                    
-            else:
-                # Default damage assessment
-                passed = claim_packet.estimated_damage > 0
-                confidence = 0.7
-                rationale = f"Basic damage amount check: ${claim_packet.estimated_damage:,.2f}"
-            
+        for rule_config, logic in constitution.local_rules:
+            passed, confidence, rationale = logic.evaluate(feature_values)
             results.append(ValidationRule(
                 rule_id=rule_config["id"],
                 description=rule_config["description"],
@@ -842,127 +449,9 @@ Be thorough and realistic. Base your analysis on ACTUAL document content and rea
                 confidence=confidence,
                 rationale=rationale
             ))
-        
         return results
     
-    async def _evaluate_documentation_quality(self, claim_packet: ClaimPacket) -> List[ValidationRule]:
-        """Evaluate documentation quality rules with real logic"""
-        results = []
-        
-        for rule_config in self.constitution["rules"]["documentation_quality"]:
-            rule_id = rule_config["id"]
-            
-            if rule_id == "QUALITY_001":  # Photo clarity and quality
-                photo_docs = [doc for doc in claim_packet.documents if 'photo' in str(doc.document_type).lower()]
-                
-                if photo_docs:
-                    high_quality_photos = 0
-                    for doc in photo_docs:
-                        if doc.extracted_data and isinstance(doc.extracted_data, dict):
-                            quality_str = str(doc.extracted_data).lower()
-                            if any(word in quality_str for word in ['clear', 'good', 'adequate', 'high']):
-                                high_quality_photos += 1
-                            elif any(word in quality_str for word in ['blurry', 'poor', 'low', 'unclear']):
-                                continue
-                            else:
-                                high_quality_photos += 0.5  # Assume neutral quality
-                    
-                    quality_ratio = high_quality_photos / len(photo_docs)
-                    passed = quality_ratio >= 0.6
-                    confidence = 0.8
-                    rationale = f"{high_quality_photos:.1f}/{len(photo_docs)} photos meet quality standards ({quality_ratio:.1%})"
-                else:
-                    passed = False
-                    confidence = 0.9
-                    rationale = "No photos to assess quality"
-                    
-            elif rule_id == "QUALITY_002":  # Document completeness
-                total_docs = len(claim_packet.documents)
-                doc_types = set(str(doc.document_type).lower() for doc in claim_packet.documents)
-                
-                # Check for variety of document types
-                has_photos = any('photo' in dt for dt in doc_types)
-                has_receipts = any('receipt' in dt for dt in doc_types)
-                has_policy = any('policy' in dt for dt in doc_types)
-                
-                completeness_score = sum([has_photos, has_receipts, has_policy]) / 3
-                passed = completeness_score >= 0.5 and total_docs >= 2
-                confidence = 0.85
-                rationale = f"Document variety: {completeness_score:.1%} (photos:{has_photos}, receipts:{has_receipts}, policy:{has_policy})"
-                
-            else:
-                # Default quality check
-                passed = len(claim_packet.documents) > 0
-                confidence = 0.7
-                rationale = f"Basic document presence: {len(claim_packet.documents)} documents"
-            
-            results.append(ValidationRule(
-                rule_id=rule_config["id"],
-                description=rule_config["description"],
-                weight=rule_config["weight"],
-                passed=passed,
-                confidence=confidence,
-                rationale=rationale
-            ))
-        
-        return results
-    
-    async def _detect_fraud_indicators(self, claim_packet: ClaimPacket) -> List[str]:
-        """Detect potential fraud indicators with real logic"""
-        indicators = []
-        
-        # Check claim amount vs typical wildfire damage
-        damage_amount = claim_packet.estimated_damage
-        if damage_amount > 500000:
-            indicators.append(f"Unusually high claim amount: ${damage_amount:,.2f}")
-        elif damage_amount < 1000:
-            indicators.append(f"Suspiciously low claim amount: ${damage_amount:,.2f}")
-        
-        # Check timing - claims filed too quickly or too late
-        from datetime import datetime, timedelta
-        try:
-            incident_date = datetime.fromisoformat(str(claim_packet.incident_date).replace('Z', '+00:00'))
-            now = datetime.now()
-            days_since_incident = (now - incident_date).days
-            
-            if days_since_incident < 1:
-                indicators.append("Claim filed same day as incident - unusually fast")
-            elif days_since_incident > 90:
-                indicators.append(f"Claim filed {days_since_incident} days after incident - delayed reporting")
-        except:
-            indicators.append("Invalid or suspicious incident date")
-        
-        # Check document consistency
-        photo_docs = [doc for doc in claim_packet.documents if 'photo' in str(doc.document_type).lower()]
-        if len(photo_docs) == 0:
-            indicators.append("No photographic evidence provided")
-        elif len(photo_docs) > 20:
-            indicators.append(f"Excessive number of photos: {len(photo_docs)}")
-        
-        # Check for inconsistent damage descriptions
-        damage_keywords = []
-        for doc in photo_docs:
-            if doc.extracted_data and isinstance(doc.extracted_data, dict):
-                data_str = str(doc.extracted_data).lower()
-                if 'severe' in data_str or 'total' in data_str:
-                    damage_keywords.append('severe')
-                elif 'minor' in data_str or 'light' in data_str:
-                    damage_keywords.append('minor')
-        
-        if len(set(damage_keywords)) > 1 and damage_amount > 100000:
-            indicators.append("Inconsistent damage severity descriptions for high-value claim")
-        
-        # Check for missing critical documents
-        doc_types = [str(doc.document_type).lower() for doc in claim_packet.documents]
-        if damage_amount > 50000:
-            if not any('receipt' in dt for dt in doc_types):
-                indicators.append("High-value claim missing receipts/proof of purchase")
-            if not any('policy' in dt for dt in doc_types):
-                indicators.append("No policy documentation provided")
-        
-        return indicators[:5]  # Return top 5 indicators
-    
-    async def _generate_rationale(self, claim_packet: ClaimPacket, rules: List[ValidationRule], 
+    async def _generate_rationale(self, features: ClaimFeatureIndex, rules: List[ValidationRule], 
                                   score: float, fraud_indicators: List[str]) -> str:
         """Generate detailed rationale for claim decision"""
         
@@ -993,27 +482,24 @@ Be thorough and realistic. Base your analysis on ACTUAL document content and rea
             rationale_parts.append(f"⚠️ {len(fraud_indicators)} fraud indicators detected")
         
         # Document assessment
-        photo_count = len([d for d in claim_packet.documents if 'photo' in str(d.document_type).lower()])
-        rationale_parts.append(f"Evidence: {photo_count} photos, {len(claim_packet.documents)} total documents")
+        rationale_parts.append(f"Evidence: {len(features.photos)} photos, {features.document_count} total documents")
         
         return " | ".join(rationale_parts)
     
-    def _identify_missing_documents(self, claim_packet: ClaimPacket, rules: List[ValidationRule]) -> List[str]:
+    def _identify_missing_documents(self, features: ClaimFeatureIndex, rules: List[ValidationRule]) -> List[str]:
         """Identify missing documents based on failed rules"""
         missing = []
         
-        doc_types = [str(doc.document_type).lower() for doc in claim_packet.documents]
-        
         # Check for missing photos
-        if not any('photo' in dt for dt in doc_types):
+        if not features.photos:
             missing.append("Property damage photos")
         
         # Check for missing receipts on high-value claims
-        if claim_packet.estimated_damage > 10000 and not any('receipt' in dt for dt in doc_types):
+        if features.estimated_damage > 10000 and not features.receipts:
             missing.append("Receipts for high-value items")
         
         # Check for missing policy documents
-        if not any('policy' in dt for dt in doc_types):
+        if not features.policies:
             missing.append("Insurance policy documentation")
         
         # Add specific missing items based on failed rules
@@ -1026,7 +512,7 @@ Be thorough and realistic. Base your analysis on ACTUAL document content and rea
         
         return missing[:5]  # Limit to top 5
     
-    async def _basic_screening(self, claim_packet: ClaimPacket) -> ClaimValidation:
+    async def _basic_screening(self, claim_packet: ClaimPacket, model: str = JUDGE_MODEL) -> ClaimValidation:
         """ITERATION 1: Basic surface-level screening for quick approval/rejection"""
         
         print("🏃‍♂️ ITERATION 1: Basic Screening - Surface-level validation")
@@ -1035,87 +521,46 @@ Be thorough and realistic. Base your analysis on ACTUAL document content and rea
             return await self._evaluate_with_basic_rules(claim_packet)
         
         try:
-            # Prepare basic claim summary
-            claim_summary = {
-                "claim_id": claim_packet.claim_id,
-                "claimant_name": claim_packet.claimant_name,
-                "incident_date": claim_packet.incident_date.isoformat(),
-                "property_address": claim_packet.property_address,
-                "estimated_damage": claim_packet.estimated_damage,
-                "document_count": len(claim_packet.documents),
-                "document_types": [str(doc.document_type) for doc in claim_packet.documents]
-            }
-            
-            # Calculate filing delay
-            from datetime import datetime
-            try:
-                incident_date = datetime.fromisoformat(str(claim_packet.incident_date).replace('Z', '+00:00'))
-                days_since = (datetime.now() - incident_date).days
-            except:
-                days_since = 0
-            
-            # BASIC SCREENING PROMPT - Surface-level validation
-            prompt = f"""You are conducting BASIC SCREENING for a wildfire insurance claim (ITERATION 1).
-
-CLAIM OVERVIEW:
-{json.dumps(claim_summary, indent=2)}
-
-Filing Delay: {days_since} days since incident
-
-BASIC SCREENING CHECKLIST:
-1. DOCUMENT PRESENCE: Are essential documents provided?
-2. OBVIOUS RED FLAGS: Any glaring timeline/amount inconsistencies?
-3. FILING TIMELINE: Is claim filed within reasonable timeframe?
-4. DAMAGE AMOUNT: Does estimated damage seem plausible?
-5. BASIC COMPLETENESS: Minimum documentation threshold met?
-
-SURFACE-LEVEL ANALYSIS RULES:
-- Claims filed >90 days after incident are suspicious (red flag)
-- Claims with no photos for damage >$10,000 are incomplete
-- Claims with damage >$100,000 need substantial documentation
-- Basic document variety expected (photos + reports + receipts)
-
-Return BASIC SCREENING analysis in JSON:
-{{
-  "overall_score": 0.0-1.0,
-  "confidence": 0.0-1.0,
-  "approved": true/false,
-  "analysis_depth": "BASIC_SCREENING",
-  "quick_assessment": "Can this claim be approved/rejected immediately?",
-  "red_flags": ["List critical issues requiring deeper analysis"],
-  "strengths": ["List positive aspects of the claim"],
-  "recommendation": "APPROVE_NOW / NEEDS_ENHANCEMENT / REJECT_NOW",
-  "detailed_rationale": "Surface-level assessment focusing on obvious issues"
-}}
-
-Focus on SPEED and OBVIOUSNESS. Don't deep-dive yet - just identify clear patterns."""
+            claim_message = self._basic_screening_message(claim_packet)
             
             print("🔍 Sending BASIC SCREENING to Claude...")
             
-            response = self.client.messages.create(
-                model="claude-sonnet-4-20250514",
-                max_tokens=3000,
-                temperature=0.1,
-                messages=[{"role": "user", "content": prompt}]
-            )
-            
-            analysis_text = response.content[0].text
-            print(f"🎯 Basic screening analysis received: {len(analysis_text)} characters")
-            
-            # Parse Claude's response
-            import re
-            json_match = re.search(r'\{.*\}', analysis_text, re.DOTALL)
-            if json_match:
-                claude_analysis = json.loads(json_match.group())
-                return self._convert_claude_analysis_to_validation(claude_analysis, claim_packet, "BASIC_SCREENING")
-            else:
-                return await self._evaluate_with_basic_rules(claim_packet)
+            claude_analysis = await self._request_analysis("BASIC_SCREENING", claim_message, model=model)
+            print(f"🎯 Basic screening analysis received: score {claude_analysis['overall_score']:.2f}")
+            return self._convert_claude_analysis_to_validation(claude_analysis, claim_packet, "BASIC_SCREENING")
                 
         except Exception as e:
             print(f"❌ Basic screening failed: {e}")
             return await self._evaluate_with_basic_rules(claim_packet)
     
-    async def _enhanced_with_receipts(self, claim_packet: ClaimPacket, previous_scores: list) -> ClaimValidation:
+    def _basic_screening_message(self, claim_packet: ClaimPacket) -> str:
+        """Claim data for the BASIC_SCREENING stage"""
+        # Prepare basic claim summary
+        claim_summary = {
+            "claim_id": claim_packet.claim_id,
+            "claimant_name": claim_packet.claimant_name,
+            "incident_date": claim_packet.incident_date.isoformat(),
+            "property_address": claim_packet.property_address,
+            "estimated_damage": claim_packet.estimated_damage,
+            "document_count": len(claim_packet.documents),
+            "document_types": ClaimDigest(claim_packet).type_counts()
+        }
+        
+        # Calculate filing delay
+        from datetime import datetime
+        try:
+            incident_date = datetime.fromisoformat(str(claim_packet.incident_date).replace('Z', '+00:00'))
+            days_since = (datetime.now() - incident_date).days
+        except:
+            days_since = 0
+        
+        # Claim-specific suffix - the BASIC_SCREENING instructions are in the cached system prompt
+        return f"""CLAIM OVERVIEW:
+{compact_json(claim_summary)}
+
+Filing Delay: {days_since} days since incident"""
+    
+    async def _enhanced_with_receipts(self, claim_packet: ClaimPacket, previous_scores: list, model: str = JUDGE_MODEL) -> ClaimValidation:
         """ITERATION 2: Enhanced analysis with Knot receipt integration"""
         
         print("💳 ITERATION 2: Enhanced Analysis - With Knot receipt integration")
@@ -1124,142 +569,89 @@ Focus on SPEED and OBVIOUSNESS. Don't deep-dive yet - just identify clear patter
             return await self._evaluate_with_basic_rules(claim_packet)
         
         try:
-            # Calculate receipt statistics
-            receipt_docs = [doc for doc in claim_packet.documents if 'receipt' in str(doc.document_type).lower()]
-            total_receipts = len(receipt_docs)
-            
-            # Calculate total receipt amounts
-            total_receipt_amount = 0.0
-            knot_receipts = 0
-            receipt_merchants = []
+            claim_message = self._enhanced_with_receipts_message(claim_packet, previous_scores)
             
-            for doc in receipt_docs:
-                if doc.extracted_data:
-                    amount_str = str(doc.extracted_data.get("total_amount", "0"))
-                    # Clean amount string
-                    amount = float(amount_str.replace("$", "").replace(",", ""))
-                    total_receipt_amount += amount
-                    
-                    merchant = doc.extracted_data.get("merchant", "Unknown")
-                    receipt_merchants.append(merchant)
-                    
-                    if doc.extracted_data.get("knot_synced") or "knot" in doc.id:
-                        knot_receipts += 1
+            print("💰 Sending ENHANCED ANALYSIS to Claude...")
             
-            # Enhanced claim analysis with receipt data
-            enhanced_summary = {
-                "claim_id": claim_packet.claim_id,
-                "estimated_damage": claim_packet.estimated_damage,
-                "total_receipt_amount": total_receipt_amount,
-                "receipt_coverage": (total_receipt_amount / claim_packet.estimated_damage * 100) if claim_packet.estimated_damage > 0 else 0,
-                "knot_receipts": knot_receipts,
-                "total_receipts": total_receipts,
-                "merchants": list(set(receipt_merchants)),
-                "previous_score": previous_scores[-1] if previous_scores else 0,
-                "documents": [
-                    {
-                        "type": str(doc.document_type),
-                        "confidence": doc.confidence_score,
-                        "key_data": doc.extracted_data
-                    } for doc in claim_packet.documents
-                ]
+            claude_analysis = await self._request_analysis("ENHANCED_WITH_RECEIPTS", claim_message, model=model)
+            print(f"💳 Enhanced analysis received: score {claude_analysis['overall_score']:.2f}")
+            return self._convert_claude_analysis_to_validation(claude_analysis, claim_packet, "ENHANCED_WITH_RECEIPTS")
+                
+        except Exception as e:
+            print(f"❌ Enhanced analysis failed: {e}")
+            return await self._evaluate_with_basic_rules(claim_packet)
+    
+    def _enhanced_with_receipts_message(self, claim_packet: ClaimPacket, previous_scores: list) -> str:
+        """Claim data for the ENHANCED_WITH_RECEIPTS stage"""
+        # Calculate receipt statistics
+        receipt_docs = [doc for doc in claim_packet.documents if 'receipt' in str(doc.document_type).lower()]
+        total_receipts = len(receipt_docs)
+        
+        # Calculate total receipt amounts
+        total_receipt_amount = 0.0
+        knot_receipts = 0
+        receipt_merchants = []
+        
+        for doc in receipt_docs:
+            if doc.extracted_data:
+                amount_str = str(doc.extracted_data.get("total_amount", "0"))
+                # Clean amount string
+                amount = float(amount_str.replace("$", "").replace(",", ""))
+                total_receipt_amount += amount
+                
+                merchant = doc.extracted_data.get("merchant", "Unknown")
+                receipt_merchants.append(merchant)
+                
+                if doc.extracted_data.get("knot_synced") or "knot" in doc.id:
+                    knot_receipts += 1
+        
+        # Enhanced claim analysis with receipt data
+        enhanced_summary = {
+            "claim_id": claim_packet.claim_id,
+            "estimated_damage": claim_packet.estimated_damage,
+            "total_receipt_amount": total_receipt_amount,
+            "receipt_coverage": (total_receipt_amount / claim_packet.estimated_damage * 100) if claim_packet.estimated_damage > 0 else 0,
+            "knot_receipts": knot_receipts,
+            "total_receipts": total_receipts,
+            "merchants": list(set(receipt_merchants)),
+            "previous_score": previous_scores[-1] if previous_scores else 0
+        }
+        enhanced_summary["documents"], omitted = ClaimDigest(claim_packet).documents(
+            lambda features: {
+                "type": features.document.document_type.value,
+                "confidence": round(features.document.confidence_score, 2),
+                "key_data": compact_extracted_data(features.document.extracted_data)
             }
-            
-            # ENHANCED PROMPT with receipt analysis and IMPROVEMENT INSTRUCTION
-            prompt = f"""You are conducting ENHANCED ANALYSIS for a wildfire insurance claim (ITERATION 2).
+        )
+        if omitted:
+            enhanced_summary["omitted_documents"] = omitted
+        
+        current_evidence = f"""CURRENT EVIDENCE:
+- Documents: {len(claim_packet.documents)}
+- Receipts: {total_receipts} totaling ${total_receipt_amount:,.2f} ({knot_receipts} auto-fetched from Knot API)
+- Financial coverage: Receipt total (${total_receipt_amount:,.2f}) vs Damage (${claim_packet.estimated_damage:,.2f}) = {enhanced_summary['receipt_coverage']:.1f}% coverage"""
+        
+        # Claim-specific suffix - the ENHANCED_WITH_RECEIPTS instructions are in the cached system prompt
+        if not previous_scores:
+            # Re-validation and batch sweeps start at this depth with no earlier iteration to compare against
+            return f"""ENHANCED CLAIM DATA WITH RECEIPTS:
+{compact_json(enhanced_summary)}
 
-ENHANCED CLAIM DATA WITH RECEIPTS:
-{json.dumps(enhanced_summary, indent=2)}
+{current_evidence}"""
+        
+        return f"""ENHANCED CLAIM DATA WITH RECEIPTS:
+{compact_json(enhanced_summary)}
 
 PREVIOUS ITERATION:
 - Previous Score: {previous_scores[-1]*100:.1f}%
 - Documents Added: {len(claim_packet.documents) - len([d for d in claim_packet.documents if 'knot' not in d.id])} new receipts via Knot API
 - Enhancement: The claim now has MORE documentation and evidence than before
 
-⚠️ CRITICAL INSTRUCTION: This claim has been IMPROVED with additional receipts and evidence. 
-Your score should REFLECT this improvement. Re-evaluate the ENHANCED claim with the NEW documentation.
-
-SCORING GUIDANCE:
-- The claim now has {len(claim_packet.documents)} documents (more than iteration 1)
-- Additional receipts provide financial validation (worth +10-20% alone)
-- Knot API receipts are highly credible (95%+ confidence)
-- More evidence = higher completeness score
-- Your score MUST reflect the additional documentation quality
-
-If iteration 1 scored {previous_scores[-1]*100:.1f}%, iteration 2 should score HIGHER due to:
-1. More receipts ({total_receipts} receipts totaling ${total_receipt_amount:,.2f})
-2. Better financial coverage ({enhanced_summary['receipt_coverage']:.1f}% documented)
-3. Auto-fetched credible data from Knot API
-4. Enhanced claim completeness
-
-Expected Score Range: {(previous_scores[-1]*100 + 5):.1f}% - {(previous_scores[-1]*100 + 20):.1f}% (higher due to improvements)
-
-ENHANCED ANALYSIS FOCUS:
-1. RECEIPT CORRELATION: Do receipts support the damage claim narrative?
-2. FINANCIAL VALIDATION: Receipt total (${total_receipt_amount:,.2f}) vs Damage (${claim_packet.estimated_damage:,.2f}) = {enhanced_summary['receipt_coverage']:.1f}% coverage
-3. MERCHANT ANALYSIS: Are merchants appropriate for wildfire recovery?
-4. SPENDING PATTERNS: Do purchase patterns indicate legitimate fire recovery?
-5. AUTO-FETCHED DATA: {knot_receipts} receipts from Knot API integration
-6. TIMELINE CORRELATION: Purchase dates vs incident vs filing timeline
-
-ENHANCED VALIDATION RULES:
-- Receipt coverage <25% for claims >$50k is concerning
-- Knot auto-fetched receipts have higher credibility than manual uploads
-- Fire recovery merchants: Home Depot, contractors, emergency suppliers
-- Luxury items purchased long after incident are suspicious
-- Emergency purchases (hotels, basic necessities) within 30 days are expected
-
-CROSS-REFERENCE ANALYSIS:
-- Do receipt amounts align with claimed damage severity?
-- Are receipt dates logical relative to incident date?
-- Do merchants match expected fire recovery needs?
-- Is there progression from emergency to replacement purchases?
+{current_evidence}
 
-Return ENHANCED analysis in JSON:
-{{
-  "overall_score": 0.0-1.0,
-  "confidence": 0.0-1.0,
-  "approved": true/false,
-  "analysis_depth": "ENHANCED_WITH_RECEIPTS",
-  "receipt_analysis": {{
-    "coverage_percentage": {enhanced_summary['receipt_coverage']:.1f},
-    "merchant_appropriateness": "HIGH/MEDIUM/LOW",
-    "timeline_consistency": "CONSISTENT/SUSPICIOUS/INVALID",
-    "spending_patterns": "LEGITIMATE/QUESTIONABLE/FRAUDULENT"
-  }},
-  "financial_validation": "Detailed analysis of receipt-to-damage correlation",
-  "improvement_areas": ["Specific areas where claim could be enhanced"],
-  "detailed_rationale": "Enhanced analysis focusing on financial evidence and receipt correlation"
-}}
-
-Analyze the FINANCIAL EVIDENCE thoroughly. Consider receipt quality and auto-fetched Knot data credibility."""
-            
-            print("💰 Sending ENHANCED ANALYSIS to Claude...")
-            
-            response = self.client.messages.create(
-                model="claude-sonnet-4-20250514",
-                max_tokens=4000,
-                temperature=0.1,
-                messages=[{"role": "user", "content": prompt}]
-            )
-            
-            analysis_text = response.content[0].text
-            print(f"💳 Enhanced analysis received: {len(analysis_text)} characters")
-            
-            # Parse Claude's response
-            import re
-            json_match = re.search(r'\{.*\}', analysis_text, re.DOTALL)
-            if json_match:
-                claude_analysis = json.loads(json_match.group())
-                return self._convert_claude_analysis_to_validation(claude_analysis, claim_packet, "ENHANCED_WITH_RECEIPTS")
-            else:
-                return await self._evaluate_with_basic_rules(claim_packet)
-                
-        except Exception as e:
-            print(f"❌ Enhanced analysis failed: {e}")
-            return await self._evaluate_with_basic_rules(claim_packet)
+Expected Score Range: {(previous_scores[-1]*100 + 5):.1f}% - {(previous_scores[-1]*100 + 20):.1f}% (higher due to improvements)"""
     
-    async def _forensic_analysis(self, claim_packet: ClaimPacket, previous_scores: list) -> ClaimValidation:
+    async def _forensic_analysis(self, claim_packet: ClaimPacket, previous_scores: list, model: str = JUDGE_MODEL) -> ClaimValidation:
         """ITERATION 3: Forensic deep-dive analysis with cross-referencing"""
         
         print("🕵️ ITERATION 3: Forensic Analysis - Deep investigative examination")
@@ -1268,142 +660,84 @@ Analyze the FINANCIAL EVIDENCE thoroughly. Consider receipt quality and auto-fet
             return await self._evaluate_with_basic_rules(claim_packet)
         
         try:
-            # Deep forensic data analysis
-            forensic_data = {
-                "claim_id": claim_packet.claim_id,
-                "previous_scores": previous_scores,
-                "score_progression": [f"Iteration {i+1}: {score*100:.1f}%" for i, score in enumerate(previous_scores)],
-                "document_forensics": [],
-                "cross_references": {},
-                "metadata_analysis": {}
-            }
-            
-            # Analyze each document forensically
-            for doc in claim_packet.documents:
-                doc_analysis = {
-                    "filename": doc.filename,
-                    "type": str(doc.document_type),
-                    "confidence": doc.confidence_score,
-                    "size": doc.file_size,
-                    "upload_time": doc.upload_timestamp.isoformat(),
-                    "data_quality": "HIGH" if doc.confidence_score > 0.8 else "MEDIUM" if doc.confidence_score > 0.6 else "LOW",
-                    "extracted_fields": len(doc.extracted_data) if doc.extracted_data else 0,
-                    "key_indicators": []
-                }
-                
-                # Look for specific forensic indicators
-                if doc.extracted_data:
-                    data_str = str(doc.extracted_data).lower()
-                    if any(word in data_str for word in ['fire', 'burn', 'smoke', 'char', 'damage']):
-                        doc_analysis["key_indicators"].append("FIRE_DAMAGE_EVIDENCE")
-                    if any(word in data_str for word in ['emergency', 'hotel', 'temporary']):
-                        doc_analysis["key_indicators"].append("EMERGENCY_EXPENSE")
-                    if any(word in data_str for word in ['contractor', 'estimate', 'professional']):
-                        doc_analysis["key_indicators"].append("PROFESSIONAL_ASSESSMENT")
-                
-                forensic_data["document_forensics"].append(doc_analysis)
-            
-            # Cross-reference analysis
-            photo_docs = [d for d in claim_packet.documents if 'photo' in str(d.document_type).lower()]
-            receipt_docs = [d for d in claim_packet.documents if 'receipt' in str(d.document_type).lower()]
-            report_docs = [d for d in claim_packet.documents if 'report' in str(d.document_type).lower()]
-            
-            forensic_data["cross_references"] = {
-                "photo_receipt_consistency": len(photo_docs) > 0 and len(receipt_docs) > 0,
-                "official_documentation": len(report_docs) > 0,
-                "document_balance": {
-                    "photos": len(photo_docs),
-                    "receipts": len(receipt_docs), 
-                    "reports": len(report_docs),
-                    "total": len(claim_packet.documents)
-                }
-            }
-            
-            # FORENSIC ANALYSIS PROMPT - Deep investigative examination with IMPROVEMENT FOCUS
-            prompt = f"""You are conducting FORENSIC ANALYSIS for a wildfire insurance claim (ITERATION 3).
-
-FORENSIC INVESTIGATION DATA:
-{json.dumps(forensic_data, indent=2)}
-
-PREVIOUS ANALYSIS PROGRESSION:
-{' → '.join(forensic_data['score_progression'])}
-
-⚠️ CRITICAL: This is a RE-EVALUATION of the SAME claim with ENHANCED documentation.
-The claim has been improved with additional receipts and reprocessed documents.
-Your forensic analysis should recognize these improvements and score accordingly.
-
-Previous iterations have added value - your score should reflect the enhanced evidence quality.
-
-FORENSIC INVESTIGATION FOCUS:
-1. DOCUMENT FORENSICS: Examine OCR confidence patterns, metadata consistency
-2. CROSS-REFERENCE VALIDATION: Do documents corroborate each other's claims?
-3. TEMPORAL FORENSICS: Deep timeline analysis across all documents
-4. BEHAVIORAL ANALYSIS: Filing patterns, purchase behaviors, claim strategy
-5. AUTHENTICITY ASSESSMENT: Document staging, manipulation indicators
-6. PROFESSIONAL VS CONSUMER: Quality of professional vs consumer documentation
-7. MICRO-INCONSISTENCIES: Subtle contradictions between document sources
-
-FORENSIC EXAMINATION RULES:
-- OCR confidence patterns can indicate document manipulation
-- Cross-document timestamp inconsistencies suggest staging
-- Professional documentation (contractors, adjusters) carries more weight
-- Consumer receipts should show logical progression (emergency → replacement)
-- Multiple low-confidence documents together are concerning
-- Document variety matters: photos + receipts + official reports expected
-
-INVESTIGATIVE APPROACH:
-- Examine each document's contribution to the overall narrative
-- Look for subtle inconsistencies that basic screening missed
-- Validate professional documentation authenticity
-- Assess document relationships and dependencies
-- Consider claim filing strategy and timing patterns
-
-Return FORENSIC analysis in JSON:
-{{
-  "overall_score": 0.0-1.0,
-  "confidence": 0.0-1.0,
-  "approved": true/false,
-  "analysis_depth": "FORENSIC_ANALYSIS",
-  "forensic_findings": {{
-    "document_authenticity": "HIGH/MEDIUM/LOW/SUSPICIOUS",
-    "cross_reference_consistency": "CONSISTENT/MINOR_ISSUES/MAJOR_CONFLICTS",
-    "temporal_analysis": "LOGICAL/QUESTIONABLE/IMPOSSIBLE",
-    "professional_documentation": "PRESENT/LIMITED/MISSING"
-  }},
-  "micro_inconsistencies": ["List subtle contradictions found"],
-  "authentication_indicators": ["Evidence supporting document authenticity"],
-  "investigative_concerns": ["Areas requiring additional scrutiny"],
-  "detailed_rationale": "Forensic investigation results with cross-referencing analysis"
-}}
-
-Be THOROUGH and SKEPTICAL. Look for subtle patterns basic screening missed."""
+            claim_message = self._forensic_analysis_message(claim_packet, previous_scores)
             
             print("🔍 Sending FORENSIC ANALYSIS to Claude...")
             
-            response = self.client.messages.create(
-                model="claude-sonnet-4-20250514",
-                max_tokens=4500,
-                temperature=0.05,  # Lower temperature for more consistent forensic analysis
-                messages=[{"role": "user", "content": prompt}]
-            )
-            
-            analysis_text = response.content[0].text
-            print(f"🕵️ Forensic analysis received: {len(analysis_text)} characters")
-            
-            # Parse Claude's response
-            import re
-            json_match = re.search(r'\{.*\}', analysis_text, re.DOTALL)
-            if json_match:
-                claude_analysis = json.loads(json_match.group())
-                return self._convert_claude_analysis_to_validation(claude_analysis, claim_packet, "FORENSIC_ANALYSIS")
-            else:
-                return await self._evaluate_with_basic_rules(claim_packet)
+            claude_analysis = await self._request_analysis("FORENSIC_ANALYSIS", claim_message, model=model)
+            print(f"🕵️ Forensic analysis received: score {claude_analysis['overall_score']:.2f}")
+            return self._convert_claude_analysis_to_validation(claude_analysis, claim_packet, "FORENSIC_ANALYSIS")
                 
         except Exception as e:
             print(f"❌ Forensic analysis failed: {e}")
             return await self._evaluate_with_basic_rules(claim_packet)
     
-    async def _expert_review(self, claim_packet: ClaimPacket, previous_scores: list) -> ClaimValidation:
+    def _forensic_analysis_message(self, claim_packet: ClaimPacket, previous_scores: list) -> str:
+        """Claim data for the FORENSIC_ANALYSIS stage"""
+        # Deep forensic data analysis
+        forensic_data = {
+            "claim_id": claim_packet.claim_id,
+            "previous_scores": previous_scores,
+            "score_progression": [f"Iteration {i+1}: {score*100:.1f}%" for i, score in enumerate(previous_scores)],
+            "document_forensics": [],
+            "cross_references": {},
+            "metadata_analysis": {}
+        }
+        
+        # Analyze each document forensically (the most relevant ones that fit the prompt budget)
+        def forensic_digest(features) -> Dict[str, Any]:
+            doc = features.document
+            doc_analysis = {
+                "filename": doc.filename,
+                "type": doc.document_type.value,
+                "confidence": round(doc.confidence_score, 2),
+                "size": doc.file_size,
+                "upload_time": doc.upload_timestamp.isoformat(),
+                "data_quality": "HIGH" if doc.confidence_score > 0.8 else "MEDIUM" if doc.confidence_score > 0.6 else "LOW",
+                "extracted_fields": len(doc.extracted_data) if doc.extracted_data else 0,
+                "key_indicators": []
+            }
+            
+            # Look for specific forensic indicators
+            if doc.extracted_data:
+                data_str = str(doc.extracted_data).lower()
+                if any(word in data_str for word in ['fire', 'burn', 'smoke', 'char', 'damage']):
+                    doc_analysis["key_indicators"].append("FIRE_DAMAGE_EVIDENCE")
+                if any(word in data_str for word in ['emergency', 'hotel', 'temporary']):
+                    doc_analysis["key_indicators"].append("EMERGENCY_EXPENSE")
+                if any(word in data_str for word in ['contractor', 'estimate', 'professional']):
+                    doc_analysis["key_indicators"].append("PROFESSIONAL_ASSESSMENT")
+            
+            return doc_analysis
+        
+        forensic_data["document_forensics"], omitted = ClaimDigest(claim_packet).documents(forensic_digest)
+        if omitted:
+            forensic_data["omitted_documents"] = omitted
+        
+        # Cross-reference analysis
+        photo_docs = [d for d in claim_packet.documents if 'photo' in str(d.document_type).lower()]
+        receipt_docs = [d for d in claim_packet.documents if 'receipt' in str(d.document_type).lower()]
+        report_docs = [d for d in claim_packet.documents if 'report' in str(d.document_type).lower()]
+        
+        forensic_data["cross_references"] = {
+            "photo_receipt_consistency": len(photo_docs) > 0 and len(receipt_docs) > 0,
+            "official_documentation": len(report_docs) > 0,
+            "document_balance": {
+                "photos": len(photo_docs),
+                "receipts": len(receipt_docs), 
+                "reports": len(report_docs),
+                "total": len(claim_packet.documents)
+            }
+        }
+        
+        # Claim-specific suffix - the FORENSIC_ANALYSIS instructions are in the cached system prompt
+        return f"""FORENSIC INVESTIGATION DATA:
+{compact_json(forensic_data)}
+
+PREVIOUS ANALYSIS PROGRESSION:
+{' → '.join(forensic_data['score_progression'])}"""
+    
+    async def _expert_review(self, claim_packet: ClaimPacket, previous_scores: list, model: str = JUDGE_MODEL) -> ClaimValidation:
         """ITERATION 4: Expert-level comprehensive final review"""
         
         print("👨‍⚖️ ITERATION 4: Expert Review - Comprehensive final assessment")
@@ -1412,127 +746,54 @@ Be THOROUGH and SKEPTICAL. Look for subtle patterns basic screening missed."""
             return await self._evaluate_with_basic_rules(claim_packet)
         
         try:
-            # Comprehensive expert review data
-            expert_data = {
-                "claim_summary": {
-                    "claim_id": claim_packet.claim_id,
-                    "claimant": claim_packet.claimant_name,
-                    "incident_date": claim_packet.incident_date.isoformat(),
-                    "estimated_damage": claim_packet.estimated_damage,
-                    "total_documents": len(claim_packet.documents)
-                },
-                "analysis_progression": [f"Iteration {i+1}: {score*100:.1f}%" for i, score in enumerate(previous_scores)],
-                "improvement_trend": f"{((previous_scores[-1] - previous_scores[0]) * 100):+.1f}%" if len(previous_scores) > 1 else "N/A",
-                "document_portfolio": {},
-                "risk_assessment": {},
-                "industry_benchmarks": {}
-            }
-            
-            # Document portfolio analysis
-            doc_types = {}
-            for doc in claim_packet.documents:
-                doc_type = str(doc.document_type)
-                if doc_type not in doc_types:
-                    doc_types[doc_type] = {"count": 0, "avg_confidence": 0, "total_confidence": 0}
-                doc_types[doc_type]["count"] += 1
-                doc_types[doc_type]["total_confidence"] += doc.confidence_score
-            
-            for doc_type in doc_types:
-                doc_types[doc_type]["avg_confidence"] = doc_types[doc_type]["total_confidence"] / doc_types[doc_type]["count"]
-            
-            expert_data["document_portfolio"] = doc_types
-            
-            # EXPERT REVIEW PROMPT - Comprehensive final assessment with IMPROVEMENT RECOGNITION
-            prompt = f"""You are conducting EXPERT REVIEW for a wildfire insurance claim (ITERATION 4 - FINAL).
-
-COMPREHENSIVE EXPERT DATA:
-{json.dumps(expert_data, indent=2)}
-
-ANALYSIS PROGRESSION:
-{' → '.join(expert_data['analysis_progression'])}
-Improvement Trend: {expert_data['improvement_trend']}
-
-⚠️ CRITICAL: This claim has gone through 3 previous iterations of enhancement:
-- Iteration 1: Initial baseline assessment
-- Iteration 2: Enhanced with auto-fetched receipts from Knot API  
-- Iteration 3: Deep document reprocessing and forensic analysis
-- Iteration 4 (NOW): Final expert review of the FULLY ENHANCED claim
-
-The claim NOW has MORE and BETTER documentation than it started with.
-Your expert assessment should recognize the cumulative improvements made across all iterations.
-
-EXPERT COMPREHENSIVE REVIEW:
-This is the FINAL authoritative assessment. Consider:
-
-1. HOLISTIC ASSESSMENT: Overall claim narrative coherence across all iterations
-2. INDUSTRY BENCHMARKING: How does this compare to typical wildfire claims?
-3. RISK-REWARD ANALYSIS: Final recommendation with confidence intervals
-4. PROGRESSIVE IMPROVEMENT: Has the claim shown meaningful enhancement?
-5. REGULATORY COMPLIANCE: Industry standard adherence
-6. DEFINITIVE VERDICT: Authoritative approve/deny with full justification
-
-EXPERT-LEVEL EVALUATION CRITERIA:
-- Wildfire claims typically require 3-7 documents minimum
-- Average OCR confidence should be >70% for approval
-- Receipt coverage of 60%+ is strong for approval
-- Claims showing improvement across iterations demonstrate good faith
-- Professional documentation (contractors, officials) carries significant weight
-- Geographic consistency with known wildfire areas is crucial
-
-INDUSTRY STANDARDS:
-- Total loss wildfire claims: $50k-$500k typical range
-- Partial damage: $10k-$100k typical range  
-- Emergency expenses: $2k-$15k typical for temporary housing
-- Professional estimates required for structural damage >$25k
-- Photo documentation essential for damage >$10k
-
-FINAL EXPERT DECISION FRAMEWORK:
-- 80%+: Clear approval recommendation
-- 60-79%: Conditional approval with requirements
-- 40-59%: Additional documentation needed
-- <40%: Likely denial recommendation
-
-Return EXPERT REVIEW in JSON:
-{{
-  "overall_score": 0.0-1.0,
-  "confidence": 0.0-1.0, 
-  "approved": true/false,
-  "analysis_depth": "EXPERT_REVIEW",
-  "expert_assessment": {{
-    "industry_comparison": "ABOVE_AVERAGE/TYPICAL/BELOW_AVERAGE/OUTLIER",
-    "claim_coherence": "STRONG/ADEQUATE/WEAK/CONTRADICTORY",
-    "documentation_quality": "EXCELLENT/GOOD/ADEQUATE/POOR",
-    "final_recommendation": "APPROVE/CONDITIONAL_APPROVE/REQUEST_MORE_DOCS/DENY"
-  }},
-  "definitive_verdict": "Final authoritative decision with full justification",
-  "actionable_next_steps": ["What claimant should do if not approved"],
-  "expert_confidence": "How confident are you in this final assessment (0-100%)",
-  "detailed_rationale": "Comprehensive expert-level final assessment"
-}}
-
-This is the FINAL ITERATION. Be definitive, authoritative, and comprehensive."""
+            claim_message = self._expert_review_message(claim_packet, previous_scores)
             
             print("⚖️ Sending EXPERT REVIEW to Claude...")
             
-            response = self.client.messages.create(
-                model="claude-sonnet-4-20250514",
-                max_tokens=5000,
-                temperature=0.02,  # Very low temperature for consistent expert decisions
-                messages=[{"role": "user", "content": prompt}]
-            )
-            
-            analysis_text = response.content[0].text
-            print(f"👨‍⚖️ Expert review received: {len(analysis_text)} characters")
-            
-            # Parse Claude's response
-            import re
-            json_match = re.search(r'\{.*\}', analysis_text, re.DOTALL)
-            if json_match:
-                claude_analysis = json.loads(json_match.group())
-                return self._convert_claude_analysis_to_validation(claude_analysis, claim_packet, "EXPERT_REVIEW")
-            else:
-                return await self._evaluate_with_basic_rules(claim_packet)
+            claude_analysis = await self._request_analysis("EXPERT_REVIEW", claim_message, model=model)
+            print(f"👨‍⚖️ Expert review received: score {claude_analysis['overall_score']:.2f}")
+            return self._convert_claude_analysis_to_validation(claude_analysis, claim_packet, "EXPERT_REVIEW")
                 
         except Exception as e:
             print(f"❌ Expert review failed: {e}")
             return await self._evaluate_with_basic_rules(claim_packet)
+    
+    def _expert_review_message(self, claim_packet: ClaimPacket, previous_scores: list) -> str:
+        """Claim data for the EXPERT_REVIEW stage"""
+        # Comprehensive expert review data
+        expert_data = {
+            "claim_summary": {
+                "claim_id": claim_packet.claim_id,
+                "claimant": claim_packet.claimant_name,
+                "incident_date": claim_packet.incident_date.isoformat(),
+                "estimated_damage": claim_packet.estimated_damage,
+                "total_documents": len(claim_packet.documents)
+            },
+            "analysis_progression": [f"Iteration {i+1}: {score*100:.1f}%" for i, score in enumerate(previous_scores)],
+            "improvement_trend": f"{((previous_scores[-1] - previous_scores[0]) * 100):+.1f}%" if len(previous_scores) > 1 else "N/A",
+            "document_portfolio": {},
+            "risk_assessment": {},
+            "industry_benchmarks": {}
+        }
+        
+        # Document portfolio analysis
+        doc_types = {}
+        for doc in claim_packet.documents:
+            doc_type = str(doc.document_type)
+            if doc_type not in doc_types:
+                doc_types[doc_type] = {"count": 0, "avg_confidence": 0, "total_confidence": 0}
+            doc_types[doc_type]["count"] += 1
+            doc_types[doc_type]["total_confidence"] += doc.confidence_score
+        
+        for doc_type in doc_types:
+            doc_types[doc_type]["avg_confidence"] = doc_types[doc_type]["total_confidence"] / doc_types[doc_type]["count"]
+        
+        expert_data["document_portfolio"] = doc_types
+        
+        # Claim-specific suffix - the EXPERT_REVIEW instructions are in the cached system prompt
+        return f"""COMPREHENSIVE EXPERT DATA:
+{compact_json(expert_data)}
+
+ANALYSIS PROGRESSION:
+{' → '.join(expert_data['analysis_progression'])}
+Improvement Trend: {expert_data['improvement_trend']}"""
@@ -0,0 +1,378 @@
+"""Offline AI Judge evaluation through the Message Batches API
+
+Backlogs and re-validation sweeps don't need an answer within seconds, so instead of one streamed
+call per claim the judge's stage requests are submitted as message batches - billed at batch
+pricing and limited separately from the interactive traffic. Each request is the exact call the
+interactive judge would make (same cached system prompt, tools and forced tool choice), and its
+tool input is turned into a ClaimValidation the same way.
+
+    python -m services.batch_evaluation --limit 500 --depth 1 --output validations.jsonl
+    python -m services.batch_evaluation --input claims.json --local   # local stand-in, no API calls
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import asyncio
+import argparse
+from types import SimpleNamespace
+from typing import Dict, Any, List, Optional, Tuple, Callable, Awaitable
+from models.claim import ClaimPacket, ClaimValidation
+from services.judge_prompts import JUDGE_TOOLS, JUDGE_TOOL_LIST
+from services.judge_router import LOCAL_TIER, FAST_TIER, FULL_TIER
+from services.structured_output import validate_structured
+from services.llm_resilience import classify_error, backoff_delay, LLM_MAX_RETRIES
+
+JUDGE_BATCH_POLL_INTERVAL_SECONDS = float(os.getenv("JUDGE_BATCH_POLL_INTERVAL_SECONDS", "60"))
+# Batches that haven't ended by then are cancelled (the API expires them after 24 hours anyway)
+JUDGE_BATCH_MAX_WAIT_SECONDS = float(os.getenv("JUDGE_BATCH_MAX_WAIT_SECONDS", "86400"))
+# Requests per submitted batch (the API allows up to 100,000 requests / 256 MB)
+JUDGE_BATCH_MAX_REQUESTS = int(os.getenv("JUDGE_BATCH_MAX_REQUESTS", "10000"))
+
+EvaluationResult = Tuple[str, Optional[ClaimValidation], Optional[str]]
+
+class BatchEvaluationError(RuntimeError):
+    """A message batch couldn't be submitted or polled"""
+
+class LocalMessageBatches:
+    """In-process stand-in for client.messages.batches, for tests and dry runs without API access
+
+    `respond(custom_id, params)` returns the forced tool's input for one request (raising marks the
+    request errored). A batch reports in_progress for `polls_until_ended` retrieves, then every
+    request is answered at once; results come back in reverse order, as the API doesn't keep order.
+    """
+
+    def __init__(self, respond: Callable[[str, Dict[str, Any]], Awaitable[Dict[str, Any]]],
+                 polls_until_ended: int = 1):
+        self.respond = respond
+        self.polls_until_ended = polls_until_ended
+        self._batches: Dict[str, Dict[str, Any]] = {}
+
+    async def create(self, requests: List[Dict[str, Any]]):
+        batch_id = f"msgbatch_local_{uuid.uuid4().hex[:12]}"
+        self._batches[batch_id] = {"requests": list(requests), "polls": self.polls_until_ended,
+                                   "results": None, "canceled": False}
+        return self._batch(batch_id)
+
+    async def retrieve(self, batch_id: str):
+        batch = self._batches[batch_id]
+        if batch["results"] is None:
+            if batch["polls"] > 0 and not batch["canceled"]:
+                batch["polls"] -= 1
+            else:
+                batch["results"] = [await self._answer(request, batch["canceled"]) for request in batch["requests"]]
+        return self._batch(batch_id)
+
+    async def cancel(self, batch_id: str):
+        self._batches[batch_id]["canceled"] = True
+        return self._batch(batch_id)
+
+    async def results(self, batch_id: str):
+        async def iterate():
+            for entry in reversed(self._batches[batch_id]["results"] or []):
+                yield entry
+        return iterate()
+
+    async def _answer(self, request: Dict[str, Any], canceled: bool):
+        custom_id = request["custom_id"]
+        if canceled:
+            return SimpleNamespace(custom_id=custom_id, result=SimpleNamespace(type="canceled"))
+        params = request["params"]
+        try:
+            tool_input = await self.respond(custom_id, params)
+        except Exception as e:
+            error = SimpleNamespace(error=SimpleNamespace(type="api_error", message=str(e)))
+            return SimpleNamespace(custom_id=custom_id, result=SimpleNamespace(type="errored", error=error))
+        block = SimpleNamespace(type="tool_use", name=params["tool_choice"]["name"], input=tool_input)
+        usage = SimpleNamespace(input_tokens=0, cache_creation_input_tokens=0, cache_read_input_tokens=0, output_tokens=0)
+        message = SimpleNamespace(content=[block], usage=usage, stop_reason="tool_use")
+        return SimpleNamespace(custom_id=custom_id, result=SimpleNamespace(type="succeeded", message=message))
+
+    def _batch(self, batch_id: str):
+        batch = self._batches[batch_id]
+        ended = batch["results"] is not None
+        counts = {"processing": 0 if ended else len(batch["requests"]),
+                  "succeeded": 0, "errored": 0, "canceled": 0, "expired": 0}
+        for entry in batch["results"] or []:
+            counts[entry.result.type] += 1
+        return SimpleNamespace(id=batch_id, processing_status="ended" if ended else "in_progress",
+                               request_counts=SimpleNamespace(**counts))
+
+class BatchJudgeEvaluator:
+    """Evaluates many claims at one judge depth through message batches
+
+    Claims go through the same steps as AIJudge.evaluate_with_depth, minus the waiting: judge cache
+    hits and decisive local-rule results (for depths the tier router starts locally) are answered
+    without a request, the rest are submitted in batches of JUDGE_BATCH_MAX_REQUESTS and polled
+    until they end. Results map back to claims by custom_id. A request that errored or expired is
+    reported as a failure rather than replaced by the local rules, so a sweep leaves the claim's
+    stored validation alone and can pick it up again.
+    """
+
+    def __init__(self, ai_judge, batches=None, model: Optional[str] = None,
+                 poll_interval: float = JUDGE_BATCH_POLL_INTERVAL_SECONDS,
+                 max_wait: float = JUDGE_BATCH_MAX_WAIT_SECONDS, max_requests: int = JUDGE_BATCH_MAX_REQUESTS):
+        self.ai_judge = ai_judge
+        if batches is None and ai_judge.client:
+            batches = ai_judge.client.client.messages.batches
+        self.batches = batches
+        self.model = model or ai_judge.router.full_model
+        self.poll_interval = poll_interval
+        self.max_wait = max_wait
+        self.max_requests = max_requests
+        # custom_id -> claim packet of the requests in flight, for the local stand-in
+        self._pending: Dict[str, ClaimPacket] = {}
+
+        self.metrics = {
+            "batches_submitted": 0,
+            "requests_submitted": 0,
+            "succeeded": 0,
+            "errored": 0,
+            "canceled": 0,
+            "expired": 0,
+            "invalid": 0,
+            "prompt_errors": 0,
+            "cache_hits": 0,
+            "decided_locally": 0,
+            "input_tokens": 0,
+            "output_tokens": 0,
+            "input_tokens_cache_read": 0
+        }
+
+    async def evaluate(self, claim_packets: List[ClaimPacket], iteration: int = 1,
+                       previous_scores: Optional[list] = None) -> List[EvaluationResult]:
+        """(claim_id, validation, error) for every claim, in input order"""
+        previous_scores = previous_scores or []
+        judge = self.ai_judge
+        stage = judge._get_depth_name(iteration)
+        # Pick up constitution edits before cache keys and system prompts are built from it
+        judge._current_constitution()
+        tool = JUDGE_TOOLS[stage]
+        local_first = judge.router.enabled and stage in judge.router.local_depths
+        # custom_ids are unique across concurrent evaluations (the API allows [a-zA-Z0-9_-]{1,64})
+        run_id = uuid.uuid4().hex[:8]
+
+        results: Dict[int, EvaluationResult] = {}
+        requests = []
+        for index, claim_packet in enumerate(claim_packets):
+            cache_key = judge.result_cache.key(claim_packet, stage, previous_scores) if judge.result_cache else None
+            cached = judge.result_cache.get(cache_key, claim_packet.claim_id) if cache_key else None
+            if cached:
+                self.metrics["cache_hits"] += 1
+                results[index] = (claim_packet.claim_id, cached, None)
+                continue
+
+            if local_first or self.batches is None:
+                validation = await judge._evaluate_with_basic_rules(claim_packet)
+                if self.batches is None or judge.router.is_decisive(validation, LOCAL_TIER):
+                    self.metrics["decided_locally"] += 1
+                    results[index] = (claim_packet.claim_id, validation, None)
+                    continue
+
+            try:
+                claim_message = judge._stage_message(stage, claim_packet, previous_scores)
+            except Exception as e:
+                # Not the judge's answer - report it rather than passing local rules off as one
+                print(f"⚠️ Can't build {stage} request for {claim_packet.claim_id}: {e}")
+                self.metrics["prompt_errors"] += 1
+                results[index] = (claim_packet.claim_id, None, f"Couldn't build {stage} request: {e}")
+                continue
+
+            params = {
+                **judge._stage_params(stage, claim_message, self.model),
+                "tools": JUDGE_TOOL_LIST,
+                "tool_choice": {"type": "tool", "name": tool["name"]}
+            }
+            requests.append((index, cache_key, {"custom_id": f"{run_id}-{index}", "params": params}))
+
+        if requests:
+            chunks = [requests[i:i + self.max_requests] for i in range(0, len(requests), self.max_requests)]
+            print(f"📦 {stage}: {len(requests)}/{len(claim_packets)} claims need the judge - "
+                  f"submitting {len(chunks)} message batch(es)")
+            for chunk_results in await asyncio.gather(*(self._run_batch(chunk, claim_packets, stage, tool)
+                                                        for chunk in chunks)):
+                results.update(chunk_results)
+
+        return [results[index] for index in range(len(claim_packets))]
+
+    async def _run_batch(self, requests: List[Tuple[int, Optional[str], Dict[str, Any]]],
+                         claim_packets: List[ClaimPacket], stage: str, tool: Dict[str, Any]
+                         ) -> Dict[int, EvaluationResult]:
+        by_custom_id = {request["custom_id"]: (index, cache_key) for index, cache_key, request in requests}
+        for custom_id, (index, _) in by_custom_id.items():
+            self._pending[custom_id] = claim_packets[index]
+        try:
+            batch = await self._with_retries(lambda: self.batches.create(requests=[r for _, _, r in requests]))
+            self.metrics["batches_submitted"] += 1
+            self.metrics["requests_submitted"] += len(requests)
+            print(f"📦 Submitted message batch {batch.id} ({len(requests)} requests)")
+            await self._wait(batch.id)
+
+            results: Dict[int, EvaluationResult] = {}
+            async for entry in await self._with_retries(lambda: self.batches.results(batch.id)):
+                if entry.custom_id not in by_custom_id:
+                    continue
+                index, cache_key = by_custom_id[entry.custom_id]
+                claim_packet = claim_packets[index]
+                validation, error = self._validation_from_result(entry.result, stage, tool, claim_packet)
+                if validation is not None and cache_key:
+                    self.ai_judge.result_cache.set(cache_key, validation)
+                results[index] = (claim_packet.claim_id, validation, error)
+
+            for index, _, request in requests:
+                if index not in results:
+                    results[index] = (claim_packets[index].claim_id, None, f"No result in batch {batch.id}")
+            return results
+        finally:
+            for custom_id in by_custom_id:
+                self._pending.pop(custom_id, None)
+
+    async def _wait(self, batch_id: str):
+        """Poll until the batch ends; cancel it if it runs past max_wait or the caller gives up"""
+        started = time.monotonic()
+        deadline = started + self.max_wait
+        try:
+            while True:
+                try:
+                    batch = await self.batches.retrieve(batch_id)
+                except Exception as e:
+                    if classify_error(e) is None:
+                        raise
+                    print(f"⚠️ Polling message batch {batch_id} failed, retrying: {e}")
+                else:
+                    if batch.processing_status == "ended":
+                        counts = batch.request_counts
+                        print(f"✅ Message batch {batch_id} ended after {time.monotonic() - started:.0f}s: "
+                              f"{counts.succeeded} succeeded, {counts.errored} errored, {counts.expired} expired, "
+                              f"{counts.canceled} canceled")
+                        return
+                if time.monotonic() >= deadline:
+                    print(f"⏱️ Message batch {batch_id} still running after {self.max_wait:.0f}s - cancelling")
+                    await self._with_retries(lambda: self.batches.cancel(batch_id))
+                    # Requests that already finished are still returned once the cancellation ends
+                    deadline = float("inf")
+                await asyncio.sleep(self.poll_interval)
+        except asyncio.CancelledError:
+            # Paused or shutting down - nobody will read these results
+            try:
+                await asyncio.shield(self.batches.cancel(batch_id))
+            except Exception as e:
+                print(f"⚠️ Couldn't cancel message batch {batch_id}: {e}")
+            raise
+
+    def _validation_from_result(self, result, stage: str, tool: Dict[str, Any],
+                                claim_packet: ClaimPacket) -> Tuple[Optional[ClaimValidation], Optional[str]]:
+        if result.type != "succeeded":
+            self.metrics[result.type] += 1
+            if result.type == "errored":
+                error = getattr(result.error, "error", result.error)
+                return None, f"Batch request errored: {getattr(error, 'message', error)}"
+            return None, f"Batch request {result.type}"
+
+        message = result.message
+        self._record_usage(getattr(message, "usage", None))
+        tool_input = next((block.input for block in message.content
+                           if block.type == "tool_use" and block.name == tool["name"]), None)
+        try:
+            analysis = validate_structured(tool["input_schema"], tool_input)
+        except ValueError as e:
+            self.metrics["invalid"] += 1
+            return None, f"Invalid {tool['name']} input (stop_reason={message.stop_reason}): {e}"
+
+        self.metrics["succeeded"] += 1
+        validation = self.ai_judge._convert_claude_analysis_to_validation(analysis, claim_packet, stage)
+        validation.evaluation_tier = FULL_TIER if self.model == self.ai_judge.router.full_model else FAST_TIER
+        return validation, None
+
+    async def _with_retries(self, call: Callable[[], Awaitable[Any]]):
+        """Batch control-plane calls, retried on transient errors like the interactive client's"""
+        attempt = 0
+        while True:
+            try:
+                return await call()
+            except Exception as e:
+                if classify_error(e) is None or attempt >= LLM_MAX_RETRIES:
+                    raise BatchEvaluationError(f"Message batch request failed: {e}") from e
+                delay = backoff_delay(attempt)
+                attempt += 1
+                print(f"🔁 Message batch request failed, retry {attempt}/{LLM_MAX_RETRIES} in {delay:.1f}s: {e}")
+                await asyncio.sleep(delay)
+
+    def _record_usage(self, usage):
+        if usage is None:
+            return
+        self.metrics["input_tokens"] += getattr(usage, "input_tokens", 0) or 0
+        self.metrics["output_tokens"] += getattr(usage, "output_tokens", 0) or 0
+        self.metrics["input_tokens_cache_read"] += getattr(usage, "cache_read_input_tokens", 0) or 0
+
+    async def local_response(self, custom_id: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Tool input answering a pending request from the local rules - the LocalMessageBatches responder"""
+        validation = await self.ai_judge._evaluate_with_basic_rules(self._pending[custom_id])
+        return {
+            "overall_score": validation.overall_score,
+            "confidence": validation.confidence,
+            "approved": validation.approved,
+            "missing_documents": validation.missing_documents,
+            "fraud_indicators": validation.fraud_indicators,
+            "detailed_rationale": validation.rationale
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.metrics,
+            "model": self.model,
+            "backend": "local" if isinstance(self.batches, LocalMessageBatches) else ("api" if self.batches else None),
+            "in_flight_requests": len(self._pending)
+        }
+
+async def _run_cli(args) -> Tuple[List[EvaluationResult], Dict[str, Any]]:
+    from services.ai_judge import AIJudge
+    from services.bulk_scoring import load_claims_from_file, load_claims_from_db
+
+    judge = AIJudge()
+    evaluator = BatchJudgeEvaluator(judge, model=args.model, poll_interval=args.poll_interval)
+    if args.local:
+        evaluator.batches = LocalMessageBatches(evaluator.local_response)
+        evaluator.poll_interval = 0
+    elif evaluator.batches is None:
+        raise SystemExit("CLAUDE_API_KEY is not set - use --local to run against the local stand-in")
+
+    claim_packets = load_claims_from_file(args.input) if args.input else list(load_claims_from_db(args.limit))
+    started = time.monotonic()
+    results = await evaluator.evaluate(claim_packets, args.depth)
+    summary = {
+        "claims": len(results),
+        "evaluated": sum(1 for _, validation, _ in results if validation),
+        "failed": sum(1 for _, validation, _ in results if validation is None),
+        "approved": sum(1 for _, validation, _ in results if validation and validation.approved),
+        "seconds": round(time.monotonic() - started, 1),
+        "batches": evaluator.stats()
+    }
+    return results, summary
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Evaluate many claims with the AI Judge through message batches")
+    parser.add_argument("--input", help="JSON/JSONL file of claim packets (default: every claim in the database)")
+    parser.add_argument("--limit", type=int, help="Evaluate at most this many database claims")
+    parser.add_argument("--depth", type=int, default=1, choices=[1, 2, 3, 4], help="Judge iteration / analysis depth")
+    parser.add_argument("--model", help="Judge model (default: the full judge model)")
+    parser.add_argument("--poll-interval", type=float, default=JUDGE_BATCH_POLL_INTERVAL_SECONDS)
+    parser.add_argument("--local", action="store_true", help="Use the in-process stand-in answered by the local rules")
+    parser.add_argument("--output", help="Write one JSON line per claim (validation or error) to this file")
+    args = parser.parse_args(argv)
+
+    results, summary = asyncio.run(_run_cli(args))
+    if args.output:
+        with open(args.output, "w") as f:
+            for claim_id, validation, error in results:
+                f.write(json.dumps({"claim_id": claim_id, "error": error,
+                                    "validation": validation.model_dump(mode="json") if validation else None}) + "\n")
+
+    for claim_id, _, error in results:
+        if error:
+            print(f"⚠️ Not evaluated {claim_id}: {error}", file=sys.stderr)
+    print(json.dumps(summary, indent=2))
+
+if __name__ == "__main__":
+    main()
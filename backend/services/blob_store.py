@@ -0,0 +1,95 @@
+import os
+import re
+import base64
+import hashlib
+import tempfile
+from typing import Any, Optional
+
+BLOB_STORE_DIR = os.getenv("BLOB_STORE_DIR", "blob_store")
+
+def is_valid_blob_id(blob_id: Any) -> bool:
+    """Blob IDs are lowercase SHA-256 hex digests - anything else could escape the store directory"""
+    return isinstance(blob_id, str) and re.fullmatch(r"[0-9a-f]{64}", blob_id) is not None
+
+class BlobStore:
+    """Content-addressed store for document bytes - blob IDs are the SHA-256 of the content"""
+
+    def __init__(self, root_dir: str = BLOB_STORE_DIR):
+        self.root_dir = root_dir
+
+    def path(self, blob_id: str) -> str:
+        """Location of a blob on disk (sharded by the first two hex characters)"""
+        if not is_valid_blob_id(blob_id):
+            raise ValueError(f"Invalid blob ID: {blob_id!r}")
+        return os.path.join(self.root_dir, blob_id[:2], blob_id)
+
+    def exists(self, blob_id: Optional[str]) -> bool:
+        return is_valid_blob_id(blob_id) and os.path.exists(self.path(blob_id))
+
+    def put_file(self, file_path: str, blob_id: Optional[str] = None, move: bool = False) -> str:
+        """Add a file already on disk; identical content is stored only once"""
+        if blob_id is None:
+            blob_id = self._hash_file(file_path)
+
+        dest_path = self.path(blob_id)
+        if os.path.exists(dest_path):
+            if move:
+                os.remove(file_path)
+            return blob_id
+
+        os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+        if move:
+            os.replace(file_path, dest_path)
+        else:
+            self._copy_atomic(file_path, dest_path)
+        return blob_id
+
+    def put_bytes(self, data: bytes) -> str:
+        """Add in-memory bytes (used for legacy base64 document payloads)"""
+        blob_id = hashlib.sha256(data).hexdigest()
+        dest_path = self.path(blob_id)
+        if not os.path.exists(dest_path):
+            os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(dest_path))
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, dest_path)
+        return blob_id
+
+    def open(self, blob_id: str):
+        return open(self.path(blob_id), 'rb')
+
+    def resolve_path(self, doc: Any) -> Optional[str]:
+        """Resolve a document (dict or model) to a readable file path, preferring its blob reference"""
+        if isinstance(doc, dict):
+            blob_id, file_path, content = doc.get('blob_id'), doc.get('file_path'), doc.get('content')
+        else:
+            blob_id = getattr(doc, 'blob_id', None)
+            file_path = getattr(doc, 'file_path', None)
+            content = getattr(doc, 'content', None)
+
+        if self.exists(blob_id):
+            return self.path(blob_id)
+        if file_path and os.path.exists(file_path):
+            return file_path
+        if content:
+            # Legacy inline base64 - materialize it once so later readers get a path
+            return self.path(self.put_bytes(base64.b64decode(content)))
+        return None
+
+    def _copy_atomic(self, src_path: str, dest_path: str, chunk_size: int = 1024 * 1024):
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(dest_path))
+        with os.fdopen(fd, 'wb') as dst, open(src_path, 'rb') as src:
+            for chunk in iter(lambda: src.read(chunk_size), b''):
+                dst.write(chunk)
+        os.replace(tmp_path, dest_path)
+
+    def _hash_file(self, file_path: str, chunk_size: int = 1024 * 1024) -> str:
+        sha256 = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(chunk_size), b''):
+                sha256.update(chunk)
+        return sha256.hexdigest()
+
+# Shared instance used by the API and the package generators
+blob_store = BlobStore()
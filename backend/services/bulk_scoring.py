@@ -0,0 +1,210 @@
+"""Vectorized local rule scoring for backtesting the constitution over many claims
+
+Scores are identical to AIJudge._evaluate_with_basic_rules: the same per-claim features (via
+ClaimFeatureIndex) become one row of a claims x features matrix, every rule's compiled constitution
+logic is evaluated as a vectorized predicate over its columns, and the weighted scores are a
+matrix-vector product.
+
+    python -m services.bulk_scoring --input claims.json --output scores.csv
+    python -m services.bulk_scoring --constitution draft.yaml   # backtest an edited constitution
+    python -m services.bulk_scoring --now 2025-02-01T00:00:00   # every claim in the database
+"""
+import sys
+import csv
+import json
+import time
+import argparse
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Iterable, Tuple
+import numpy as np
+from models.claim import ClaimPacket
+from services.claim_features import ClaimFeatureIndex, RULE_FEATURES
+from services.constitution import Constitution, load_constitution, CONSTITUTION_PATH
+
+# Columns of the claims x features matrix (booleans as 0/1, missing values as NaN)
+FEATURES = list(RULE_FEATURES)
+
+def feature_row(features: ClaimFeatureIndex) -> List[float]:
+    """One row of the feature matrix"""
+    values = features.rule_features()
+    return [np.nan if values[name] is None else float(values[name]) for name in FEATURES]
+
+def _ordered_dot(M: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """M @ weights, accumulated in rule order so results match the per-claim sums bit for bit"""
+    total = np.zeros(len(M))
+    for j, weight in enumerate(weights):
+        total = total + M[:, j] * weight
+    return total
+
+class BulkScoringResult:
+    def __init__(self, claim_ids: List[str], rule_ids: List[str], passed: np.ndarray, rule_confidence: np.ndarray,
+                 overall_score: np.ndarray, confidence: np.ndarray, approved: np.ndarray,
+                 fraud_indicators: np.ndarray, errors: Dict[str, str], seconds: float):
+        self.claim_ids = claim_ids
+        self.rule_ids = rule_ids
+        self.passed = passed                    # claims x rules
+        self.rule_confidence = rule_confidence  # claims x rules
+        self.overall_score = overall_score
+        self.confidence = confidence
+        self.approved = approved
+        self.fraud_indicators = fraud_indicators
+        self.errors = errors                    # claim_id -> reason, for claims that couldn't be scored
+        self.seconds = seconds
+
+    def records(self) -> Iterable[Dict[str, Any]]:
+        for i, claim_id in enumerate(self.claim_ids):
+            yield {
+                "claim_id": claim_id,
+                "overall_score": float(self.overall_score[i]),
+                "confidence": float(self.confidence[i]),
+                "approved": bool(self.approved[i]),
+                "rules_passed": int(self.passed[i].sum()),
+                "fraud_indicators": int(self.fraud_indicators[i]),
+                "failed_rules": [rule_id for rule_id, passed in zip(self.rule_ids, self.passed[i]) if not passed]
+            }
+
+    def summary(self) -> Dict[str, Any]:
+        scored = len(self.claim_ids)
+        return {
+            "claims_scored": scored,
+            "claims_failed": len(self.errors),
+            "approved": int(self.approved.sum()),
+            "approval_rate": float(self.approved.mean()) if scored else 0.0,
+            "mean_score": float(self.overall_score.mean()) if scored else 0.0,
+            "rule_pass_rates": {rule_id: float(rate) for rule_id, rate in
+                                zip(self.rule_ids, self.passed.mean(axis=0) if scored else np.zeros(len(self.rule_ids)))},
+            "seconds": round(self.seconds, 3),
+            "claims_per_second": round(scored / self.seconds, 1) if self.seconds else None
+        }
+
+class BulkRuleScorer:
+    """Scores batches of claims against a constitution's locally evaluated rules"""
+
+    def __init__(self, constitution: Constitution):
+        self.constitution = constitution
+        rules = [rule for rule, _ in constitution.local_rules]
+        self.rule_ids = [rule["id"] for rule in rules]
+        self.weights = np.array([rule["weight"] for rule in rules], dtype=np.float64)
+        self.total_weight = sum(rule["weight"] for rule in rules)
+
+    def feature_matrix(self, claim_packets: Iterable[ClaimPacket], now: Optional[datetime] = None
+                       ) -> Tuple[List[str], np.ndarray, Dict[str, str]]:
+        now = now or datetime.now()
+        claim_ids, rows, errors = [], [], {}
+        for claim_packet in claim_packets:
+            if claim_packet.estimated_damage is None:
+                # The per-claim evaluator can't compare a missing amount either
+                errors[claim_packet.claim_id] = "missing estimated_damage"
+                continue
+            claim_ids.append(claim_packet.claim_id)
+            rows.append(feature_row(ClaimFeatureIndex(claim_packet, now=now)))
+        X = np.array(rows, dtype=np.float64).reshape(len(rows), len(FEATURES))
+        return claim_ids, X, errors
+
+    def score_matrix(self, X: np.ndarray) -> Dict[str, np.ndarray]:
+        size = len(X)
+        columns = {name: X[:, i] for i, name in enumerate(FEATURES)}
+        outcomes = [logic.evaluate_vector(columns, size) for _, logic in self.constitution.local_rules]
+        passed = np.column_stack([p for p, _ in outcomes]) if outcomes else np.zeros((size, 0), dtype=bool)
+        rule_confidence = np.column_stack([c for _, c in outcomes]) if outcomes else np.zeros((size, 0))
+
+        if self.total_weight == 0:
+            overall_score = np.zeros(size)
+            confidence = np.zeros(size)
+        else:
+            overall_score = _ordered_dot(passed.astype(np.float64), self.weights) / self.total_weight
+            confidence = _ordered_dot(rule_confidence, self.weights) / self.total_weight
+
+        fraud_indicators = self.constitution.fraud_indicator_counts(columns, size)
+        critical_failures = (~passed & (self.weights >= self.constitution.critical_weight)).any(axis=1)
+        approved = (overall_score >= self.constitution.approval_threshold) & (fraud_indicators == 0) & ~critical_failures
+        return {
+            "passed": passed,
+            "rule_confidence": rule_confidence,
+            "overall_score": overall_score,
+            "confidence": confidence,
+            "approved": approved,
+            "fraud_indicators": fraud_indicators
+        }
+
+    def score(self, claim_packets: Iterable[ClaimPacket], now: Optional[datetime] = None) -> BulkScoringResult:
+        """Score every claim as of `now` (defaults to the current time) - filing delay rules depend on it"""
+        started = time.perf_counter()
+        claim_ids, X, errors = self.feature_matrix(claim_packets, now)
+        scores = self.score_matrix(X)
+        return BulkScoringResult(claim_ids, self.rule_ids, errors=errors,
+                                 seconds=time.perf_counter() - started, **scores)
+
+def claim_packet_from_record(record) -> ClaimPacket:
+    """Rebuild a ClaimPacket from a stored ClaimRecord"""
+    return ClaimPacket(
+        claim_id=record.claim_id,
+        policy_number=record.policy_number or "",
+        claimant_name=record.claimant_name or "",
+        incident_date=record.incident_date,
+        property_address=record.property_address or "",
+        documents=record.documents or [],
+        estimated_damage=record.estimated_damage,
+        created_at=record.created_at or datetime.now()
+    )
+
+def load_claims_from_file(path: str) -> List[ClaimPacket]:
+    """A JSON list of claim packets (or {"claim_packet": ...} request bodies), or one per line"""
+    with open(path) as f:
+        text = f.read()
+    try:
+        items = json.loads(text)
+        if not isinstance(items, list):
+            items = [items]
+    except json.JSONDecodeError:
+        items = [json.loads(line) for line in text.splitlines() if line.strip()]
+    return [ClaimPacket(**item.get("claim_packet", item)) for item in items]
+
+def load_claims_from_db(limit: Optional[int] = None) -> Iterable[ClaimPacket]:
+    from database import ClaimRecord, SessionLocal
+    db = SessionLocal()
+    try:
+        query = db.query(ClaimRecord).order_by(ClaimRecord.claim_id)
+        if limit:
+            query = query.limit(limit)
+        for record in query.yield_per(1000):
+            try:
+                yield claim_packet_from_record(record)
+            except Exception as e:
+                print(f"⚠️ Skipping claim {record.claim_id}: {e}", file=sys.stderr)
+    finally:
+        db.close()
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Score many claims against the local constitution rules")
+    parser.add_argument("--input", help="JSON/JSONL file of claim packets (default: every claim in the database)")
+    parser.add_argument("--limit", type=int, help="Score at most this many database claims")
+    parser.add_argument("--now", help="Evaluate as of this ISO timestamp (default: now)")
+    parser.add_argument("--output", help="Write per-claim scores to this .csv or .jsonl file")
+    parser.add_argument("--constitution", default=CONSTITUTION_PATH, help="Constitution YAML to score against")
+    args = parser.parse_args(argv)
+
+    constitution = load_constitution(args.constitution)
+    print(f"📜 Scoring against constitution {constitution.version}", file=sys.stderr)
+    scorer = BulkRuleScorer(constitution)
+    claim_packets = load_claims_from_file(args.input) if args.input else load_claims_from_db(args.limit)
+    result = scorer.score(claim_packets, now=datetime.fromisoformat(args.now) if args.now else None)
+
+    if args.output:
+        with open(args.output, "w", newline="") as f:
+            if args.output.endswith(".csv"):
+                writer = csv.DictWriter(f, fieldnames=["claim_id", "overall_score", "confidence", "approved",
+                                                       "rules_passed", "fraud_indicators", "failed_rules"])
+                writer.writeheader()
+                for record in result.records():
+                    writer.writerow({**record, "failed_rules": " ".join(record["failed_rules"])})
+            else:
+                for record in result.records():
+                    f.write(json.dumps(record) + "\n")
+
+    for claim_id, reason in result.errors.items():
+        print(f"⚠️ Not scored {claim_id}: {reason}", file=sys.stderr)
+    print(json.dumps(result.summary(), indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+import os
+import json
+from typing import Dict, Any, List, Optional, Callable, Tuple
+from models.claim import ClaimPacket
+from services.claim_features import ClaimFeatureIndex, DocumentFeatures
+
+# Claim data in each judge prompt is compacted to fit this budget, however many documents the claim has
+JUDGE_PROMPT_TOKEN_BUDGET = int(os.getenv("JUDGE_PROMPT_TOKEN_BUDGET", "4000"))
+CHARS_PER_TOKEN = 4  # rough ratio for compact JSON - the budget is an estimate, not a tokenizer count
+DIGEST_MAX_STRING_CHARS = int(os.getenv("DIGEST_MAX_STRING_CHARS", "300"))
+DIGEST_MAX_LIST_ITEMS = int(os.getenv("DIGEST_MAX_LIST_ITEMS", "8"))
+
+# Extraction bookkeeping that says nothing about the claim itself
+DROPPED_FIELDS = {
+    "raw_claude_response", "processing_method", "fallback_attempted", "error_type", "message",
+    "auto_fetched", "knot_integration"
+}
+
+# Relevance of each document type when the budget can't fit every document
+TYPE_PRIORITY = {"damage_report": 3.0, "policy": 3.0, "receipt": 2.0, "photo": 2.0, "other": 1.0}
+
+def compact_json(value: Any) -> str:
+    """JSON without indentation or spaces after separators"""
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=str)
+
+def compact_value(value: Any, max_string: int = DIGEST_MAX_STRING_CHARS, max_items: int = DIGEST_MAX_LIST_ITEMS) -> Any:
+    """Drops empty values and bookkeeping fields, truncates long strings and caps long lists"""
+    if isinstance(value, dict):
+        compacted = {}
+        for key, item in value.items():
+            if key in DROPPED_FIELDS:
+                continue
+            item = compact_value(item, max_string, max_items)
+            if item is None or item == "" or item == [] or item == {}:
+                continue
+            compacted[key] = item
+        return compacted
+    if isinstance(value, (list, tuple)):
+        items = [compact_value(item, max_string, max_items) for item in value[:max_items]]
+        if len(value) > max_items:
+            items.append(f"+{len(value) - max_items} more")
+        return items
+    if isinstance(value, str) and len(value) > max_string:
+        return value[:max_string] + "…"
+    if isinstance(value, float):
+        return round(value, 4)
+    return value
+
+def compact_extracted_data(data: Any) -> Any:
+    """A document's extracted_data as the judge sees it"""
+    if not isinstance(data, dict):
+        return compact_value(data)
+    if data.get("merged_receipts"):
+        # The Knot summary document repeats every synced receipt - its totals are what matter
+        data = {key: value for key, value in data.items() if key not in ("receipts", "merged_receipts")}
+    return compact_value(data)
+
+def _document_type(features: DocumentFeatures) -> str:
+    document_type = features.document.document_type
+    return getattr(document_type, "value", str(document_type))
+
+def _receipt_amount(data: Any) -> Optional[float]:
+    if not isinstance(data, dict) or data.get("merged_receipts"):
+        return None
+    try:
+        return float(str(data.get("total_amount", "")).replace("$", "").replace(",", ""))
+    except ValueError:
+        return None
+
+class ClaimDigest:
+    """Token-budgeted per-document summaries of a claim for the judge prompts
+
+    Documents are ranked by relevance (official documents first, damage evidence and extraction
+    confidence next, near-duplicate photos last) and added in that order until the budget is spent;
+    the rest are summarised as counts. Selected documents keep their upload order.
+    """
+
+    def __init__(self, claim_packet: ClaimPacket, features: Optional[ClaimFeatureIndex] = None,
+                 token_budget: int = JUDGE_PROMPT_TOKEN_BUDGET):
+        self.features = features or ClaimFeatureIndex(claim_packet)
+        self.token_budget = token_budget
+        self.ranked = sorted(range(len(self.features.documents)), key=self._relevance_key)
+
+    def _relevance_key(self, index: int) -> Tuple[float, int]:
+        features = self.features.documents[index]
+        document = features.document
+        score = TYPE_PRIORITY.get(_document_type(features), 1.0) + (document.confidence_score or 0.0)
+        if isinstance(document.extracted_data, dict) and document.extracted_data.get("merged_receipts"):
+            score += 2.0  # stands in for every synced receipt
+        if features.keywords:
+            score += 1.0
+        if document.id in self.features.near_duplicates:
+            score -= 3.0
+        return (-score, index)
+
+    def type_counts(self) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for features in self.features.documents:
+            document_type = _document_type(features)
+            counts[document_type] = counts.get(document_type, 0) + 1
+        return counts
+
+    def documents(self, describe: Callable[[DocumentFeatures], Dict[str, Any]],
+                  token_budget: Optional[int] = None) -> Tuple[List[Dict[str, Any]], Optional[Dict[str, Any]]]:
+        """(digests that fit the budget, summary of the omitted documents or None)
+
+        `describe` turns one document into the dict a stage wants to show the judge.
+        """
+        budget_chars = (token_budget or self.token_budget) * CHARS_PER_TOKEN
+        used = 0
+        selected = []
+        omitted = []
+        for index in self.ranked:
+            features = self.features.documents[index]
+            digest = describe(features)
+            size = len(compact_json(digest)) + 1
+            if used + size <= budget_chars:
+                used += size
+                selected.append((index, digest))
+            else:
+                omitted.append(features)
+
+        selected.sort(key=lambda item: item[0])
+        digests = [digest for _, digest in selected]
+        if not omitted:
+            return digests, None
+
+        by_type: Dict[str, int] = {}
+        receipt_total = 0.0
+        for features in omitted:
+            document_type = _document_type(features)
+            by_type[document_type] = by_type.get(document_type, 0) + 1
+            amount = _receipt_amount(features.document.extracted_data) if document_type == "receipt" else None
+            receipt_total += amount or 0.0
+        summary = {"count": len(omitted), "by_type": by_type}
+        if receipt_total:
+            summary["receipt_total"] = round(receipt_total, 2)
+        print(f"✂️ Claim digest: {len(digests)}/{len(self.features.documents)} documents within "
+              f"{token_budget or self.token_budget} tokens, {len(omitted)} summarised")
+        return digests, summary
+
+def describe_document(features: DocumentFeatures) -> Dict[str, Any]:
+    """Default per-document digest: filename, type, confidence and compacted extracted data"""
+    document = features.document
+    return {
+        "filename": document.filename,
+        "type": _document_type(features),
+        "confidence": round(document.confidence_score or 0.0, 2),
+        "extracted_data": compact_extracted_data(document.extracted_data)
+    }
@@ -0,0 +1,190 @@
+from datetime import datetime
+from types import MappingProxyType
+from typing import Dict, Any, List, Optional, Tuple
+from models.claim import ClaimPacket
+from services.perceptual_hash import find_near_duplicate_groups
+
+# Keyword groups the local rules scan extracted data for - one bit each in DocumentFeatures.keywords
+DAMAGE_EVIDENCE = 1 << 0
+SEVERE_DAMAGE = 1 << 1
+WILDFIRE_EVIDENCE = 1 << 2
+HIGH_QUALITY = 1 << 3
+LOW_QUALITY = 1 << 4
+SEVERE_DESCRIPTION = 1 << 5
+MINOR_DESCRIPTION = 1 << 6
+
+KEYWORD_GROUPS = {
+    DAMAGE_EVIDENCE: ['damage', 'fire', 'burn', 'char', 'smoke'],
+    SEVERE_DAMAGE: ['severe', 'total', 'complete', 'destroyed'],
+    WILDFIRE_EVIDENCE: ['fire', 'burn', 'char', 'smoke', 'ash', 'wildfire'],
+    HIGH_QUALITY: ['clear', 'good', 'adequate', 'high'],
+    LOW_QUALITY: ['blurry', 'poor', 'low', 'unclear'],
+    SEVERE_DESCRIPTION: ['severe', 'total'],
+    MINOR_DESCRIPTION: ['minor', 'light']
+}
+
+def _keyword_bits() -> Dict[str, int]:
+    """Each distinct keyword mapped to the OR of the groups it belongs to, so it's searched for once"""
+    bits: Dict[str, int] = {}
+    for group, keywords in KEYWORD_GROUPS.items():
+        for keyword in keywords:
+            bits[keyword] = bits.get(keyword, 0) | group
+    return bits
+
+_KEYWORD_BITS = _keyword_bits()
+
+# Named claim features the constitution's rule logic can refer to (see services/constitution.py)
+RULE_FEATURES = {
+    "document_count": "number of documents",
+    "photos": "number of photos",
+    "unique_photos": "photos with near-duplicates collapsed",
+    "receipts": "number of receipts",
+    "policies": "number of policy documents",
+    "reports": "number of damage reports",
+    "near_duplicates": "photos that near-duplicate an earlier photo",
+    "reused_photos": "unique photos that near-duplicate a photo from an earlier upload outside this claim",
+    "damage_evidence_photos": "unique photos mentioning damage, fire, burn, char or smoke",
+    "severe_photos": "unique photos describing severe, total, complete or destroyed damage",
+    "wildfire_photos": "unique photos with fire, burn, char, smoke, ash or wildfire evidence",
+    "severe_description_photos": "unique photos described as severe or total",
+    "minor_description_photos": "unique photos described as minor or light (and not severe)",
+    "quality_points": "1 per clear photo, 0.5 per photo with no quality wording (all photos)",
+    "estimated_damage": "claimed amount",
+    "incident_date_valid": "whether the incident date could be parsed",
+    "days_since_incident": "filing delay in days (None when incident_date_valid is false)"
+}
+
+class _Frozen:
+    __slots__ = ()
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+class DocumentFeatures(_Frozen):
+    """What the local rules need from one document, extracted in a single scan"""
+
+    __slots__ = ("document", "document_type", "has_data", "keywords")
+
+    def __init__(self, document):
+        object.__setattr__(self, "document", document)
+        object.__setattr__(self, "document_type", str(document.document_type).lower())
+        # Keyword rules only look at non-empty dict extractions
+        has_data = bool(document.extracted_data) and isinstance(document.extracted_data, dict)
+        object.__setattr__(self, "has_data", has_data)
+
+        # Only photo extractions are keyword-scanned by the rules, so other documents skip the text scan
+        keywords = 0
+        if has_data and 'photo' in self.document_type:
+            text = str(document.extracted_data).lower()
+            for keyword, bits in _KEYWORD_BITS.items():
+                if keywords & bits != bits and keyword in text:
+                    keywords |= bits
+        object.__setattr__(self, "keywords", keywords)
+
+    def has_keyword(self, group: int) -> bool:
+        return bool(self.keywords & group)
+
+class ClaimFeatureIndex(_Frozen):
+    """Immutable snapshot of a claim's rule inputs, built with one pass over its documents
+
+    Holds documents bucketed by type (near-duplicate photos collapsed in unique_photos, photos first
+    uploaded outside the claim in reused_photos), per-document keyword bitsets, the claim amount and
+    the filing delay, so every rule reads precomputed values instead of re-filtering documents and
+    re-scanning their extracted text.
+    """
+
+    __slots__ = (
+        "documents", "photos", "unique_photos", "receipts", "policies", "reports",
+        "near_duplicates", "reused_photos", "estimated_damage", "incident_date", "days_since_incident"
+    )
+
+    def __init__(self, claim_packet: ClaimPacket, now: Optional[datetime] = None):
+        documents = tuple(DocumentFeatures(doc) for doc in claim_packet.documents)
+        photos: List[DocumentFeatures] = []
+        receipts: List[DocumentFeatures] = []
+        policies: List[DocumentFeatures] = []
+        reports: List[DocumentFeatures] = []
+        photo_hashes: List[Tuple[str, Dict[str, str]]] = []
+
+        for features in documents:
+            if 'photo' in features.document_type:
+                photos.append(features)
+                if features.document.perceptual_hash:
+                    photo_hashes.append((features.document.id, features.document.perceptual_hash))
+            if 'receipt' in features.document_type:
+                receipts.append(features)
+            if 'policy' in features.document_type:
+                policies.append(features)
+            if 'report' in features.document_type:
+                reports.append(features)
+
+        # Re-cropped/re-exported copies of the same photo map to the first upload
+        near_duplicates = find_near_duplicate_groups(photo_hashes)
+
+        incident_date = None
+        days_since_incident = None
+        try:
+            incident_date = datetime.fromisoformat(str(claim_packet.incident_date).replace('Z', '+00:00'))
+            days_since_incident = ((now or datetime.now()) - incident_date).days
+        except Exception:
+            pass
+
+        object.__setattr__(self, "documents", documents)
+        object.__setattr__(self, "photos", tuple(photos))
+        unique_photos = tuple(p for p in photos if p.document.id not in near_duplicates)
+        object.__setattr__(self, "unique_photos", unique_photos)
+        object.__setattr__(self, "receipts", tuple(receipts))
+        object.__setattr__(self, "policies", tuple(policies))
+        object.__setattr__(self, "reports", tuple(reports))
+        object.__setattr__(self, "near_duplicates", MappingProxyType(near_duplicates))
+        # duplicate_of is set at upload when the photo index (shared by every claim) already had the image;
+        # copies within this claim are collapsed above, so what's left was first uploaded elsewhere
+        object.__setattr__(self, "reused_photos", tuple(p for p in unique_photos if p.document.duplicate_of))
+        object.__setattr__(self, "estimated_damage", claim_packet.estimated_damage)
+        object.__setattr__(self, "incident_date", incident_date)
+        # None when the incident date can't be parsed or compared
+        object.__setattr__(self, "days_since_incident", days_since_incident)
+
+    @property
+    def document_count(self) -> int:
+        return len(self.documents)
+
+    def count_with_keyword(self, documents: Tuple[DocumentFeatures, ...], group: int) -> int:
+        return sum(1 for features in documents if features.keywords & group)
+
+    def rule_features(self) -> Dict[str, Any]:
+        """The RULE_FEATURES values for this claim"""
+        quality_points = 0.0
+        for doc in self.photos:
+            if doc.has_data:
+                if doc.has_keyword(HIGH_QUALITY):
+                    quality_points += 1
+                elif not doc.has_keyword(LOW_QUALITY):
+                    quality_points += 0.5
+
+        unique_photos = self.unique_photos
+        return {
+            "document_count": self.document_count,
+            "photos": len(self.photos),
+            "unique_photos": len(unique_photos),
+            "receipts": len(self.receipts),
+            "policies": len(self.policies),
+            "reports": len(self.reports),
+            "near_duplicates": len(self.near_duplicates),
+            "reused_photos": len(self.reused_photos),
+            "damage_evidence_photos": self.count_with_keyword(unique_photos, DAMAGE_EVIDENCE),
+            "severe_photos": self.count_with_keyword(unique_photos, SEVERE_DAMAGE),
+            "wildfire_photos": self.count_with_keyword(unique_photos, WILDFIRE_EVIDENCE),
+            "severe_description_photos": self.count_with_keyword(unique_photos, SEVERE_DESCRIPTION),
+            "minor_description_photos": sum(
+                1 for doc in unique_photos
+                if doc.has_keyword(MINOR_DESCRIPTION) and not doc.has_keyword(SEVERE_DESCRIPTION)
+            ),
+            "quality_points": quality_points,
+            "estimated_damage": self.estimated_damage,
+            "incident_date_valid": self.days_since_incident is not None,
+            "days_since_incident": self.days_since_incident
+        }
@@ -15,9 +15,8 @@ from reportlab.lib.units import inch
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak, Table, TableStyle, Image as RLImage
 from reportlab.lib import colors
 from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_JUSTIFY, TA_RIGHT
-from io import BytesIO
 from PIL import Image
-import base64
+from services.blob_store import blob_store
 
 
 def get_trust_badge(score: float) -> str:
@@ -263,14 +262,13 @@ async def generate_property_damage_photos_pdf(claim_packet) -> str:
                     from dateutil import parser
                     upload_time = parser.parse(upload_time)
                 extracted_data = photo.get('extracted_data', {})
-                file_path = photo.get('file_path')
-                content = photo.get('content')
             else:
                 filename = photo.filename
                 upload_time = photo.upload_timestamp
                 extracted_data = photo.extracted_data
-                file_path = getattr(photo, 'file_path', None)
-                content = getattr(photo, 'content', None)
+            
+            # Resolve the image bytes lazily (blob reference, saved file or legacy base64)
+            file_path = blob_store.resolve_path(photo)
             
             story.append(Paragraph(f"<b>Photograph #{idx}: {filename}</b>", styles['Heading3']))
             story.append(Paragraph(f"Upload Date: {upload_time.strftime('%B %d, %Y')}", styles['Normal']))
@@ -292,14 +290,6 @@ async def generate_property_damage_photos_pdf(claim_packet) -> str:
                     img = RLImage(file_path, width=6*inch, height=4.5*inch, kind='proportional')
                     story.append(img)
                     print(f"✅ Image embedded successfully: {filename}")
-                elif content:
-                    # Use base64 encoded content
-                    print(f"📸 Embedding image from base64 content")
-                    img_data = base64.b64decode(content)
-                    img_buffer = BytesIO(img_data)
-                    img = RLImage(img_buffer, width=6*inch, height=4.5*inch, kind='proportional')
-                    story.append(img)
-                    print(f"✅ Image embedded from base64: {filename}")
                 else:
                     print(f"⚠️ No image source found for {filename}")
                     story.append(Paragraph(f"[Image file path not available: {filename}]", styles['Italic']))
@@ -688,14 +678,13 @@ async def generate_comprehensive_claim_package(claim_packet, validation, generat
         # Organize all documents by type
         for doc in claim_packet.documents:
             # Get file_path (handle both dict and object)
+            file_path = blob_store.resolve_path(doc)
             if isinstance(doc, dict):
-                file_path = doc.get('file_path')
                 filename = doc.get('filename', 'unknown.pdf')
                 doc_type = doc.get('document_type', 'other')
                 if isinstance(doc_type, dict):
                     doc_type = doc_type.get('value', 'other')
             else:
-                file_path = getattr(doc, 'file_path', None)
                 filename = doc.filename
                 doc_type = doc.document_type.value if hasattr(doc.document_type, 'value') else str(doc.document_type)
             
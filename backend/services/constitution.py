@@ -0,0 +1,330 @@
+import os
+import ast
+import copy
+import json
+import time
+import string
+import hashlib
+from functools import reduce
+from typing import Dict, Any, List, Optional, Tuple
+import numpy as np
+import yaml
+from services.claim_features import RULE_FEATURES
+from services.judge_prompts import render_constitution
+
+CONSTITUTION_PATH = os.getenv(
+    "CONSTITUTION_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "constitution", "wildfire_claims.yaml")
+)
+# How often the file's mtime is checked for edits (0 disables hot reload)
+CONSTITUTION_RELOAD_INTERVAL_SECONDS = float(os.getenv("CONSTITUTION_RELOAD_INTERVAL_SECONDS", "2"))
+
+class ConstitutionError(ValueError):
+    """The constitution file is malformed or its rule logic doesn't compile"""
+
+# Rule logic expressions are a Python subset: feature names, numbers, strings, arithmetic,
+# comparisons, and/or/not, `x if cond else y`, and the functions below. Nothing else
+# (attribute access, subscripts, lambdas, other calls) is accepted.
+def _ratio(numerator, denominator):
+    return numerator / denominator if denominator > 0 else 0
+
+def _vector_ratio(numerator, denominator):
+    numerator = np.asarray(numerator, dtype=np.float64)
+    denominator = np.asarray(denominator, dtype=np.float64)
+    return np.divide(numerator, denominator, out=np.zeros(np.broadcast(numerator, denominator).shape),
+                     where=denominator > 0)
+
+FUNCTIONS = {"ratio": _ratio, "min": min, "max": max, "abs": abs}
+VECTOR_FUNCTIONS = {
+    "ratio": _vector_ratio,
+    "min": np.minimum,
+    "max": np.maximum,
+    "abs": np.abs,
+    "_and": lambda *values: reduce(np.logical_and, values),
+    "_or": lambda *values: reduce(np.logical_or, values),
+    "_not": np.logical_not,
+    "_where": np.where
+}
+
+# Globals for compiled expressions - builtins are removed so only the functions above are reachable
+_SCALAR_GLOBALS = {"__builtins__": {}, **FUNCTIONS}
+_VECTOR_GLOBALS = {"__builtins__": {}, **VECTOR_FUNCTIONS}
+
+_ALLOWED_NODES = (
+    ast.Expression, ast.BoolOp, ast.And, ast.Or, ast.UnaryOp, ast.Not, ast.USub, ast.UAdd,
+    ast.BinOp, ast.Add, ast.Sub, ast.Mult, ast.Div, ast.Compare, ast.Eq, ast.NotEq, ast.Lt,
+    ast.LtE, ast.Gt, ast.GtE, ast.IfExp, ast.Call, ast.Name, ast.Load, ast.Constant
+)
+
+class _Vectorize(ast.NodeTransformer):
+    """Rewrites short-circuiting constructs into elementwise NumPy calls"""
+
+    def _call(self, name: str, args: List[ast.AST]) -> ast.Call:
+        return ast.Call(func=ast.Name(id=name, ctx=ast.Load()), args=args, keywords=[])
+
+    def visit_BoolOp(self, node):
+        self.generic_visit(node)
+        return self._call("_and" if isinstance(node.op, ast.And) else "_or", node.values)
+
+    def visit_UnaryOp(self, node):
+        self.generic_visit(node)
+        return self._call("_not", [node.operand]) if isinstance(node.op, ast.Not) else node
+
+    def visit_IfExp(self, node):
+        self.generic_visit(node)
+        return self._call("_where", [node.test, node.body, node.orelse])
+
+    def visit_Compare(self, node):
+        self.generic_visit(node)
+        if len(node.ops) == 1:
+            return node
+        # a < b < c -> (a < b) and (b < c)
+        operands = [node.left] + node.comparators
+        return self._call("_and", [
+            ast.Compare(left=operands[i], ops=[op], comparators=[operands[i + 1]])
+            for i, op in enumerate(node.ops)
+        ])
+
+class Expression:
+    """One rule-logic expression, compiled once for per-claim and for vectorized evaluation"""
+
+    def __init__(self, source: Any, names: List[str], where: str):
+        self.source = source if isinstance(source, str) else repr(source)
+        try:
+            tree = ast.parse(self.source.strip(), mode="eval")
+        except SyntaxError as e:
+            raise ConstitutionError(f"{where}: invalid expression {self.source!r}: {e.msg}")
+
+        for node in ast.walk(tree):
+            if not isinstance(node, _ALLOWED_NODES):
+                raise ConstitutionError(f"{where}: {type(node).__name__} is not allowed in {self.source!r}")
+            if isinstance(node, ast.Call):
+                if not isinstance(node.func, ast.Name) or node.func.id not in FUNCTIONS or node.keywords:
+                    raise ConstitutionError(f"{where}: only {', '.join(FUNCTIONS)} can be called in {self.source!r}")
+            elif isinstance(node, ast.Name) and node.id not in names and node.id not in FUNCTIONS:
+                raise ConstitutionError(f"{where}: unknown name {node.id!r} in {self.source!r}")
+            elif isinstance(node, ast.Constant) and not isinstance(node.value, (int, float, str, bool, type(None))):
+                raise ConstitutionError(f"{where}: unsupported constant in {self.source!r}")
+
+        self._scalar = compile(tree, f"<constitution {where}>", "eval")
+        vector_tree = ast.fix_missing_locations(_Vectorize().visit(copy.deepcopy(tree)))
+        self._vector = compile(vector_tree, f"<constitution {where}>", "eval")
+
+    def evaluate(self, namespace: Dict[str, Any]) -> Any:
+        return eval(self._scalar, _SCALAR_GLOBALS, namespace)
+
+    def evaluate_vector(self, columns: Dict[str, np.ndarray]) -> Any:
+        return eval(self._vector, _VECTOR_GLOBALS, columns)
+
+class Template:
+    """Rationale/indicator text with {name} or {name:format} placeholders"""
+
+    def __init__(self, text: str, names: List[str], where: str):
+        self.text = str(text)
+        try:
+            fields = [field for _, field, _, _ in string.Formatter().parse(self.text) if field is not None]
+        except ValueError as e:
+            raise ConstitutionError(f"{where}: invalid template {self.text!r}: {e}")
+        for field in fields:
+            if field not in names:
+                raise ConstitutionError(f"{where}: unknown name {field!r} in template {self.text!r}")
+
+    def render(self, namespace: Dict[str, Any]) -> str:
+        return self.text.format_map(namespace)
+
+class RuleLogic:
+    """`let` bindings followed by cases; the first case whose `when` holds decides the rule"""
+
+    def __init__(self, spec: Dict[str, Any], where: str):
+        if not isinstance(spec, dict) or not spec.get("cases"):
+            raise ConstitutionError(f"{where}: logic needs a non-empty `cases` list")
+
+        names = list(RULE_FEATURES)
+        self.lets: List[Tuple[str, Expression]] = []
+        for name, source in (spec.get("let") or {}).items():
+            if name in names or name in FUNCTIONS:
+                raise ConstitutionError(f"{where}: `let` can't redefine {name!r}")
+            self.lets.append((name, Expression(source, names, f"{where} let {name}")))
+            names.append(name)
+
+        self.cases = []
+        for i, case in enumerate(spec["cases"]):
+            case_where = f"{where} case {i + 1}"
+            missing = {"passed", "confidence", "rationale"} - set(case)
+            if missing:
+                raise ConstitutionError(f"{case_where}: missing {', '.join(sorted(missing))}")
+            when = Expression(case["when"], names, f"{case_where} when") if "when" in case else None
+            self.cases.append((
+                when,
+                Expression(case["passed"], names, f"{case_where} passed"),
+                Expression(case["confidence"], names, f"{case_where} confidence"),
+                Template(case["rationale"], names, f"{case_where} rationale")
+            ))
+        if self.cases[-1][0] is not None:
+            raise ConstitutionError(f"{where}: the last case must have no `when` (it's the fallback)")
+
+    def evaluate(self, features: Dict[str, Any]) -> Tuple[bool, float, str]:
+        namespace = dict(features) if self.lets else features
+        for name, expression in self.lets:
+            namespace[name] = expression.evaluate(namespace)
+        for when, passed, confidence, rationale in self.cases:
+            if when is None or when.evaluate(namespace):
+                return bool(passed.evaluate(namespace)), float(confidence.evaluate(namespace)), rationale.render(namespace)
+
+    def evaluate_vector(self, columns: Dict[str, np.ndarray], size: int) -> Tuple[np.ndarray, np.ndarray]:
+        namespace = dict(columns)
+        for name, expression in self.lets:
+            namespace[name] = expression.evaluate_vector(namespace)
+        conditions, passed, confidence = [], [], []
+        for when, passed_expression, confidence_expression, _ in self.cases:
+            condition = np.ones(size, dtype=bool) if when is None else when.evaluate_vector(namespace)
+            conditions.append(np.broadcast_to(condition, (size,)).astype(bool))
+            passed.append(np.broadcast_to(passed_expression.evaluate_vector(namespace), (size,)).astype(bool))
+            confidence.append(np.broadcast_to(confidence_expression.evaluate_vector(namespace), (size,)).astype(np.float64))
+        return np.select(conditions, passed), np.select(conditions, confidence)
+
+class FraudCheck:
+    def __init__(self, spec: Dict[str, Any], where: str):
+        if "when" not in spec or "indicator" not in spec:
+            raise ConstitutionError(f"{where}: fraud checks need `when` and `indicator`")
+        self.when = Expression(spec["when"], list(RULE_FEATURES), f"{where} when")
+        self.indicator = Template(spec["indicator"], list(RULE_FEATURES), f"{where} indicator")
+
+# Representative feature values every expression is dry-run against at load time, so a
+# reference to days_since_incident without an incident_date_valid guard fails on load, not mid-evaluation
+_SAMPLE_FEATURES = [
+    {**{name: 0 for name in RULE_FEATURES}, "estimated_damage": 0.0, "quality_points": 0.0,
+     "incident_date_valid": True, "days_since_incident": 0},
+    {**{name: 1 for name in RULE_FEATURES}, "estimated_damage": 1.0, "quality_points": 1.0,
+     "incident_date_valid": False, "days_since_incident": None}
+]
+
+class Constitution:
+    """A loaded, validated and compiled constitution - immutable once built"""
+
+    def __init__(self, data: Dict[str, Any], source: Optional[str] = None):
+        if not isinstance(data, dict) or not isinstance(data.get("rules"), dict) or "version" not in data:
+            raise ConstitutionError("the constitution needs `version` and a `rules` mapping")
+
+        self.data = data
+        self.source = source
+        self.version = f"{data['version']}-{hashlib.sha256(json.dumps(data, sort_keys=True).encode()).hexdigest()[:12]}"
+
+        seen = set()
+        for category, rules in data["rules"].items():
+            for rule in rules or []:
+                if not {"id", "description", "weight"} <= set(rule):
+                    raise ConstitutionError(f"{category}: every rule needs id, description and weight")
+                if rule["id"] in seen:
+                    raise ConstitutionError(f"duplicate rule id {rule['id']}")
+                if not isinstance(rule["weight"], (int, float)):
+                    raise ConstitutionError(f"{rule['id']}: weight must be a number")
+                seen.add(rule["id"])
+
+        local = data.get("local_evaluation") or {}
+        self.scored_categories: List[str] = list(local.get("categories", []))
+        self.approval_threshold = float(local.get("approval_threshold", 0.75))
+        self.critical_weight = float(local.get("critical_weight", 0.15))
+        self.max_fraud_indicators = int(local.get("max_fraud_indicators", 5))
+
+        default_logic = local.get("default_logic") or {}
+        # (rule, compiled logic) per locally scored rule, in scoring order
+        self.local_rules: List[Tuple[Dict[str, Any], RuleLogic]] = []
+        for category in self.scored_categories:
+            if category not in data["rules"]:
+                raise ConstitutionError(f"local_evaluation category {category!r} has no rules")
+            if category not in default_logic:
+                raise ConstitutionError(f"local_evaluation.default_logic is missing {category!r}")
+            default = RuleLogic(default_logic[category], f"default_logic.{category}")
+            for rule in data["rules"][category]:
+                logic = RuleLogic(rule["logic"], rule["id"]) if "logic" in rule else default
+                self.local_rules.append((rule, logic))
+
+        self.fraud_checks = [FraudCheck(spec, f"fraud_checks[{i}]")
+                             for i, spec in enumerate(local.get("fraud_checks") or [])]
+
+        self._dry_run()
+        # Rendered once so every judge call sends a byte-identical, cacheable prompt prefix
+        self.text = render_constitution(data)
+
+    def _dry_run(self):
+        columns = {name: np.array([sample[name] if sample[name] is not None else np.nan for sample in _SAMPLE_FEATURES],
+                                  dtype=np.float64) for name in RULE_FEATURES}
+        for rule, logic in self.local_rules:
+            try:
+                for sample in _SAMPLE_FEATURES:
+                    logic.evaluate(sample)
+                logic.evaluate_vector(columns, len(_SAMPLE_FEATURES))
+            except Exception as e:
+                raise ConstitutionError(f"{rule['id']}: logic fails on a sample claim: {e}")
+        try:
+            self.fraud_indicators(_SAMPLE_FEATURES[0])
+            self.fraud_indicators(_SAMPLE_FEATURES[1])
+            self.fraud_indicator_counts(columns, len(_SAMPLE_FEATURES))
+        except Exception as e:
+            raise ConstitutionError(f"fraud_checks fail on a sample claim: {e}")
+
+    def fraud_indicators(self, features: Dict[str, Any]) -> List[str]:
+        indicators = [check.indicator.render(features) for check in self.fraud_checks if check.when.evaluate(features)]
+        return indicators[:self.max_fraud_indicators]
+
+    def fraud_indicator_counts(self, columns: Dict[str, np.ndarray], size: int) -> np.ndarray:
+        counts = np.zeros(size, dtype=np.int64)
+        for check in self.fraud_checks:
+            counts += np.broadcast_to(check.when.evaluate_vector(columns), (size,)).astype(bool)
+        return np.minimum(counts, self.max_fraud_indicators)
+
+def load_constitution(path: str = CONSTITUTION_PATH) -> Constitution:
+    try:
+        with open(path) as f:
+            data = yaml.safe_load(f)
+    except yaml.YAMLError as e:
+        raise ConstitutionError(f"{path}: {e}")
+    return Constitution(data, source=path)
+
+class ConstitutionStore:
+    """The current constitution, reloaded when its file changes on disk
+
+    A reload that fails to parse or compile is reported and ignored - the previous constitution
+    stays in effect until the file is fixed.
+    """
+
+    def __init__(self, path: str = CONSTITUTION_PATH, reload_interval: float = CONSTITUTION_RELOAD_INTERVAL_SECONDS):
+        self.path = path
+        self.reload_interval = reload_interval
+        self._stamp = self._file_stamp()
+        self._constitution = load_constitution(path)
+        self._checked_at = time.monotonic()
+        self.reloads = 0
+        self.last_error: Optional[str] = None
+
+    def _file_stamp(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.path)
+            return stat.st_mtime_ns, stat.st_size
+        except OSError:
+            return None
+
+    def current(self) -> Constitution:
+        if self.reload_interval > 0 and time.monotonic() - self._checked_at >= self.reload_interval:
+            self._checked_at = time.monotonic()
+            stamp = self._file_stamp()
+            if stamp is not None and stamp != self._stamp:
+                self._stamp = stamp
+                try:
+                    self._constitution = load_constitution(self.path)
+                    self.reloads += 1
+                    self.last_error = None
+                    print(f"📜 Constitution reloaded: {self._constitution.version}")
+                except Exception as e:
+                    self.last_error = str(e)
+                    print(f"⚠️ Constitution reload failed, keeping {self._constitution.version}: {e}")
+        return self._constitution
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "path": self.path,
+            "version": self._constitution.version,
+            "reloads": self.reloads,
+            "last_error": self.last_error
+        }
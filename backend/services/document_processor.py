@@ -1,71 +1,285 @@
 import os
 import json
 import base64
-from typing import Dict, Any, List
+import asyncio
+import hashlib
+from typing import Dict, Any, List, Optional, Tuple, AsyncIterator
 from datetime import datetime
-import anthropic
 from PIL import Image
-import io
 import cv2
 import numpy as np
-import PyPDF2
 from models.claim import ClaimDocument, DocumentType
+from services.result_cache import ResultCache
+from services.upload_storage import StoredUpload
+from services.pdf_extraction import PdfTextExtractor
+from services.image_preprocessing import (
+    prepare_image_for_vision, extract_image_metadata, VISION_MAX_LONG_EDGE, VISION_JPEG_QUALITY
+)
+from services.perceptual_hash import PerceptualHashIndex, compute_image_hashes
+from services.llm_client import get_llm_client
+from services.llm_resilience import CircuitOpenError
+from services.structured_output import tool_spec, StructuredOutputError
+from services.vision_batching import VisionBatch, VisionBatchItem, VISION_BATCH_ENABLED
+
+# Concurrency limits for Claude document analysis
+DOC_ANALYSIS_MAX_CONCURRENCY = int(os.getenv("DOC_ANALYSIS_MAX_CONCURRENCY", "8"))  # per process
+DOC_ANALYSIS_REQUEST_CONCURRENCY = int(os.getenv("DOC_ANALYSIS_REQUEST_CONCURRENCY", "4"))  # per upload request
+DOC_ANALYSIS_TIMEOUT_SECONDS = float(os.getenv("DOC_ANALYSIS_TIMEOUT_SECONDS", "90"))  # per file
+
+# Bump EXTRACTION_PROMPT_VERSION whenever the extraction prompts change so stale cache entries are ignored
+EXTRACTION_MODEL = "claude-3-haiku-20240307"
+EXTRACTION_PROMPT_VERSION = "v3"
+# The text analysis prompt only sees this many characters, so PDF pages are pulled lazily until it is filled
+ANALYSIS_TEXT_CHAR_BUDGET = int(os.getenv("ANALYSIS_TEXT_CHAR_BUDGET", "3000"))
+PDF_PAGE_SELECTION = os.getenv("PDF_PAGE_SELECTION", "first")  # "first" pages or highest "keyword" density
+PDF_SELECTION_KEYWORDS = [
+    "policy", "coverage", "wildfire", "fire", "damage", "deductible", "claim", "incident",
+    "estimate", "total", "amount", "insured", "loss", "date", "address", "$"
+]
+EXTRACTION_CACHE_MAX_ENTRIES = int(os.getenv("EXTRACTION_CACHE_MAX_ENTRIES", "5000"))
+EXTRACTION_CACHE_MAX_BYTES = int(os.getenv("EXTRACTION_CACHE_MAX_BYTES", str(200 * 1024 * 1024)))
+EXTRACTION_CACHE_MAX_AGE_SECONDS = int(os.getenv("EXTRACTION_CACHE_MAX_AGE_SECONDS", str(30 * 24 * 3600)))
+VISION_BATCH_TOKENS_PER_IMAGE = 400
+VISION_MAX_OUTPUT_TOKENS = 4096
+
+# Extraction replies are forced tool calls - the input schemas below are the output formats
+TEXT_ANALYSIS_TOOL = tool_spec("record_document_analysis", "Record the information extracted from a claim document", {
+    "document_type": {"type": "string", "enum": ["receipt", "policy", "fire_report", "estimate", "other"]},
+    "extracted_dates": {"type": "array", "items": {"type": "string"}, "description": "Dates found, as YYYY-MM-DD"},
+    "extracted_amounts": {"type": "array", "items": {"type": "number"}, "description": "Monetary amounts found"},
+    "merchant_or_agency": {"type": "string"},
+    "policy_number": {"type": ["string", "null"]},
+    "incident_details": {"type": "string", "description": "Wildfire/fire damage details"},
+    "key_findings": {"type": "array", "items": {"type": "string"}, "description": "Important insurance-related details"},
+    "confidence": {"type": "number", "minimum": 0, "maximum": 1}
+}, ["document_type", "confidence"])
+
+PHOTO_ANALYSIS_PROPERTIES = {
+    "damage_type": {"type": "array", "items": {"type": "string"}, "description": "e.g. fire, smoke, water"},
+    "severity": {"type": "string", "description": "e.g. minor, moderate, severe, total"},
+    "affected_areas": {"type": "array", "items": {"type": "string"}, "description": "e.g. roof, walls"},
+    "photo_quality": {"type": "string", "description": "e.g. clear, adequate, blurry, poor"},
+    "description": {"type": "string", "description": "Detailed description of the damage shown"}
+}
+PHOTO_ANALYSIS_REQUIRED = ["damage_type", "severity", "photo_quality", "description"]
+PHOTO_ANALYSIS_TOOL = tool_spec("record_photo_analysis", "Record the analysis of a property damage photo",
+                                PHOTO_ANALYSIS_PROPERTIES, PHOTO_ANALYSIS_REQUIRED)
+PHOTO_BATCH_TOOL = tool_spec("record_photo_analyses", "Record the analysis of each property damage photo", {
+    "images": {
+        "type": "array",
+        "items": {
+            "type": "object",
+            "properties": {"image_index": {"type": "integer", "description": "1-based position of the image"},
+                           **PHOTO_ANALYSIS_PROPERTIES},
+            "required": ["image_index", *PHOTO_ANALYSIS_REQUIRED]
+        }
+    }
+}, ["images"])
 
 class DocumentProcessor:
     def __init__(self):
-        api_key = os.getenv("CLAUDE_API_KEY")
-        if api_key:
-            self.client = anthropic.Anthropic(api_key=api_key)
+        # Shares the process-wide Claude concurrency limit with the judge
+        self.client = get_llm_client()
+        if self.client:
             print("✅ Claude API initialized successfully for document processing")
         else:
-            self.client = None
             print("❌ WARNING: CLAUDE_API_KEY not set - document processing will fail")
         
-    async def process_document(self, content: bytes, filename: str) -> ClaimDocument:
-        """Process uploaded document - FIXED to handle PDFs properly"""
+        # Caps document analysis's share of the process-wide LLM limit so uploads can't starve the judge
+        self.llm_semaphore = asyncio.Semaphore(DOC_ANALYSIS_MAX_CONCURRENCY)
+        self.analysis_timeout = DOC_ANALYSIS_TIMEOUT_SECONDS
+        
+        # PDF text extraction runs in a process pool, split by page range for large documents
+        self.pdf_extractor = PdfTextExtractor()
+        
+        # Content-addressed cache of extraction results (keyed by SHA-256 of the uploaded bytes)
+        self.extraction_cache = ResultCache(
+            "document_extraction",
+            max_entries=EXTRACTION_CACHE_MAX_ENTRIES,
+            max_bytes=EXTRACTION_CACHE_MAX_BYTES,
+            max_age_seconds=EXTRACTION_CACHE_MAX_AGE_SECONDS
+        )
+        
+        # Perceptual hashes of analysed photos - re-cropped/re-exported copies reuse the original's analysis
+        self.photo_index = PerceptualHashIndex()
+        
+        self.vision_metrics = {
+            "single_requests": 0,
+            "batched_requests": 0,
+            "batched_images": 0,
+            "batch_fallbacks": 0
+        }
+    
+    async def process_uploads(self, uploads: List[StoredUpload], max_concurrency: Optional[int] = None,
+                              batch_photos: bool = VISION_BATCH_ENABLED) -> List[ClaimDocument]:
+        """Process several uploaded files concurrently, preserving input order"""
+        
+        request_semaphore = asyncio.Semaphore(max_concurrency or DOC_ANALYSIS_REQUEST_CONCURRENCY)
+        vision_batch = self._new_vision_batch() if batch_photos else None
+        try:
+            return await asyncio.gather(*(self._process_upload(upload, request_semaphore, vision_batch)
+                                          for upload in uploads))
+        finally:
+            if vision_batch:
+                vision_batch.close()
+    
+    async def iter_processed_uploads(self, uploads: List[StoredUpload], max_concurrency: Optional[int] = None,
+                                     batch_photos: bool = VISION_BATCH_ENABLED
+                                     ) -> AsyncIterator[Tuple[int, Optional[ClaimDocument], Optional[Exception]]]:
+        """Process uploads concurrently, yielding (index, document, error) as each file finishes"""
+        
+        request_semaphore = asyncio.Semaphore(max_concurrency or DOC_ANALYSIS_REQUEST_CONCURRENCY)
+        vision_batch = self._new_vision_batch() if batch_photos else None
+        
+        async def indexed(index: int, upload: StoredUpload):
+            try:
+                return index, await self._process_upload(upload, request_semaphore, vision_batch), None
+            except Exception as e:
+                return index, None, e
+        
+        tasks = [asyncio.create_task(indexed(i, upload)) for i, upload in enumerate(uploads)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            # Client went away or the consumer stopped early - don't keep spending tokens
+            for task in tasks:
+                task.cancel()
+            if vision_batch:
+                vision_batch.close()
+    
+    def _new_vision_batch(self) -> VisionBatch:
+        return VisionBatch(self._analyze_photo_batch)
+    
+    async def _process_upload(self, upload: StoredUpload, request_semaphore: asyncio.Semaphore,
+                              vision_batch: Optional[VisionBatch] = None) -> ClaimDocument:
+        is_photo = self._classify_document_type(upload.filename, self._read_header(upload.file_path)) == DocumentType.PHOTO
+        if vision_batch is not None and is_photo:
+            # Photos share batched vision requests, so they don't each hold a request slot
+            document = await self.process_document_with_timeout(upload.file_path, upload.filename,
+                                                                upload.content_hash, vision_batch)
+        else:
+            async with request_semaphore:
+                document = await self.process_document_with_timeout(upload.file_path, upload.filename, upload.content_hash)
+        document.blob_id = upload.blob_id
+        return document
+    
+    async def process_document_with_timeout(self, file_path: str, filename: str, content_hash: Optional[str] = None,
+                                            vision_batch: Optional[VisionBatch] = None) -> ClaimDocument:
+        """Process a single document, returning an error document if it exceeds the per-file timeout"""
+        try:
+            return await asyncio.wait_for(self.process_document(file_path, filename, content_hash, vision_batch),
+                                          timeout=self.analysis_timeout)
+        except asyncio.TimeoutError:
+            print(f"⏱️ Document analysis timed out after {self.analysis_timeout:.0f}s: {filename}")
+            extracted_data = {
+                "document_type": "timeout",
+                "error": f"Document analysis exceeded {self.analysis_timeout:.0f}s timeout",
+                "confidence": 0.0
+            }
+            return self._build_document(
+                file_path, filename,
+                self._classify_document_type(filename, self._read_header(file_path)),
+                content_hash, extracted_data, self._calculate_confidence(extracted_data)
+            )
+        
+    async def process_document(self, file_path: str, filename: str, content_hash: Optional[str] = None,
+                               vision_batch: Optional[VisionBatch] = None) -> ClaimDocument:
+        """Process a document saved on disk - only the bytes each document type needs are read"""
+        
+        header = self._read_header(file_path)
+        doc_type = self._classify_document_type(filename, header)
+        content_hash = content_hash or self._hash_file(file_path)
         
-        doc_type = self._classify_document_type(filename, content)
+        # Identical bytes analysed with the same prompt/model always produce the same extraction
+        cache_key = self._extraction_cache_key(content_hash, doc_type)
+        cached = self.extraction_cache.get(cache_key)
+        if cached:
+            print(f"⚡ Extraction cache hit: {filename}")
+            return self._build_document(file_path, filename, doc_type, content_hash,
+                                        cached["extracted_data"], cached["confidence_score"],
+                                        perceptual_hash=cached.get("perceptual_hash"))
         
         print(f"Processing document: {filename} (type: {doc_type})")
         
+        perceptual_hash = None
+        duplicate_of = None
+        
         # Handle different document types properly
-        if content.startswith(b'%PDF'):
-            # PDF file - extract text and analyze
-            extracted_data = await self._process_pdf_document(content)
+        if header.startswith(b'%PDF'):
+            # PDF file - extract text in the process pool and analyze
+            extracted_data = await self._process_pdf_document(file_path)
             print(f"PDF processed: {extracted_data.get('document_type', 'unknown')}")
         elif doc_type == DocumentType.PHOTO:
-            # Image file - use Claude Vision
-            extracted_data = await self._process_photo(content)
+            # Image file - use Claude Vision unless it's a near-duplicate of a photo already analysed
+            extracted_data, perceptual_hash, duplicate_of = await self._process_photo_deduplicated(
+                file_path, filename, content_hash, vision_batch
+            )
             print(f"Image processed: {extracted_data.get('damage_type', 'unknown')}")
         else:
             # Text or other files
-            extracted_data = await self._process_text_document(content)
+            extracted_data = await self._process_text_document(self._read_file(file_path))
             print(f"Text document processed")
         
         confidence_score = self._calculate_confidence(extracted_data)
         
+        # Only cache successful extractions so transient API failures are retried next time
+        if "error" not in extracted_data:
+            self.extraction_cache.set(cache_key, {
+                "extracted_data": extracted_data,
+                "confidence_score": confidence_score,
+                "perceptual_hash": perceptual_hash
+            })
+        
+        return self._build_document(file_path, filename, doc_type, content_hash, extracted_data, confidence_score,
+                                    perceptual_hash=perceptual_hash, duplicate_of=duplicate_of)
+    
+    def _build_document(self, file_path: str, filename: str, doc_type: DocumentType, content_hash: Optional[str],
+                        extracted_data: Dict[str, Any], confidence_score: float,
+                        perceptual_hash: Optional[Dict[str, str]] = None,
+                        duplicate_of: Optional[Dict[str, Any]] = None) -> ClaimDocument:
+        """Build the ClaimDocument response - the file stays on disk and is referenced by path"""
         return ClaimDocument(
             id=self._generate_document_id(),
             filename=filename,
             document_type=doc_type,
-            content=base64.b64encode(content).decode('utf-8'),
+            file_path=file_path,
+            content_hash=content_hash,
+            file_size=os.path.getsize(file_path),
             extracted_data=extracted_data,
             confidence_score=confidence_score,
-            upload_timestamp=datetime.now()
+            upload_timestamp=datetime.now(),
+            perceptual_hash=perceptual_hash,
+            duplicate_of=duplicate_of
         )
     
-    async def _process_pdf_document(self, content: bytes) -> Dict[str, Any]:
+    def _read_header(self, file_path: str, size: int = 8) -> bytes:
+        with open(file_path, 'rb') as f:
+            return f.read(size)
+    
+    def _read_file(self, file_path: str) -> bytes:
+        with open(file_path, 'rb') as f:
+            return f.read()
+    
+    def _hash_file(self, file_path: str, chunk_size: int = 1024 * 1024) -> str:
+        sha256 = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(chunk_size), b''):
+                sha256.update(chunk)
+        return sha256.hexdigest()
+    
+    async def _process_pdf_document(self, file_path: str) -> Dict[str, Any]:
         """Process PDF files by extracting text and analyzing with Claude"""
         
         print("Extracting text from PDF...")
         
         try:
             # Check if it's actually a PDF file
-            if not content.startswith(b'%PDF'):
+            if not self._read_header(file_path).startswith(b'%PDF'):
                 print("File is not a valid PDF - treating as text")
                 # Try to process as text instead
                 try:
-                    text_content = content.decode('utf-8')
+                    text_content = self._read_file(file_path).decode('utf-8')
                     return await self._analyze_text_with_claude(text_content)
                 except:
                     return {
@@ -74,16 +288,16 @@ class DocumentProcessor:
                         "confidence": 0.1
                     }
             
-            # Extract text from PDF
-            pdf_reader = PyPDF2.PdfReader(io.BytesIO(content))
-            text_content = ""
-            
-            for page_num in range(len(pdf_reader.pages)):
-                page = pdf_reader.pages[page_num]
-                page_text = page.extract_text()
-                text_content += page_text + "\n"
+            # Extract text from PDF in the process pool (CPU-bound, keeps the event loop free)
+            extraction = await self.pdf_extractor.extract_text(
+                file_path,
+                char_budget=ANALYSIS_TEXT_CHAR_BUDGET,
+                selection=PDF_PAGE_SELECTION,
+                keywords=PDF_SELECTION_KEYWORDS
+            )
+            text_content = extraction.text
             
-            print(f"Extracted {len(text_content)} characters from PDF")
+            print(f"Extracted {len(text_content)} characters from {extraction.pages_extracted}/{extraction.page_count} PDF pages in {extraction.elapsed_seconds:.2f}s")
             
             if not text_content.strip():
                 print("No text found in PDF - may be image-based PDF")
@@ -104,7 +318,7 @@ class DocumentProcessor:
             
             # Fallback: try to process as text
             try:
-                text_content = content.decode('utf-8')
+                text_content = self._read_file(file_path).decode('utf-8')
                 return await self._analyze_text_with_claude(text_content)
             except:
                 return {
@@ -128,7 +342,7 @@ class DocumentProcessor:
         prompt = f"""Analyze this document text for insurance claim processing:
 
 DOCUMENT TEXT:
-{text_content[:3000]}
+{text_content[:ANALYSIS_TEXT_CHAR_BUDGET]}
 
 Extract key information:
 1. Document type (receipt, policy, fire_report, estimate, etc.)
@@ -138,56 +352,48 @@ Extract key information:
 5. Key insurance-related information
 6. Any wildfire/fire damage details
 
-Return JSON:
-{{
-  "document_type": "receipt|policy|fire_report|estimate|other",
-  "extracted_dates": ["YYYY-MM-DD"],
-  "extracted_amounts": [numbers],
-  "merchant_or_agency": "string",
-  "policy_number": "string or null",
-  "incident_details": "string",
-  "key_findings": ["list of important details"],
-  "confidence": 0.8
-}}"""
+Record the result with the record_document_analysis tool."""
         
         try:
             print("Sending extracted text to Claude for analysis...")
             
-            message = self.client.messages.create(
-                model="claude-3-haiku-20240307",
-                max_tokens=1000,
-                messages=[{
-                    "role": "user", 
-                    "content": prompt
-                }]
-            )
-            
-            response_text = message.content[0].text
+            async with self.llm_semaphore:
+                result = await self.client.create_structured(
+                    TEXT_ANALYSIS_TOOL,
+                    model=EXTRACTION_MODEL,
+                    max_tokens=1000,
+                    messages=[{
+                        "role": "user", 
+                        "content": prompt
+                    }]
+                )
             
             print("=" * 80)
             print("CLAUDE API RESPONSE - PDF TEXT ANALYSIS")
             print("=" * 80)
-            print(response_text)
+            print(json.dumps(result, indent=2))
             print("=" * 80)
             
-            # Parse JSON response
-            try:
-                import re
-                json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
-                if json_match:
-                    result = json.loads(json_match.group())
-                    result["processing_method"] = "claude_text_analysis"
-                    return result
-                else:
-                    raise ValueError("No JSON found in Claude response")
-            except:
-                return {
-                    "document_type": "text_analysis",
-                    "raw_claude_response": response_text,
-                    "processing_method": "claude_text_fallback",
-                    "confidence": 0.6
-                }
+            result["processing_method"] = "claude_text_analysis"
+            return result
                 
+        except StructuredOutputError as e:
+            print(f"⚠️ Claude text analysis returned unusable fields: {e}")
+            return {
+                "document_type": "text_analysis",
+                "error": f"Invalid structured output: {e}",
+                "processing_method": "claude_text_fallback",
+                "confidence": 0.1
+            }
+        except CircuitOpenError as e:
+            print(f"🔌 Skipping Claude text analysis: {e}")
+            return {
+                "document_type": "claude_api_error",
+                "error": str(e),
+                "error_type": type(e).__name__,
+                "processing_method": "failed_claude_call",
+                "confidence": 0.0
+            }
         except Exception as e:
             print(f"❌ Claude text analysis failed: {e}")
             print(f"❌ ERROR TYPE: {type(e).__name__}")
@@ -250,8 +456,52 @@ Return JSON:
         
         return DocumentType.OTHER
     
-    async def _process_photo(self, content: bytes) -> Dict[str, Any]:
-        """Process images using Claude Vision API"""
+    async def _process_photo_deduplicated(self, file_path: str, filename: str, content_hash: str,
+                                          vision_batch: Optional[VisionBatch] = None
+                                          ) -> Tuple[Dict[str, Any], Optional[Dict[str, str]], Optional[Dict[str, Any]]]:
+        """Analyse a photo, reusing the analysis of an indexed near-duplicate when there is one
+        
+        Returns (extracted_data, perceptual_hash, duplicate_of).
+        """
+        try:
+            perceptual_hash, photo_metadata = await asyncio.to_thread(self._fingerprint_photo, file_path)
+        except Exception as e:
+            print(f"⚠️ Perceptual hashing failed, analysing without duplicate check: {e}")
+            return await self._process_photo(file_path, vision_batch), None, None
+        
+        match = self.photo_index.find(perceptual_hash)
+        if match:
+            entry, distance = match
+            # The original may still be in flight in the same upload batch - wait for its analysis
+            original = await asyncio.shield(entry.analysis)
+            if original is not None:
+                print(f"🔁 Near-duplicate photo: {filename} matches {entry.filename} (distance {distance}) - reusing analysis")
+                extracted_data = dict(original)
+                extracted_data["photo_metadata"] = photo_metadata
+                # The index is shared across claims, so don't reveal which upload the original was
+                duplicate_of = {"distance": distance}
+                return extracted_data, perceptual_hash, duplicate_of
+        
+        entry = self.photo_index.reserve(perceptual_hash, content_hash, filename)
+        try:
+            extracted_data = await self._process_photo(file_path, vision_batch)
+        except BaseException:
+            self.photo_index.discard(entry)
+            raise
+        
+        if "error" in extracted_data:
+            self.photo_index.discard(entry)
+        else:
+            self.photo_index.complete(entry, extracted_data)
+        return extracted_data, perceptual_hash, None
+    
+    def _fingerprint_photo(self, file_path: str) -> Tuple[Dict[str, str], Dict[str, Any]]:
+        """Perceptual hashes and EXIF metadata in one decode (CPU-bound, run in a thread)"""
+        with Image.open(file_path) as image:
+            return compute_image_hashes(image), extract_image_metadata(image)
+    
+    async def _process_photo(self, file_path: str, vision_batch: Optional[VisionBatch] = None) -> Dict[str, Any]:
+        """Process images using Claude Vision API (packed with the claim's other photos when batching)"""
         
         if not self.client:
             print("⚠️ Claude API not available - cannot process photo")
@@ -260,16 +510,40 @@ Return JSON:
                 "error": "Claude API key not configured",
                 "confidence": 0.0
             }
+        if not self.client.available():
+            print("🔌 Claude circuit breaker open - recording photo without vision analysis")
+            return self._photo_analysis_failed(CircuitOpenError("Claude circuit breaker is open"))
         
-        # Detect image type
-        if content.startswith(b'\x89PNG'):
-            media_type = "image/png"
-        elif content.startswith(b'GIF'):
-            media_type = "image/gif" 
-        elif content.startswith(b'\xff\xd8\xff'):
-            media_type = "image/jpeg"
-        else:
-            media_type = "image/jpeg"  # Default
+        # Downscale/re-encode for the vision model - the original stays on disk for the evidence PDF
+        photo_metadata = None
+        try:
+            prepared = await asyncio.to_thread(prepare_image_for_vision, file_path)
+            content = prepared.data
+            media_type = prepared.media_type
+            photo_metadata = prepared.metadata
+            print(f"🖼️ Prepared image for vision: {prepared.original_width}x{prepared.original_height} "
+                  f"({prepared.original_bytes:,} bytes) → {prepared.width}x{prepared.height} ({len(content):,} bytes)")
+        except Exception as e:
+            print(f"⚠️ Image preprocessing failed, sending original: {e}")
+            content = self._read_file(file_path)
+            
+            # Detect image type
+            if content.startswith(b'\x89PNG'):
+                media_type = "image/png"
+            elif content.startswith(b'GIF'):
+                media_type = "image/gif" 
+            elif content.startswith(b'\xff\xd8\xff'):
+                media_type = "image/jpeg"
+            else:
+                media_type = "image/jpeg"  # Default
+        
+        if vision_batch is not None:
+            result = await vision_batch.analyze(content, media_type, os.path.basename(file_path))
+            if result is not None:
+                if photo_metadata:
+                    result["photo_metadata"] = photo_metadata
+                return result
+            # Singleton batch, or the batched reply had no usable entry for this image
         
         base64_image = base64.b64encode(content).decode('utf-8')
         
@@ -277,66 +551,144 @@ Return JSON:
         
         Extract: damage type, severity, affected areas, photo quality
         
-        Return JSON:
-        {
-            "damage_type": ["fire", "smoke"],
-            "severity": "severe", 
-            "affected_areas": ["roof", "walls"],
-            "photo_quality": "clear",
-            "description": "detailed description"
-        }"""
+        Record the result with the record_photo_analysis tool."""
         
         try:
-            message = self.client.messages.create(
-                model="claude-3-haiku-20240307",
-                max_tokens=1000,
-                messages=[{
-                    "role": "user",
-                    "content": [
-                        {
-                            "type": "image",
-                            "source": {
-                                "type": "base64",
-                                "media_type": media_type,
-                                "data": base64_image
-                            }
-                        },
-                        {"type": "text", "text": prompt}
-                    ]
-                }]
-            )
-            
-            response_text = message.content[0].text
+            self.vision_metrics["single_requests"] += 1
+            async with self.llm_semaphore:
+                result = await self.client.create_structured(
+                    PHOTO_ANALYSIS_TOOL,
+                    model=EXTRACTION_MODEL,
+                    max_tokens=1000,
+                    messages=[{
+                        "role": "user",
+                        "content": [
+                            {
+                                "type": "image",
+                                "source": {
+                                    "type": "base64",
+                                    "media_type": media_type,
+                                    "data": base64_image
+                                }
+                            },
+                            {"type": "text", "text": prompt}
+                        ]
+                    }]
+                )
             
             print("=" * 80)
             print("CLAUDE API RESPONSE - IMAGE ANALYSIS")
             print("=" * 80)
-            print(response_text)
+            print(json.dumps(result, indent=2))
             print("=" * 80)
             
-            # Parse JSON
-            import re
-            json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
-            if json_match:
-                return json.loads(json_match.group())
-            else:
-                raise ValueError("No valid JSON found in Claude response")
+            if photo_metadata:
+                result["photo_metadata"] = photo_metadata
+            return result
                 
         except Exception as e:
             print(f"❌ Claude Vision API failed: {e}")
-            # NO FALLBACK - Force real Claude API usage
-            raise Exception(f"Claude Vision API failed - real processing required: {e}")
+            return self._photo_analysis_failed(e, photo_metadata)
+    
+    def _photo_analysis_failed(self, error: Exception, photo_metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Error result for a photo Claude couldn't analyse - the upload still succeeds, and the error
+        keeps it out of the extraction cache and duplicate index so it's analysed again next time"""
+        extracted_data = {
+            "document_type": "photo",
+            "error": f"Claude Vision API failed: {error}",
+            "error_type": type(error).__name__,
+            "processing_method": "failed_claude_call",
+            "confidence": 0.0
+        }
+        if photo_metadata:
+            extracted_data["photo_metadata"] = photo_metadata
+        return extracted_data
+    
+    async def _analyze_photo_batch(self, items: List[VisionBatchItem]) -> List[Optional[Dict[str, Any]]]:
+        """Analyse several photos of one claim in a single multi-image request
+        
+        Returns one result per item in order; None entries are retried with the single-image prompt.
+        """
+        if len(items) < 2:
+            return [None] * len(items)
+        
+        content = []
+        for i, item in enumerate(items, start=1):
+            content.append({"type": "text", "text": f"Image {i}:"})
+            content.append({
+                "type": "image",
+                "source": {
+                    "type": "base64",
+                    "media_type": item.media_type,
+                    "data": base64.b64encode(item.data).decode('utf-8')
+                }
+            })
+        
+        content.append({"type": "text", "text": f"""These {len(items)} property damage photos are from the same insurance claim.
+        
+        Analyze each photo: damage type, severity, affected areas, photo quality.
+        Several photos may show the same room or structure - cross-reference them so the
+        descriptions and severities are consistent.
+        
+        Record one entry per image, in order, with the record_photo_analyses tool."""})
+        
+        self.vision_metrics["batched_requests"] += 1
+        self.vision_metrics["batched_images"] += len(items)
+        print(f"🖼️ Sending {len(items)} photos in one vision request ({sum(len(item.data) for item in items):,} bytes)")
+        
+        try:
+            async with self.llm_semaphore:
+                reply = await self.client.create_structured(
+                    PHOTO_BATCH_TOOL,
+                    model=EXTRACTION_MODEL,
+                    max_tokens=min(VISION_MAX_OUTPUT_TOKENS, VISION_BATCH_TOKENS_PER_IMAGE * len(items)),
+                    messages=[{"role": "user", "content": content}]
+                )
+            analyses = reply["images"]
+            
+            print("=" * 80)
+            print(f"CLAUDE API RESPONSE - BATCHED IMAGE ANALYSIS ({len(items)} images)")
+            print("=" * 80)
+            print(json.dumps(analyses, indent=2))
+            print("=" * 80)
+        except Exception as e:
+            print(f"⚠️ Batched vision request failed, falling back to one request per photo: {e}")
+            self.vision_metrics["batch_fallbacks"] += len(items)
+            return [None] * len(items)
+        
+        # Map entries back by image_index, falling back to position when the model omits it
+        results: List[Optional[Dict[str, Any]]] = [None] * len(items)
+        for position, analysis in enumerate(analyses if isinstance(analyses, list) else []):
+            if not isinstance(analysis, dict):
+                continue
+            index = analysis.pop("image_index", position + 1)
+            if isinstance(index, int) and 1 <= index <= len(items) and results[index - 1] is None:
+                results[index - 1] = analysis
+        
+        missing = sum(1 for result in results if result is None)
+        if missing:
+            print(f"⚠️ Batched vision reply missing {missing}/{len(items)} images - analysing those individually")
+            self.vision_metrics["batch_fallbacks"] += missing
+        return results
+    
+    def _extraction_cache_key(self, content_hash: str, doc_type: DocumentType) -> str:
+        """Cache key from the SHA-256 of the uploaded bytes plus the prompt/model version and the
+        settings that decide what the model sees (image downscaling for photos, text selection otherwise)"""
+        if doc_type == DocumentType.PHOTO:
+            return f"{content_hash}:{EXTRACTION_MODEL}:{EXTRACTION_PROMPT_VERSION}:{VISION_MAX_LONG_EDGE}:{VISION_JPEG_QUALITY}"
+        return f"{content_hash}:{EXTRACTION_MODEL}:{EXTRACTION_PROMPT_VERSION}:{PDF_PAGE_SELECTION}:{ANALYSIS_TEXT_CHAR_BUDGET}"
     
     def _calculate_confidence(self, extracted_data: Dict[str, Any]) -> float:
         """Calculate confidence based on extraction quality"""
         if "error" in extracted_data:
             return 0.1
         
-        # Count valid fields
+        # Count valid fields (photo metadata is carried along, not extracted by the model)
+        fields = {key: value for key, value in extracted_data.items() if key != "photo_metadata"}
         valid_fields = 0
-        total_fields = len(extracted_data)
+        total_fields = len(fields)
         
-        for key, value in extracted_data.items():
+        for key, value in fields.items():
             if value and value != "unknown" and value != [] and value != {}:
                 valid_fields += 1
         
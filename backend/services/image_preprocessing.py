@@ -0,0 +1,138 @@
+import os
+import io
+from typing import Dict, Any, Optional, Union
+from pydantic import BaseModel
+from PIL import Image, ImageOps, ExifTags
+
+# Claude Vision downsamples anything larger than ~1568px on the long edge, so sending more is wasted bytes
+VISION_MAX_LONG_EDGE = int(os.getenv("VISION_MAX_LONG_EDGE", "1568"))
+VISION_JPEG_QUALITY = int(os.getenv("VISION_JPEG_QUALITY", "85"))
+
+EXIF_FIELDS = ["DateTimeOriginal", "DateTime", "Make", "Model", "Software", "Orientation"]
+GPS_IFD = 0x8825
+EXIF_IFD = 0x8769
+
+class PreparedImage(BaseModel):
+    data: bytes
+    media_type: str
+    width: int
+    height: int
+    original_width: int
+    original_height: int
+    original_bytes: int
+    metadata: Dict[str, Any]
+
+def prepare_image_for_vision(source: Union[str, bytes], max_long_edge: int = VISION_MAX_LONG_EDGE,
+                             quality: int = VISION_JPEG_QUALITY) -> PreparedImage:
+    """Apply EXIF orientation, downscale and re-encode as metadata-free JPEG (CPU-bound, run in a thread)"""
+    if isinstance(source, bytes):
+        original_bytes = len(source)
+        image = Image.open(io.BytesIO(source))
+    else:
+        original_bytes = os.path.getsize(source)
+        image = Image.open(source)
+
+    with image:
+        # Capture metadata before it is stripped by the re-encode
+        metadata = extract_image_metadata(image)
+        original_width, original_height = image.size
+
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ("RGB", "L"):
+            image = _flatten_to_rgb(image)
+
+        if max(image.size) > max_long_edge:
+            image.thumbnail((max_long_edge, max_long_edge), Image.LANCZOS)
+
+        output = io.BytesIO()
+        # No exif= argument, so the JPEG is written without EXIF/GPS metadata
+        image.save(output, format="JPEG", quality=quality, optimize=True)
+
+        return PreparedImage(
+            data=output.getvalue(),
+            media_type="image/jpeg",
+            width=image.size[0],
+            height=image.size[1],
+            original_width=original_width,
+            original_height=original_height,
+            original_bytes=original_bytes,
+            metadata=metadata
+        )
+
+def extract_image_metadata(image: Image.Image) -> Dict[str, Any]:
+    """JSON-safe subset of the image's EXIF data (capture time, device, GPS)"""
+    metadata: Dict[str, Any] = {
+        "format": image.format,
+        "width": image.size[0],
+        "height": image.size[1],
+        "has_exif": False
+    }
+
+    try:
+        exif = image.getexif()
+    except Exception:
+        return metadata
+
+    if not exif:
+        return metadata
+
+    metadata["has_exif"] = True
+    tags = {ExifTags.TAGS.get(tag_id, tag_id): value for tag_id, value in exif.items()}
+    try:
+        tags.update({ExifTags.TAGS.get(tag_id, tag_id): value for tag_id, value in exif.get_ifd(EXIF_IFD).items()})
+    except Exception:
+        pass
+
+    for field in EXIF_FIELDS:
+        value = tags.get(field)
+        if value is not None:
+            metadata[_snake_case(field)] = _json_safe(value)
+
+    gps = _extract_gps(exif)
+    if gps:
+        metadata["gps"] = gps
+
+    return metadata
+
+def _extract_gps(exif) -> Optional[Dict[str, float]]:
+    try:
+        gps_info = {ExifTags.GPSTAGS.get(tag_id, tag_id): value for tag_id, value in exif.get_ifd(GPS_IFD).items()}
+    except Exception:
+        return None
+
+    if "GPSLatitude" not in gps_info or "GPSLongitude" not in gps_info:
+        return None
+
+    try:
+        latitude = _dms_to_degrees(gps_info["GPSLatitude"])
+        longitude = _dms_to_degrees(gps_info["GPSLongitude"])
+        if gps_info.get("GPSLatitudeRef") == "S":
+            latitude = -latitude
+        if gps_info.get("GPSLongitudeRef") == "W":
+            longitude = -longitude
+        return {"latitude": round(latitude, 6), "longitude": round(longitude, 6)}
+    except Exception:
+        return None
+
+def _dms_to_degrees(dms) -> float:
+    degrees, minutes, seconds = (float(value) for value in dms)
+    return degrees + minutes / 60 + seconds / 3600
+
+def _flatten_to_rgb(image: Image.Image) -> Image.Image:
+    if image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info):
+        rgba = image.convert("RGBA")
+        background = Image.new("RGB", rgba.size, (255, 255, 255))
+        background.paste(rgba, mask=rgba.split()[-1])
+        return background
+    return image.convert("RGB")
+
+def _json_safe(value: Any) -> Any:
+    if isinstance(value, bytes):
+        return value.decode("utf-8", errors="ignore").strip("\x00")
+    if isinstance(value, (int, float, str, bool)):
+        return value
+    return str(value)
+
+def _snake_case(name: str) -> str:
+    return "".join(f"_{c.lower()}" if c.isupper() and i > 0 and not name[i - 1].isupper() else c.lower()
+                   for i, c in enumerate(name))
@@ -0,0 +1,49 @@
+import os
+from typing import Dict, Any, List, Optional
+from models.claim import ClaimPacket
+from services.judge_cache import claim_fingerprint
+
+# Skip validation loop iterations whose judge input is a claim that was already judged unchanged
+VALIDATION_SKIP_UNCHANGED_ITERATIONS = os.getenv("VALIDATION_SKIP_UNCHANGED_ITERATIONS", "true").lower() == "true"
+
+NO_OP_REASONS = {
+    "knot_receipts": "Knot receipt sync added no new documents",
+    "document_reprocessing": "document reprocessing changed no document"
+}
+
+class IterationScheduler:
+    """Decides which validation loop iterations need a judge call
+
+    The packet's content fingerprint (services/judge_cache.claim_fingerprint) is taken after each
+    iteration's enhancement step. An enhancement iteration whose step left the fingerprint unchanged
+    is skipped, and so is the final review when no enhancement ever changed the claim screened in
+    iteration 1 - either way the judge would only re-read the same claim at a different depth.
+    """
+
+    def __init__(self, enabled: bool = VALIDATION_SKIP_UNCHANGED_ITERATIONS):
+        self.enabled = enabled
+        self.screened_fingerprint: Optional[str] = None
+        self.previous_fingerprint: Optional[str] = None
+        self.skipped: List[Dict[str, Any]] = []
+
+    def skip_reason(self, iteration: int, analysis_depth: str, claim_packet: ClaimPacket,
+                    enhancement: Optional[str]) -> Optional[str]:
+        """Why this iteration's judge call can be skipped, or None if it has to run"""
+        fingerprint = claim_fingerprint(claim_packet)
+        previous = self.previous_fingerprint
+        self.previous_fingerprint = fingerprint
+        if self.screened_fingerprint is None:
+            self.screened_fingerprint = fingerprint
+            return None
+        if not self.enabled:
+            return None
+
+        if enhancement and fingerprint == previous:
+            reason = NO_OP_REASONS.get(enhancement, f"{enhancement} left the claim unchanged")
+        elif not enhancement and fingerprint == self.screened_fingerprint:
+            reason = "no enhancement changed the claim since iteration 1"
+        else:
+            return None
+
+        self.skipped.append({"iteration": iteration, "analysis_depth": analysis_depth, "reason": reason})
+        return reason
@@ -0,0 +1,107 @@
+import os
+import json
+import time
+import hashlib
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+from models.claim import ClaimPacket, ClaimValidation
+from services.result_cache import ResultCache
+
+JUDGE_CACHE_ENABLED = os.getenv("JUDGE_CACHE_ENABLED", "true").lower() == "true"
+JUDGE_CACHE_TTL_SECONDS = int(os.getenv("JUDGE_CACHE_TTL_SECONDS", str(24 * 3600)))
+JUDGE_CACHE_MEMORY_ENTRIES = int(os.getenv("JUDGE_CACHE_MEMORY_ENTRIES", "256"))
+JUDGE_CACHE_MAX_ENTRIES = int(os.getenv("JUDGE_CACHE_MAX_ENTRIES", "5000"))
+JUDGE_CACHE_MAX_BYTES = int(os.getenv("JUDGE_CACHE_MAX_BYTES", str(50 * 1024 * 1024)))
+
+# Document fields that can change an evaluation - IDs, timestamps and storage references are left out
+DOCUMENT_FINGERPRINT_FIELDS = [
+    "filename", "document_type", "extracted_data", "confidence_score", "perceptual_hash", "duplicate_of"
+]
+
+def _canonical_json(value: Any) -> str:
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), default=str)
+
+def claim_fingerprint(claim_packet: ClaimPacket) -> str:
+    """SHA-256 over the evaluation-relevant fields of a claim packet
+
+    Documents are fingerprinted individually and sorted, so upload order and re-generated
+    document IDs don't change the result. The claim ID is excluded too: two packets with the
+    same content get the same evaluation.
+    """
+    documents = sorted(
+        hashlib.sha256(_canonical_json(doc.model_dump(mode="json", include=set(DOCUMENT_FINGERPRINT_FIELDS))).encode()).hexdigest()
+        for doc in claim_packet.documents
+    )
+    packet = {
+        "policy_number": claim_packet.policy_number,
+        "claimant_name": claim_packet.claimant_name,
+        "incident_date": claim_packet.incident_date.isoformat() if claim_packet.incident_date else None,
+        "property_address": claim_packet.property_address,
+        "estimated_damage": claim_packet.estimated_damage,
+        "documents": documents
+    }
+    return hashlib.sha256(_canonical_json(packet).encode()).hexdigest()
+
+class JudgeResultCache:
+    """Two-level cache of judge evaluations: an in-memory LRU in front of the persistent ResultCache"""
+
+    def __init__(self, constitution_version: str, model: str, ttl_seconds: int = JUDGE_CACHE_TTL_SECONDS,
+                 memory_entries: int = JUDGE_CACHE_MEMORY_ENTRIES):
+        self.constitution_version = constitution_version
+        self.model = model
+        self.ttl_seconds = ttl_seconds
+        self.memory_entries = memory_entries
+        self._memory: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self.memory_hits = 0
+
+        self.store = ResultCache(
+            "judge",
+            max_entries=JUDGE_CACHE_MAX_ENTRIES,
+            max_bytes=JUDGE_CACHE_MAX_BYTES,
+            max_age_seconds=ttl_seconds
+        )
+
+    def key(self, claim_packet: ClaimPacket, depth: str, previous_scores: List[float]) -> str:
+        scores = ",".join(f"{score:.4f}" for score in previous_scores)
+        return f"{claim_fingerprint(claim_packet)}:{depth}:{scores}:{self.constitution_version}:{self.model}"
+
+    def get(self, key: str, claim_id: str) -> Optional[ClaimValidation]:
+        cached = self._memory.get(key)
+        if cached and time.monotonic() - cached[0] <= self.ttl_seconds:
+            self._memory.move_to_end(key)
+            self.memory_hits += 1
+            value = cached[1]
+        else:
+            if cached:
+                del self._memory[key]
+            stored = self.store.get_entry(key)
+            if stored is None:
+                return None
+            value, age_seconds = stored
+            # Keep the stored entry's age so re-caching it in memory doesn't extend its TTL
+            self._remember(key, value, age_seconds)
+
+        validation = ClaimValidation.model_validate(value)
+        # The fingerprint ignores claim IDs, so report the hit against the claim being evaluated
+        validation.claim_id = claim_id
+        return validation
+
+    def set(self, key: str, validation: ClaimValidation):
+        value = validation.model_dump(mode="json")
+        self._remember(key, value)
+        self.store.set(key, value)
+
+    def _remember(self, key: str, value: Dict[str, Any], age_seconds: float = 0.0):
+        self._memory[key] = (time.monotonic() - age_seconds, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.store.stats(),
+            "memory_hits": self.memory_hits,
+            "memory_entries": len(self._memory),
+            "constitution_version": self.constitution_version,
+            "model": self.model
+        }
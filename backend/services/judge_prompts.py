@@ -0,0 +1,326 @@
+from typing import Dict, Any, List
+from services.structured_output import tool_spec
+
+# Judge prompts are split into a stable prefix (constitution + stage instructions + output schema),
+# sent as cacheable system blocks, and a per-claim suffix sent as the user message.
+# Nothing in this module may interpolate claim data, or the prompt cache stops matching.
+# Each stage's output format is a tool input schema (JUDGE_TOOLS); the judge forces that tool.
+
+JUDGE_ROLE = """You are the AI Judge for a wildfire insurance claims platform. Claims are evaluated against the
+validation constitution below. Each request gives you the stage you are performing (in the stage
+instructions that follow the constitution) and the claim data for that stage (in the user message).
+Record your assessment by calling the tool named in the stage instructions - its input schema
+defines the fields to fill in."""
+
+def render_constitution(constitution: Dict[str, Any]) -> str:
+    """Deterministic text rendering of the constitution - identical input gives byte-identical output"""
+    lines = [JUDGE_ROLE, "", f"VALIDATION CONSTITUTION ({constitution.get('version', 'unversioned')})", ""]
+
+    for category, rules in constitution["rules"].items():
+        lines.append(f"{category.replace('_', ' ').upper()}:")
+        for rule in rules:
+            required = " [REQUIRED]" if rule.get("required") else ""
+            lines.append(f"- {rule['id']} (weight {rule['weight']:.2f}){required}: {rule['description']}")
+        lines.append("")
+
+    lines.append("KNOWN FRAUD INDICATORS:")
+    lines.extend(f"- {indicator}" for indicator in constitution.get("fraud_indicators", []))
+    return "\n".join(lines)
+
+def build_system_prompt(constitution_text: str, stage: str) -> List[Dict[str, Any]]:
+    """System blocks with cache breakpoints after the constitution and after the stage instructions
+
+    The constitution breakpoint lets all stages share one cached prefix; the second caches each
+    stage's instructions on top of it.
+    """
+    return [
+        {"type": "text", "text": constitution_text, "cache_control": {"type": "ephemeral"}},
+        {"type": "text", "text": STAGE_INSTRUCTIONS[stage], "cache_control": {"type": "ephemeral"}}
+    ]
+
+LOCAL_EVALUATION = """STAGE: COMPREHENSIVE EVALUATION
+
+You are an expert AI Judge for wildfire insurance claims. Analyze the claim comprehensively and provide a detailed validation score.
+
+ANALYSIS REQUIREMENTS:
+Evaluate this claim across these key areas:
+1. Document Completeness (photos, receipts, policy docs, fire reports)
+2. Damage Assessment (severity vs claim amount, wildfire evidence)
+3. Timing Analysis (claim filing timeline, coverage period)
+4. Fraud Risk Indicators (suspicious patterns, inconsistencies)
+5. Document Quality (OCR confidence, content analysis)
+
+For each document, analyze the extracted_data to determine:
+- If photos show actual fire/wildfire damage
+- If receipts are legitimate and match claim amounts
+- If reports are official and detailed
+- If timing is consistent and reasonable
+
+WILDFIRE CLAIM SPECIFIC RULES:
+- Photos must show clear fire damage (charring, ash, structural damage)
+- Receipts should be for fire-related repairs/replacement
+- Claims filed >60 days after incident are suspicious
+- High-value claims need substantial documentation
+- Look for evidence of wildfire causation vs other fire types
+
+Submit the analysis with the submit_local_evaluation tool.
+
+Be thorough and realistic. Base your analysis on ACTUAL document content and real insurance industry standards."""
+
+BASIC_SCREENING = """STAGE: BASIC SCREENING (ITERATION 1)
+
+You are conducting BASIC SCREENING for a wildfire insurance claim. The user message contains the
+claim overview and the filing delay in days since the incident.
+
+BASIC SCREENING CHECKLIST:
+1. DOCUMENT PRESENCE: Are essential documents provided?
+2. OBVIOUS RED FLAGS: Any glaring timeline/amount inconsistencies?
+3. FILING TIMELINE: Is claim filed within reasonable timeframe?
+4. DAMAGE AMOUNT: Does estimated damage seem plausible?
+5. BASIC COMPLETENESS: Minimum documentation threshold met?
+
+SURFACE-LEVEL ANALYSIS RULES:
+- Claims filed >90 days after incident are suspicious (red flag)
+- Claims with no photos for damage >$10,000 are incomplete
+- Claims with damage >$100,000 need substantial documentation
+- Basic document variety expected (photos + reports + receipts)
+
+Submit the BASIC SCREENING analysis with the submit_basic_screening tool.
+
+Focus on SPEED and OBVIOUSNESS. Don't deep-dive yet - just identify clear patterns."""
+
+ENHANCED_WITH_RECEIPTS = """STAGE: ENHANCED ANALYSIS WITH RECEIPTS (ITERATION 2)
+
+You are conducting ENHANCED ANALYSIS for a wildfire insurance claim. The user message contains the
+enhanced claim data with receipts, the previous iteration's score, the receipt totals and coverage,
+and the expected score range for this iteration.
+
+⚠️ CRITICAL INSTRUCTION: This claim has been IMPROVED with additional receipts and evidence.
+Your score should REFLECT this improvement. Re-evaluate the ENHANCED claim with the NEW documentation.
+
+SCORING GUIDANCE:
+- The claim now has more documents than in iteration 1
+- Additional receipts provide financial validation (worth +10-20% alone)
+- Knot API receipts are highly credible (95%+ confidence)
+- More evidence = higher completeness score
+- Your score MUST reflect the additional documentation quality
+
+Iteration 2 should score HIGHER than iteration 1 (within the expected score range given) due to:
+1. More receipts (count and total given in the claim data)
+2. Better financial coverage (receipt coverage percentage given in the claim data)
+3. Auto-fetched credible data from Knot API
+4. Enhanced claim completeness
+
+ENHANCED ANALYSIS FOCUS:
+1. RECEIPT CORRELATION: Do receipts support the damage claim narrative?
+2. FINANCIAL VALIDATION: Receipt total vs estimated damage (receipt coverage)
+3. MERCHANT ANALYSIS: Are merchants appropriate for wildfire recovery?
+4. SPENDING PATTERNS: Do purchase patterns indicate legitimate fire recovery?
+5. AUTO-FETCHED DATA: Receipts from Knot API integration
+6. TIMELINE CORRELATION: Purchase dates vs incident vs filing timeline
+
+ENHANCED VALIDATION RULES:
+- Receipt coverage <25% for claims >$50k is concerning
+- Knot auto-fetched receipts have higher credibility than manual uploads
+- Fire recovery merchants: Home Depot, contractors, emergency suppliers
+- Luxury items purchased long after incident are suspicious
+- Emergency purchases (hotels, basic necessities) within 30 days are expected
+
+CROSS-REFERENCE ANALYSIS:
+- Do receipt amounts align with claimed damage severity?
+- Are receipt dates logical relative to incident date?
+- Do merchants match expected fire recovery needs?
+- Is there progression from emergency to replacement purchases?
+
+Submit the ENHANCED analysis with the submit_enhanced_with_receipts tool.
+
+Analyze the FINANCIAL EVIDENCE thoroughly. Consider receipt quality and auto-fetched Knot data credibility."""
+
+FORENSIC_ANALYSIS = """STAGE: FORENSIC ANALYSIS (ITERATION 3)
+
+You are conducting FORENSIC ANALYSIS for a wildfire insurance claim. The user message contains the
+forensic investigation data and the score progression of the previous iterations.
+
+⚠️ CRITICAL: This is a RE-EVALUATION of the SAME claim with ENHANCED documentation.
+The claim has been improved with additional receipts and reprocessed documents.
+Your forensic analysis should recognize these improvements and score accordingly.
+
+Previous iterations have added value - your score should reflect the enhanced evidence quality.
+
+FORENSIC INVESTIGATION FOCUS:
+1. DOCUMENT FORENSICS: Examine OCR confidence patterns, metadata consistency
+2. CROSS-REFERENCE VALIDATION: Do documents corroborate each other's claims?
+3. TEMPORAL FORENSICS: Deep timeline analysis across all documents
+4. BEHAVIORAL ANALYSIS: Filing patterns, purchase behaviors, claim strategy
+5. AUTHENTICITY ASSESSMENT: Document staging, manipulation indicators
+6. PROFESSIONAL VS CONSUMER: Quality of professional vs consumer documentation
+7. MICRO-INCONSISTENCIES: Subtle contradictions between document sources
+
+FORENSIC EXAMINATION RULES:
+- OCR confidence patterns can indicate document manipulation
+- Cross-document timestamp inconsistencies suggest staging
+- Professional documentation (contractors, adjusters) carries more weight
+- Consumer receipts should show logical progression (emergency → replacement)
+- Multiple low-confidence documents together are concerning
+- Document variety matters: photos + receipts + official reports expected
+
+INVESTIGATIVE APPROACH:
+- Examine each document's contribution to the overall narrative
+- Look for subtle inconsistencies that basic screening missed
+- Validate professional documentation authenticity
+- Assess document relationships and dependencies
+- Consider claim filing strategy and timing patterns
+
+Submit the FORENSIC analysis with the submit_forensic_analysis tool.
+
+Be THOROUGH and SKEPTICAL. Look for subtle patterns basic screening missed."""
+
+EXPERT_REVIEW = """STAGE: EXPERT REVIEW (ITERATION 4 - FINAL)
+
+You are conducting EXPERT REVIEW for a wildfire insurance claim. The user message contains the
+comprehensive expert data, the analysis progression and the improvement trend.
+
+⚠️ CRITICAL: This claim has gone through 3 previous iterations of enhancement:
+- Iteration 1: Initial baseline assessment
+- Iteration 2: Enhanced with auto-fetched receipts from Knot API
+- Iteration 3: Deep document reprocessing and forensic analysis
+- Iteration 4 (NOW): Final expert review of the FULLY ENHANCED claim
+
+The claim NOW has MORE and BETTER documentation than it started with.
+Your expert assessment should recognize the cumulative improvements made across all iterations.
+
+EXPERT COMPREHENSIVE REVIEW:
+This is the FINAL authoritative assessment. Consider:
+
+1. HOLISTIC ASSESSMENT: Overall claim narrative coherence across all iterations
+2. INDUSTRY BENCHMARKING: How does this compare to typical wildfire claims?
+3. RISK-REWARD ANALYSIS: Final recommendation with confidence intervals
+4. PROGRESSIVE IMPROVEMENT: Has the claim shown meaningful enhancement?
+5. REGULATORY COMPLIANCE: Industry standard adherence
+6. DEFINITIVE VERDICT: Authoritative approve/deny with full justification
+
+EXPERT-LEVEL EVALUATION CRITERIA:
+- Wildfire claims typically require 3-7 documents minimum
+- Average OCR confidence should be >70% for approval
+- Receipt coverage of 60%+ is strong for approval
+- Claims showing improvement across iterations demonstrate good faith
+- Professional documentation (contractors, officials) carries significant weight
+- Geographic consistency with known wildfire areas is crucial
+
+INDUSTRY STANDARDS:
+- Total loss wildfire claims: $50k-$500k typical range
+- Partial damage: $10k-$100k typical range
+- Emergency expenses: $2k-$15k typical for temporary housing
+- Professional estimates required for structural damage >$25k
+- Photo documentation essential for damage >$10k
+
+FINAL EXPERT DECISION FRAMEWORK:
+- 80%+: Clear approval recommendation
+- 60-79%: Conditional approval with requirements
+- 40-59%: Additional documentation needed
+- <40%: Likely denial recommendation
+
+Submit the EXPERT REVIEW with the submit_expert_review tool.
+
+This is the FINAL ITERATION. Be definitive, authoritative, and comprehensive."""
+
+STAGE_INSTRUCTIONS = {
+    "LOCAL_EVALUATION": LOCAL_EVALUATION,
+    "BASIC_SCREENING": BASIC_SCREENING,
+    "ENHANCED_WITH_RECEIPTS": ENHANCED_WITH_RECEIPTS,
+    "FORENSIC_ANALYSIS": FORENSIC_ANALYSIS,
+    "EXPERT_REVIEW": EXPERT_REVIEW
+}
+
+
+# Every stage reports these first, so the score is parsed before the long-form fields finish streaming
+# and a reply cut off by max_tokens is still usable
+_SCORE_FIELDS = {
+    "overall_score": {"type": "number", "minimum": 0, "maximum": 1, "description": "Validation score, 0.0-1.0"},
+    "confidence": {"type": "number", "minimum": 0, "maximum": 1, "description": "Confidence in the score, 0.0-1.0"},
+    "approved": {"type": "boolean"}
+}
+_RATIONALE = {"type": "string"}
+_STRING_LIST = {"type": "array", "items": {"type": "string"}}
+
+def _enum(*values: str, description: str = "") -> Dict[str, Any]:
+    spec = {"type": "string", "enum": list(values)}
+    if description:
+        spec["description"] = description
+    return spec
+
+def _judge_tool(stage: str, description: str, properties: Dict[str, Any]) -> Dict[str, Any]:
+    return tool_spec(
+        f"submit_{stage.lower()}",
+        description,
+        {**_SCORE_FIELDS, **properties},
+        list(_SCORE_FIELDS)
+    )
+
+JUDGE_TOOLS = {
+    "LOCAL_EVALUATION": _judge_tool("LOCAL_EVALUATION", "Record the comprehensive claim evaluation", {
+        "rules_passed": {"type": "integer", "minimum": 0},
+        "rules_failed": {"type": "integer", "minimum": 0},
+        "missing_documents": {**_STRING_LIST, "description": "Missing document types"},
+        "fraud_indicators": {**_STRING_LIST, "description": "Specific fraud concerns"},
+        "detailed_rationale": {**_RATIONALE, "description": "Comprehensive explanation of the score"},
+        "key_findings": {**_STRING_LIST, "description": "Critical observations"},
+        "recommendations": {**_STRING_LIST, "description": "What the claimant should do to improve the claim"}
+    }),
+    "BASIC_SCREENING": _judge_tool("BASIC_SCREENING", "Record the basic screening result", {
+        "quick_assessment": {"type": "string", "description": "Can this claim be approved/rejected immediately?"},
+        "red_flags": {**_STRING_LIST, "description": "Critical issues requiring deeper analysis"},
+        "strengths": {**_STRING_LIST, "description": "Positive aspects of the claim"},
+        "recommendation": _enum("APPROVE_NOW", "NEEDS_ENHANCEMENT", "REJECT_NOW"),
+        "detailed_rationale": {**_RATIONALE, "description": "Surface-level assessment focusing on obvious issues"}
+    }),
+    "ENHANCED_WITH_RECEIPTS": _judge_tool("ENHANCED_WITH_RECEIPTS", "Record the receipt-enhanced analysis", {
+        "receipt_analysis": {
+            "type": "object",
+            "properties": {
+                "coverage_percentage": {"type": "number", "description": "Receipt coverage percentage from the claim data"},
+                "merchant_appropriateness": _enum("HIGH", "MEDIUM", "LOW"),
+                "timeline_consistency": _enum("CONSISTENT", "SUSPICIOUS", "INVALID"),
+                "spending_patterns": _enum("LEGITIMATE", "QUESTIONABLE", "FRAUDULENT")
+            }
+        },
+        "financial_validation": {"type": "string", "description": "Receipt-to-damage correlation analysis"},
+        "improvement_areas": {**_STRING_LIST, "description": "Specific areas where the claim could be enhanced"},
+        "detailed_rationale": {**_RATIONALE, "description": "Analysis focusing on financial evidence and receipt correlation"}
+    }),
+    "FORENSIC_ANALYSIS": _judge_tool("FORENSIC_ANALYSIS", "Record the forensic analysis", {
+        "forensic_findings": {
+            "type": "object",
+            "properties": {
+                "document_authenticity": _enum("HIGH", "MEDIUM", "LOW", "SUSPICIOUS"),
+                "cross_reference_consistency": _enum("CONSISTENT", "MINOR_ISSUES", "MAJOR_CONFLICTS"),
+                "temporal_analysis": _enum("LOGICAL", "QUESTIONABLE", "IMPOSSIBLE"),
+                "professional_documentation": _enum("PRESENT", "LIMITED", "MISSING")
+            }
+        },
+        "micro_inconsistencies": {**_STRING_LIST, "description": "Subtle contradictions found"},
+        "authentication_indicators": {**_STRING_LIST, "description": "Evidence supporting document authenticity"},
+        "investigative_concerns": {**_STRING_LIST, "description": "Areas requiring additional scrutiny"},
+        "detailed_rationale": {**_RATIONALE, "description": "Forensic investigation results with cross-referencing analysis"}
+    }),
+    "EXPERT_REVIEW": _judge_tool("EXPERT_REVIEW", "Record the final expert review", {
+        "expert_assessment": {
+            "type": "object",
+            "properties": {
+                "industry_comparison": _enum("ABOVE_AVERAGE", "TYPICAL", "BELOW_AVERAGE", "OUTLIER"),
+                "claim_coherence": _enum("STRONG", "ADEQUATE", "WEAK", "CONTRADICTORY"),
+                "documentation_quality": _enum("EXCELLENT", "GOOD", "ADEQUATE", "POOR"),
+                "final_recommendation": _enum("APPROVE", "CONDITIONAL_APPROVE", "REQUEST_MORE_DOCS", "DENY")
+            }
+        },
+        "definitive_verdict": {"type": "string", "description": "Final decision with full justification"},
+        "actionable_next_steps": {**_STRING_LIST, "description": "What the claimant should do if not approved"},
+        "expert_confidence": {"type": "number", "minimum": 0, "maximum": 100,
+                              "description": "Confidence in this final assessment, 0-100"},
+        "detailed_rationale": {**_RATIONALE, "description": "Comprehensive expert-level final assessment"}
+    })
+}
+
+# Sent with every judge request in this order: tools are part of the cached prefix, so all stages
+# share one tool list and only tool_choice differs
+JUDGE_TOOL_LIST = [JUDGE_TOOLS[stage] for stage in STAGE_INSTRUCTIONS]
@@ -0,0 +1,126 @@
+import os
+import time
+from typing import Dict, Any, List, Optional, Tuple, Callable, Awaitable
+from models.claim import ClaimValidation
+
+# Cheaper tiers answer first; the judge escalates to the next tier only when the answer isn't decisive
+JUDGE_TIERING_ENABLED = os.getenv("JUDGE_TIERING_ENABLED", "true").lower() == "true"
+JUDGE_FAST_MODEL = os.getenv("JUDGE_FAST_MODEL", "claude-3-5-haiku-20241022")
+# Results below this confidence, or with a score inside the ambiguous band [low, high), are escalated
+JUDGE_ESCALATION_MIN_CONFIDENCE = float(os.getenv("JUDGE_ESCALATION_MIN_CONFIDENCE", "0.8"))
+# The rule engine's confidence is a weighted mean of per-rule confidences and runs lower than the models'
+JUDGE_LOCAL_MIN_CONFIDENCE = float(os.getenv("JUDGE_LOCAL_MIN_CONFIDENCE", "0.7"))
+JUDGE_AMBIGUOUS_SCORE_BAND = os.getenv("JUDGE_AMBIGUOUS_SCORE_BAND", "0.5,0.85")
+# Depths where the local rule engine gets the first attempt, before any model call
+JUDGE_LOCAL_TIER_DEPTHS = os.getenv("JUDGE_LOCAL_TIER_DEPTHS", "BASIC_SCREENING,LOCAL_EVALUATION")
+
+LOCAL_TIER = "local_rules"
+FAST_TIER = "fast_model"
+FULL_TIER = "full_model"
+
+def _parse_band(value: str) -> Tuple[float, float]:
+    low, high = (float(part) for part in value.split(","))
+    if low > high:
+        raise ValueError(f"JUDGE_AMBIGUOUS_SCORE_BAND low bound {low} is above high bound {high}")
+    return low, high
+
+class JudgeTierRouter:
+    """Runs a judge depth on the cheapest tier first and escalates ambiguous or low-confidence results
+
+    Tiers are the local rule engine (only for JUDGE_LOCAL_TIER_DEPTHS), the fast model and the full
+    model. A tier whose model call failed (the stage fell back to the local rules) always escalates.
+    The tier that produced the returned validation is recorded in `evaluation_tier`.
+    """
+
+    def __init__(self, full_model: str, fast_model: str = JUDGE_FAST_MODEL,
+                 min_confidence: float = JUDGE_ESCALATION_MIN_CONFIDENCE,
+                 local_min_confidence: float = JUDGE_LOCAL_MIN_CONFIDENCE,
+                 ambiguous_band: Tuple[float, float] = _parse_band(JUDGE_AMBIGUOUS_SCORE_BAND),
+                 local_depths: str = JUDGE_LOCAL_TIER_DEPTHS, enabled: bool = JUDGE_TIERING_ENABLED):
+        self.full_model = full_model
+        self.fast_model = fast_model
+        self.min_confidence = min_confidence
+        self.local_min_confidence = local_min_confidence
+        self.ambiguous_band = ambiguous_band
+        self.local_depths = {depth.strip() for depth in local_depths.split(",") if depth.strip()}
+        self.enabled = enabled
+
+        self.metrics: Dict[str, Dict[str, Any]] = {
+            tier: {"attempts": 0, "decided": 0, "escalated": 0, "failed": 0, "total_seconds": 0.0}
+            for tier in (LOCAL_TIER, FAST_TIER, FULL_TIER)
+        }
+
+    def tiers_for(self, depth: str) -> List[Tuple[str, Optional[str]]]:
+        if not self.enabled:
+            return [(FULL_TIER, self.full_model)]
+        tiers: List[Tuple[str, Optional[str]]] = []
+        if depth in self.local_depths:
+            tiers.append((LOCAL_TIER, None))
+        if self.fast_model and self.fast_model != self.full_model:
+            tiers.append((FAST_TIER, self.fast_model))
+        tiers.append((FULL_TIER, self.full_model))
+        return tiers
+
+    def is_decisive(self, validation: ClaimValidation, tier: str = FULL_TIER) -> bool:
+        """Confident, outside the ambiguous band, and a high score agrees with the approval decision"""
+        low, high = self.ambiguous_band
+        min_confidence = self.local_min_confidence if tier == LOCAL_TIER else self.min_confidence
+        if validation.confidence < min_confidence or low <= validation.overall_score < high:
+            return False
+        # A high score that was still rejected (fraud indicators, a failed critical rule) needs a closer look
+        return validation.approved or validation.overall_score < low
+
+    def signature(self) -> str:
+        """Identifies the routing configuration, so cached evaluations from another setup aren't reused"""
+        if not self.enabled:
+            return self.full_model
+        low, high = self.ambiguous_band
+        return (f"{self.full_model}|fast={self.fast_model}|local={','.join(sorted(self.local_depths))}"
+                f"|conf>={self.min_confidence}/{self.local_min_confidence}|band={low}-{high}")
+
+    async def evaluate(self, depth: str, run_local: Callable[[], Awaitable[ClaimValidation]],
+                       run_model: Callable[[str], Awaitable[ClaimValidation]]) -> ClaimValidation:
+        tiers = self.tiers_for(depth)
+        for position, (tier, model) in enumerate(tiers):
+            metrics = self.metrics[tier]
+            metrics["attempts"] += 1
+            started = time.monotonic()
+            validation = await (run_local() if tier == LOCAL_TIER else run_model(model))
+            metrics["total_seconds"] += time.monotonic() - started
+
+            # The stage catches model errors and answers with the local rules instead
+            failed = tier != LOCAL_TIER and validation.evaluation_tier == LOCAL_TIER
+            if failed:
+                metrics["failed"] += 1
+            else:
+                validation.evaluation_tier = tier
+
+            if position == len(tiers) - 1:
+                if not failed:
+                    metrics["decided"] += 1
+                return validation
+            if not failed and self.is_decisive(validation, tier):
+                metrics["decided"] += 1
+                print(f"🎚️ {depth} decided by {tier} ({validation.overall_score:.1%}, "
+                      f"confidence {validation.confidence:.0%})")
+                return validation
+
+            metrics["escalated"] += 1
+            reason = "model call failed" if failed else (
+                f"score {validation.overall_score:.1%}, confidence {validation.confidence:.0%}")
+            print(f"⬆️ {depth}: escalating from {tier} to {tiers[position + 1][0]} ({reason})")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "fast_model": self.fast_model,
+            "full_model": self.full_model,
+            "min_confidence": self.min_confidence,
+            "local_min_confidence": self.local_min_confidence,
+            "ambiguous_band": list(self.ambiguous_band),
+            "local_depths": sorted(self.local_depths),
+            "tiers": {
+                tier: {**metrics, "avg_seconds": metrics["total_seconds"] / metrics["attempts"] if metrics["attempts"] else 0.0}
+                for tier, metrics in self.metrics.items()
+            }
+        }
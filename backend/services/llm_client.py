@@ -0,0 +1,287 @@
+import os
+import time
+import asyncio
+from types import SimpleNamespace
+from typing import Dict, Any, List, Optional, Callable, Awaitable
+import anthropic
+from services.structured_output import StreamingObjectParser, StructuredOutputError, validate_structured
+from services.llm_resilience import (
+    CircuitBreaker, CircuitOpenError, LatencyTracker, classify_error, retry_after_seconds, backoff_delay,
+    LLM_MAX_RETRIES, LLM_HEDGE_ENABLED, LLM_HEDGE_PERCENTILE, LLM_HEDGE_MIN_DELAY_SECONDS, LLM_HEDGE_MIN_SAMPLES,
+    BREAKER_CLOSED
+)
+
+# Process-wide cap on concurrent Claude requests, shared by the judge and document processing
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+LLM_REQUEST_TIMEOUT_SECONDS = float(os.getenv("LLM_REQUEST_TIMEOUT_SECONDS", "120"))
+
+class LLMClient:
+    """Async Claude client with a process-wide concurrency limit, per-call timeouts and failure handling
+
+    Calls are plain coroutines, so cancelling the awaiting task (client disconnect, loop exit)
+    aborts the in-flight HTTP request and releases its slot. A call's timeout bounds all of its
+    attempts: 429/5xx/connection errors are retried with jittered backoff while time is left, a slow
+    attempt can be hedged with a duplicate request, and a circuit breaker fails calls fast with
+    CircuitOpenError while the upstream is unhealthy so callers go straight to their local fallback.
+    """
+
+    def __init__(self, api_key: str, max_concurrency: int = LLM_MAX_CONCURRENCY,
+                 timeout_seconds: float = LLM_REQUEST_TIMEOUT_SECONDS, max_retries: int = LLM_MAX_RETRIES,
+                 hedge_enabled: bool = LLM_HEDGE_ENABLED):
+        # Retries are handled here (with the breaker and the call deadline), not by the SDK
+        self.client = anthropic.AsyncAnthropic(api_key=api_key, max_retries=0)
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.max_concurrency = max_concurrency
+        self.timeout_seconds = timeout_seconds
+        self.max_retries = max_retries
+        self.hedge_enabled = hedge_enabled
+        self.breaker = CircuitBreaker()
+        self.latency = LatencyTracker()
+
+        self.in_flight = 0
+        self.metrics = {
+            "requests": 0,
+            "succeeded": 0,
+            "failed": 0,
+            "timeouts": 0,
+            "cancelled": 0,
+            # HTTP requests sent, including retries and hedges
+            "attempts": 0,
+            "retries": 0,
+            "hedged_requests": 0,
+            "hedge_wins": 0,
+            "errors": {"rate_limited": 0, "server_error": 0, "connection_error": 0, "timeout": 0, "other": 0},
+            "max_in_flight": 0,
+            "total_seconds": 0.0,
+            "total_queue_seconds": 0.0,
+            # Prompt caching: cache_read tokens are billed at a fraction of uncached input tokens
+            "input_tokens_uncached": 0,
+            "input_tokens_cache_write": 0,
+            "input_tokens_cache_read": 0,
+            "output_tokens": 0,
+            # Forced tool-call replies: cut off by max_tokens / failing schema validation
+            "structured_requests": 0,
+            "structured_truncated": 0,
+            "structured_invalid": 0
+        }
+
+    async def create_message(self, timeout: Optional[float] = None, **kwargs):
+        """messages.create, waiting for a concurrency slot and giving up after the timeout"""
+        response = await self._call(lambda: self.client.messages.create(**kwargs), kwargs.get("model"), timeout)
+        self._record_usage(getattr(response, "usage", None))
+        return response
+
+    async def create_structured(self, tool: Dict[str, Any], tools: Optional[List[Dict[str, Any]]] = None,
+                                on_field: Optional[Callable[[str, Any], None]] = None,
+                                timeout: Optional[float] = None, **kwargs) -> Dict[str, Any]:
+        """Streamed messages.create forced to call `tool`; returns the validated tool input
+
+        `tools` is the full tool list to send (defaults to just `tool`) - callers that share a cached
+        prompt prefix send the same list every time and only change which tool is forced. Top-level
+        fields are parsed as they stream in and passed to `on_field(name, value)`. A reply cut off
+        by max_tokens is still accepted if every required field arrived.
+        """
+        request = {
+            **kwargs,
+            "tools": tools or [tool],
+            "tool_choice": {"type": "tool", "name": tool["name"]},
+            "stream": True
+        }
+
+        async def consume():
+            # Each attempt (retry or hedge) parses its own stream
+            parser = StreamingObjectParser()
+            usage = SimpleNamespace(input_tokens=0, cache_creation_input_tokens=0,
+                                    cache_read_input_tokens=0, output_tokens=0)
+            stop_reason = None
+            in_tool = False
+            stream = await self.client.messages.create(**request)
+            try:
+                async for event in stream:
+                    if event.type == "message_start":
+                        for name in vars(usage):
+                            setattr(usage, name, getattr(event.message.usage, name, 0) or 0)
+                    elif event.type == "content_block_start":
+                        block = event.content_block
+                        in_tool = block.type == "tool_use" and block.name == tool["name"]
+                    elif event.type == "content_block_delta" and in_tool and event.delta.type == "input_json_delta":
+                        for name, value in parser.feed(event.delta.partial_json):
+                            if on_field:
+                                on_field(name, value)
+                    elif event.type == "content_block_stop":
+                        in_tool = False
+                    elif event.type == "message_delta":
+                        stop_reason = event.delta.stop_reason
+                        usage.output_tokens = getattr(event.usage, "output_tokens", 0) or usage.output_tokens
+            finally:
+                # Closes the HTTP response if the caller times out or is cancelled mid-stream
+                await stream.close()
+            return usage, stop_reason, parser
+
+        self.metrics["structured_requests"] += 1
+        usage, stop_reason, parser = await self._call(consume, kwargs.get("model"), timeout)
+        self._record_usage(usage)
+
+        if not parser.complete:
+            self.metrics["structured_truncated"] += 1
+            print(f"✂️ Structured reply for {tool['name']} incomplete (stop_reason={stop_reason}), "
+                  f"salvaging {len(parser.fields)} parsed fields")
+        try:
+            return validate_structured(tool["input_schema"], parser.fields)
+        except StructuredOutputError:
+            self.metrics["structured_invalid"] += 1
+            raise
+
+    def available(self) -> bool:
+        """False while the circuit breaker is rejecting calls"""
+        return self.breaker.available()
+
+    async def _call(self, request: Callable[[], Awaitable[Any]], model: Optional[str], timeout: Optional[float]):
+        timeout = timeout or self.timeout_seconds
+        # Rejected calls are counted by the breaker, not as requests
+        self.breaker.before_call()
+        self.metrics["requests"] += 1
+        # The timeout covers every attempt and backoff, counted from the first time a slot is free
+        budget = {"timeout": timeout, "deadline": None}
+        attempt = 0
+
+        try:
+            while True:
+                try:
+                    result = await self._attempt(request, budget)
+                except (asyncio.CancelledError, CircuitOpenError):
+                    raise
+                except Exception as error:
+                    kind = classify_error(error)
+                    self.metrics["errors"][kind or "other"] += 1
+                    if kind is None:
+                        # A bad request says nothing about upstream health
+                        self.breaker.release_probe()
+                        self.metrics["failed"] += 1
+                        raise
+                    self.breaker.record_failure()
+
+                    remaining = budget["deadline"] - time.monotonic() if budget["deadline"] else timeout
+                    delay = max(backoff_delay(attempt), retry_after_seconds(error) or 0.0)
+                    if (kind == "timeout" or attempt >= self.max_retries or delay >= remaining
+                            or self.breaker.state != BREAKER_CLOSED):
+                        if kind == "timeout":
+                            self.metrics["timeouts"] += 1
+                            print(f"⏱️ Claude request timed out after {timeout:.0f}s ({model})")
+                        else:
+                            self.metrics["failed"] += 1
+                        raise
+
+                    attempt += 1
+                    self.metrics["retries"] += 1
+                    print(f"🔁 Claude {kind} ({model}), retry {attempt}/{self.max_retries} in {delay:.1f}s: {error}")
+                    await asyncio.sleep(delay)
+                    continue
+
+                self.breaker.record_success()
+                self.metrics["succeeded"] += 1
+                return result
+        except asyncio.CancelledError:
+            self.breaker.release_probe()
+            self.metrics["cancelled"] += 1
+            raise
+
+    async def _attempt(self, request: Callable[[], Awaitable[Any]], budget: Dict[str, Any]):
+        """One request, plus a hedged duplicate if it outlasts the latency percentile; first success wins"""
+        hedge_delay = self._hedge_delay()
+        if hedge_delay is None:
+            return await self._send(request, budget)
+
+        primary = asyncio.ensure_future(self._send(request, budget))
+        pending = {primary}
+        try:
+            done, pending = await asyncio.wait(pending, timeout=hedge_delay)
+            if not done and self.breaker.state == BREAKER_CLOSED:
+                self.metrics["hedged_requests"] += 1
+                print(f"🪁 Claude request slower than p{LLM_HEDGE_PERCENTILE * 100:.0f} ({hedge_delay:.1f}s) - hedging")
+                pending.add(asyncio.ensure_future(self._send(request, budget)))
+
+            error = None
+            while True:
+                for task in done:
+                    if task.exception() is None:
+                        if task is not primary:
+                            self.metrics["hedge_wins"] += 1
+                        return task.result()
+                    error = error or task.exception()
+                if not pending:
+                    raise error
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            # The losing request is cancelled, which closes its HTTP stream
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+    def _hedge_delay(self) -> Optional[float]:
+        if not self.hedge_enabled or len(self.latency.samples) < LLM_HEDGE_MIN_SAMPLES:
+            return None
+        return max(LLM_HEDGE_MIN_DELAY_SECONDS, self.latency.percentile(LLM_HEDGE_PERCENTILE))
+
+    async def _send(self, request: Callable[[], Awaitable[Any]], budget: Dict[str, Any]):
+        queued_at = time.monotonic()
+        async with self.semaphore:
+            started = time.monotonic()
+            if budget["deadline"] is None:
+                budget["deadline"] = started + budget["timeout"]
+            self.metrics["total_queue_seconds"] += started - queued_at
+            self.metrics["attempts"] += 1
+            self.in_flight += 1
+            self.metrics["max_in_flight"] = max(self.metrics["max_in_flight"], self.in_flight)
+            try:
+                result = await asyncio.wait_for(request(), timeout=max(0.0, budget["deadline"] - started))
+            finally:
+                self.in_flight -= 1
+                self.metrics["total_seconds"] += time.monotonic() - started
+        self.latency.record(time.monotonic() - started)
+        return result
+
+    def _record_usage(self, usage):
+        if usage is None:
+            return
+        uncached = getattr(usage, "input_tokens", 0) or 0
+        cache_write = getattr(usage, "cache_creation_input_tokens", 0) or 0
+        cache_read = getattr(usage, "cache_read_input_tokens", 0) or 0
+        self.metrics["input_tokens_uncached"] += uncached
+        self.metrics["input_tokens_cache_write"] += cache_write
+        self.metrics["input_tokens_cache_read"] += cache_read
+        self.metrics["output_tokens"] += getattr(usage, "output_tokens", 0) or 0
+        if cache_read or cache_write:
+            print(f"🧾 Prompt cache: {cache_read} read / {cache_write} written / {uncached} uncached input tokens")
+
+    def stats(self) -> Dict[str, Any]:
+        attempts = self.metrics["attempts"]
+        return {
+            **self.metrics,
+            "in_flight": self.in_flight,
+            "max_concurrency": self.max_concurrency,
+            "avg_seconds": self.metrics["total_seconds"] / attempts if attempts else 0.0,
+            "avg_queue_seconds": self.metrics["total_queue_seconds"] / attempts if attempts else 0.0,
+            "latency": self.latency.stats(),
+            "circuit_breaker": self.breaker.stats(),
+            "hedging": {"enabled": self.hedge_enabled, "delay_seconds": self._hedge_delay()},
+            "prompt_cache_hit_rate": self._prompt_cache_hit_rate()
+        }
+
+    def _prompt_cache_hit_rate(self) -> float:
+        """Share of all input tokens that were served from the prompt cache"""
+        total = (self.metrics["input_tokens_uncached"] + self.metrics["input_tokens_cache_write"]
+                 + self.metrics["input_tokens_cache_read"])
+        return self.metrics["input_tokens_cache_read"] / total if total else 0.0
+
+_shared_client: Optional[LLMClient] = None
+
+def get_llm_client() -> Optional[LLMClient]:
+    """The process-wide LLMClient, or None when CLAUDE_API_KEY isn't configured"""
+    global _shared_client
+    if _shared_client is None:
+        api_key = os.getenv("CLAUDE_API_KEY")
+        if api_key:
+            _shared_client = LLMClient(api_key)
+    return _shared_client
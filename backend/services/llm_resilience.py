@@ -0,0 +1,158 @@
+import os
+import time
+import random
+import asyncio
+from collections import deque
+from typing import Dict, Any, Optional
+import anthropic
+
+# Transient upstream errors (429, 5xx/529 overloaded, dropped connections) are retried with
+# jittered exponential backoff, all within the call's overall timeout
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+LLM_RETRY_BASE_DELAY_SECONDS = float(os.getenv("LLM_RETRY_BASE_DELAY_SECONDS", "0.5"))
+LLM_RETRY_MAX_DELAY_SECONDS = float(os.getenv("LLM_RETRY_MAX_DELAY_SECONDS", "8"))
+# Hedging sends a duplicate request when the first is slower than the observed latency percentile.
+# It trades extra tokens for tail latency, so it is off unless enabled.
+LLM_HEDGE_ENABLED = os.getenv("LLM_HEDGE_ENABLED", "false").lower() == "true"
+LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "0.95"))
+LLM_HEDGE_MIN_DELAY_SECONDS = float(os.getenv("LLM_HEDGE_MIN_DELAY_SECONDS", "2"))
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+# The breaker opens after this many consecutive upstream failures and lets one probe through after the cooldown
+LLM_BREAKER_FAILURE_THRESHOLD = int(os.getenv("LLM_BREAKER_FAILURE_THRESHOLD", "5"))
+LLM_BREAKER_RESET_SECONDS = float(os.getenv("LLM_BREAKER_RESET_SECONDS", "30"))
+
+LATENCY_WINDOW = 500
+RETRYABLE_STATUS_CODES = {408, 409, 429}
+
+BREAKER_CLOSED = "closed"
+BREAKER_OPEN = "open"
+BREAKER_HALF_OPEN = "half_open"
+
+class CircuitOpenError(RuntimeError):
+    """Claude calls are suspended because the upstream has been failing"""
+
+def classify_error(error: BaseException) -> Optional[str]:
+    """Metric bucket for an upstream failure, or None for errors retrying won't fix (bad request, auth)"""
+    if isinstance(error, asyncio.TimeoutError):
+        return "timeout"
+    if isinstance(error, anthropic.APIConnectionError):
+        return "connection_error"
+    if isinstance(error, anthropic.APIStatusError):
+        if error.status_code == 429:
+            return "rate_limited"
+        if error.status_code >= 500 or error.status_code in RETRYABLE_STATUS_CODES:
+            return "server_error"
+    return None
+
+def retry_after_seconds(error: BaseException) -> Optional[float]:
+    """The server's Retry-After hint from a 429/529 response, if it sent one"""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except ValueError:
+        return None
+    return None
+
+def backoff_delay(attempt: int, base: float = LLM_RETRY_BASE_DELAY_SECONDS,
+                  cap: float = LLM_RETRY_MAX_DELAY_SECONDS) -> float:
+    """Full-jitter exponential backoff: uniform in [0, min(cap, base * 2^attempt)]"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+class LatencyTracker:
+    """Rolling window of successful request latencies"""
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self.samples = deque(maxlen=window)
+
+    def record(self, seconds: float):
+        self.samples.append(seconds)
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "samples": len(self.samples),
+            "p50_seconds": self.percentile(0.5),
+            "p95_seconds": self.percentile(0.95),
+            "p99_seconds": self.percentile(0.99)
+        }
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker for the Claude upstream
+
+    Closed: calls go through. Open: calls are rejected immediately with CircuitOpenError until
+    `reset_seconds` have passed. Half-open: a single probe call is let through - its success closes
+    the breaker, its failure opens it again.
+    """
+
+    def __init__(self, failure_threshold: int = LLM_BREAKER_FAILURE_THRESHOLD,
+                 reset_seconds: float = LLM_BREAKER_RESET_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = BREAKER_CLOSED
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self.probe_in_flight = False
+        self.metrics = {"opened": 0, "rejected": 0, "probes": 0}
+
+    def available(self) -> bool:
+        """Whether a call would be let through right now (without claiming the half-open probe)"""
+        if self.state == BREAKER_OPEN:
+            return time.monotonic() - self.opened_at >= self.reset_seconds
+        return not (self.state == BREAKER_HALF_OPEN and self.probe_in_flight)
+
+    def before_call(self):
+        if self.state == BREAKER_OPEN and time.monotonic() - self.opened_at >= self.reset_seconds:
+            self.state = BREAKER_HALF_OPEN
+            self.probe_in_flight = False
+            print("🔌 Claude circuit breaker half-open - sending a probe request")
+        if self.state == BREAKER_OPEN or (self.state == BREAKER_HALF_OPEN and self.probe_in_flight):
+            self.metrics["rejected"] += 1
+            retry_in = max(0.0, self.reset_seconds - (time.monotonic() - self.opened_at))
+            raise CircuitOpenError(f"Claude circuit breaker is open ({self.consecutive_failures} consecutive "
+                                   f"failures), retrying in {retry_in:.0f}s")
+        if self.state == BREAKER_HALF_OPEN:
+            self.probe_in_flight = True
+            self.metrics["probes"] += 1
+
+    def record_success(self):
+        if self.state != BREAKER_CLOSED:
+            print("🔌 Claude circuit breaker closed - upstream recovered")
+        self.state = BREAKER_CLOSED
+        self.consecutive_failures = 0
+        self.probe_in_flight = False
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        if self.state == BREAKER_HALF_OPEN or (self.state == BREAKER_CLOSED
+                                               and self.consecutive_failures >= self.failure_threshold):
+            self.state = BREAKER_OPEN
+            self.opened_at = time.monotonic()
+            self.probe_in_flight = False
+            self.metrics["opened"] += 1
+            print(f"🔌 Claude circuit breaker opened after {self.consecutive_failures} consecutive failures - "
+                  f"using local fallbacks for {self.reset_seconds:.0f}s")
+
+    def release_probe(self):
+        """The half-open probe ended without telling us anything about the upstream (cancelled, bad request)"""
+        if self.state == BREAKER_HALF_OPEN:
+            self.probe_in_flight = False
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "failure_threshold": self.failure_threshold,
+            "reset_seconds": self.reset_seconds,
+            **self.metrics
+        }
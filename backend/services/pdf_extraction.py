@@ -0,0 +1,228 @@
+import os
+import math
+import time
+import asyncio
+from contextlib import aclosing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple, AsyncIterator
+from pydantic import BaseModel
+import PyPDF2
+
+PDF_EXTRACTION_WORKERS = int(os.getenv("PDF_EXTRACTION_WORKERS", str(min(4, os.cpu_count() or 1))))
+PDF_PAGES_PER_TASK = int(os.getenv("PDF_PAGES_PER_TASK", "20"))
+PDF_EXTRACTION_TIME_BUDGET_SECONDS = float(os.getenv("PDF_EXTRACTION_TIME_BUDGET_SECONDS", "30"))
+
+def _count_pages(file_path: str) -> int:
+    """Runs in a worker process"""
+    return len(PyPDF2.PdfReader(file_path).pages)
+
+def _extract_page_range(file_path: str, start: int, end: int) -> List[str]:
+    """Runs in a worker process - extracts text for pages [start, end)"""
+    reader = PyPDF2.PdfReader(file_path)
+    texts = []
+    for page_num in range(start, min(end, len(reader.pages))):
+        try:
+            texts.append(reader.pages[page_num].extract_text() or "")
+        except Exception as e:
+            print(f"⚠️ Failed to extract page {page_num + 1} of {file_path}: {e}")
+            texts.append("")
+    return texts
+
+class PdfTextResult(BaseModel):
+    text: str
+    page_count: int
+    pages_extracted: int
+    truncated: bool = False  # True when the time budget ran out before every page was extracted
+    stopped_early: bool = False  # True when the character budget was met before the last page
+    selection: str = "first"
+    elapsed_seconds: float
+
+class PdfTextExtractor:
+    """Extracts PDF text in a process pool, splitting large documents into page ranges"""
+
+    def __init__(self, max_workers: int = PDF_EXTRACTION_WORKERS, pages_per_task: int = PDF_PAGES_PER_TASK,
+                 time_budget_seconds: float = PDF_EXTRACTION_TIME_BUDGET_SECONDS):
+        self.max_workers = max_workers
+        self.pages_per_task = pages_per_task
+        self.time_budget_seconds = time_budget_seconds
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+        self.metrics = {
+            "documents": 0,
+            "pages_extracted": 0,
+            "pages_skipped": 0,
+            "tasks_submitted": 0,
+            "budget_exceeded": 0,
+            "stopped_early": 0,
+            "failures": 0,
+            "total_seconds": 0.0,
+            "max_seconds": 0.0
+        }
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        # Created on first use so importing the module doesn't fork worker processes
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    async def page_count(self, file_path: str, timeout: Optional[float] = None) -> int:
+        loop = asyncio.get_running_loop()
+        self.metrics["tasks_submitted"] += 1
+        return await asyncio.wait_for(loop.run_in_executor(self.executor, _count_pages, file_path), timeout=timeout)
+
+    async def iter_pages(self, file_path: str, page_count: int, deadline: float,
+                         char_budget: Optional[int] = None) -> AsyncIterator[Tuple[int, str]]:
+        """Yield (page_number, text) in page order from page ranges extracted in the pool
+
+        Without a char_budget the pages are spread over the workers in ranges of at most pages_per_task.
+        With one, only the first page is extracted up front; after that the pages in flight are sized
+        from the average characters per page read so far, so meeting the budget leaves little running.
+        Cancelling only drops ranges still queued - a range a worker has already started runs to the end.
+        """
+        loop = asyncio.get_running_loop()
+        in_flight: List[Tuple[int, asyncio.Future]] = []
+        next_page = 0
+        pages_read = 0
+        collected_chars = 0
+
+        try:
+            while next_page < page_count or in_flight:
+                if char_budget is None:
+                    pages_wanted = page_count
+                elif pages_read == 0:
+                    pages_wanted = 1
+                else:
+                    chars_per_page = collected_chars / pages_read  # at least 1 - every page adds a newline
+                    pages_wanted = math.ceil(max(0, char_budget - collected_chars) / chars_per_page)
+
+                while next_page < page_count and len(in_flight) < self.max_workers:
+                    shortfall = pages_wanted - (next_page - pages_read)
+                    if shortfall <= 0 and in_flight:
+                        break
+                    # Spread the missing pages over the free workers
+                    range_size = min(self.pages_per_task,
+                                     max(1, math.ceil(shortfall / (self.max_workers - len(in_flight)))))
+                    end = min(next_page + range_size, page_count)
+                    future = asyncio.ensure_future(
+                        loop.run_in_executor(self.executor, _extract_page_range, file_path, next_page, end)
+                    )
+                    in_flight.append((next_page, future))
+                    self.metrics["tasks_submitted"] += 1
+                    next_page = end
+
+                start, future = in_flight.pop(0)
+                texts = await asyncio.wait_for(future, timeout=max(0.0, deadline - time.monotonic()))
+                for offset, text in enumerate(texts):
+                    pages_read += 1
+                    collected_chars += len(text) + 1
+                    yield start + offset, text
+        finally:
+            for _, future in in_flight:
+                future.cancel()
+
+    async def extract_text(self, file_path: str, time_budget_seconds: Optional[float] = None,
+                           char_budget: Optional[int] = None, selection: str = "first",
+                           keywords: Optional[List[str]] = None) -> PdfTextResult:
+        """Extract page text in order, returning whatever finished within the time budget
+        
+        With a char_budget, "first" stops pulling pages once the budget is met, while "keyword"
+        extracts every page and keeps the pages with the highest keyword density (in page order).
+        """
+        budget = time_budget_seconds or self.time_budget_seconds
+        started = time.monotonic()
+        deadline = started + budget
+        use_keywords = selection == "keyword" and char_budget is not None and bool(keywords)
+
+        pages: List[Tuple[int, str]] = []
+        stopped_early = False
+        try:
+            page_count = await self.page_count(file_path, timeout=budget)
+            collected_chars = 0
+
+            try:
+                stops_early = char_budget is not None and not use_keywords
+                page_iter = self.iter_pages(file_path, page_count, deadline, char_budget if stops_early else None)
+                # aclosing cancels the queued ranges as soon as the budget is met, not when the generator is collected
+                async with aclosing(page_iter):
+                    async for page_num, text in page_iter:
+                        pages.append((page_num, text))
+                        collected_chars += len(text) + 1
+                        if stops_early and collected_chars >= char_budget:
+                            stopped_early = page_num + 1 < page_count
+                            break
+            except asyncio.TimeoutError:
+                pass  # keep the pages that finished within the time budget
+        except Exception:
+            self.metrics["failures"] += 1
+            raise
+
+        pages_extracted = len(pages)
+        truncated = not stopped_early and pages_extracted < page_count
+
+        if use_keywords:
+            pages = self._select_pages_by_keywords(pages, char_budget, keywords)
+
+        elapsed = time.monotonic() - started
+        self._record(pages_extracted, page_count, elapsed, truncated, stopped_early)
+
+        if truncated:
+            print(f"⏱️ PDF extraction budget ({budget:.1f}s) exceeded: {pages_extracted}/{page_count} pages extracted")
+
+        page_texts = [text for _, text in pages]
+        return PdfTextResult(
+            text="\n".join(page_texts) + ("\n" if page_texts else ""),
+            page_count=page_count,
+            pages_extracted=pages_extracted,
+            truncated=truncated,
+            stopped_early=stopped_early,
+            selection="keyword" if use_keywords else "first",
+            elapsed_seconds=round(elapsed, 3)
+        )
+
+    def _select_pages_by_keywords(self, pages: List[Tuple[int, str]], char_budget: int,
+                                  keywords: List[str]) -> List[Tuple[int, str]]:
+        """Keep the densest pages that fit the character budget, then restore page order"""
+        keywords = [k.lower() for k in keywords]
+
+        def density(text: str) -> float:
+            lowered = text.lower()
+            hits = sum(lowered.count(keyword) for keyword in keywords)
+            return hits / (len(text) + 1)
+
+        ranked = sorted(pages, key=lambda page: density(page[1]), reverse=True)
+        selected = []
+        used = 0
+        for page_num, text in ranked:
+            if used >= char_budget:
+                break
+            selected.append((page_num, text))
+            used += len(text) + 1
+
+        return sorted(selected)
+
+    def _record(self, pages: int, page_count: int, elapsed: float, truncated: bool, stopped_early: bool):
+        self.metrics["documents"] += 1
+        self.metrics["pages_extracted"] += pages
+        self.metrics["pages_skipped"] += page_count - pages
+        if stopped_early:
+            self.metrics["stopped_early"] += 1
+        self.metrics["total_seconds"] += elapsed
+        self.metrics["max_seconds"] = max(self.metrics["max_seconds"], elapsed)
+        if truncated:
+            self.metrics["budget_exceeded"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        documents = self.metrics["documents"]
+        return {
+            **self.metrics,
+            "avg_seconds": self.metrics["total_seconds"] / documents if documents else 0.0,
+            "workers": self.max_workers,
+            "pages_per_task": self.pages_per_task,
+            "time_budget_seconds": self.time_budget_seconds
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
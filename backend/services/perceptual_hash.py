@@ -0,0 +1,178 @@
+import os
+import asyncio
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple, Union
+import numpy as np
+from PIL import Image, ImageOps
+
+# Maximum Hamming distance (out of 64 bits) for two photos to count as near-duplicates
+DHASH_THRESHOLD = int(os.getenv("PHOTO_DHASH_THRESHOLD", "12"))
+PHASH_THRESHOLD = int(os.getenv("PHOTO_PHASH_THRESHOLD", "12"))
+PHOTO_INDEX_MAX_ENTRIES = int(os.getenv("PHOTO_INDEX_MAX_ENTRIES", "10000"))
+
+def _dct_matrix(n: int) -> np.ndarray:
+    k = np.arange(n)
+    matrix = np.cos(np.pi * (2 * k[None, :] + 1) * k[:, None] / (2 * n))
+    matrix[0] *= 1 / np.sqrt(2)
+    return matrix * np.sqrt(2 / n)
+
+_DCT_32 = _dct_matrix(32)
+
+def _bits_to_hex(bits: np.ndarray) -> str:
+    value = 0
+    for bit in bits.flatten():
+        value = (value << 1) | int(bit)
+    return f"{value:016x}"
+
+def dhash(image: Image.Image, hash_size: int = 8) -> str:
+    """Difference hash - compares horizontally adjacent pixels of a (hash_size+1) x hash_size thumbnail"""
+    pixels = np.asarray(image.convert("L").resize((hash_size + 1, hash_size), Image.LANCZOS), dtype=np.float32)
+    return _bits_to_hex(pixels[:, 1:] > pixels[:, :-1])
+
+def phash(image: Image.Image) -> str:
+    """Perceptual hash - sign of the low-frequency 8x8 DCT coefficients against their median"""
+    pixels = np.asarray(image.convert("L").resize((32, 32), Image.LANCZOS), dtype=np.float64)
+    dct = _DCT_32 @ pixels @ _DCT_32.T
+    low = dct[:8, :8]
+    median = np.median(low.flatten()[1:])  # skip the DC term, it only reflects overall brightness
+    return _bits_to_hex(low > median)
+
+def compute_image_hashes(source: Union[str, Image.Image]) -> Dict[str, str]:
+    """dHash and pHash of an image path or PIL image (CPU-bound, run in a thread)"""
+    if isinstance(source, Image.Image):
+        image = ImageOps.exif_transpose(source)
+        return {"dhash": dhash(image), "phash": phash(image)}
+
+    with Image.open(source) as image:
+        image = ImageOps.exif_transpose(image)
+        return {"dhash": dhash(image), "phash": phash(image)}
+
+def hamming_distance(hex_a: str, hex_b: str) -> int:
+    return (int(hex_a, 16) ^ int(hex_b, 16)).bit_count()
+
+def hash_distance(hashes_a: Dict[str, str], hashes_b: Dict[str, str]) -> Optional[Tuple[int, int]]:
+    """(dhash distance, phash distance), or None if either side is missing a hash"""
+    try:
+        return (hamming_distance(hashes_a["dhash"], hashes_b["dhash"]),
+                hamming_distance(hashes_a["phash"], hashes_b["phash"]))
+    except (KeyError, TypeError, ValueError):
+        return None
+
+def is_near_duplicate(hashes_a: Dict[str, str], hashes_b: Dict[str, str]) -> bool:
+    distance = hash_distance(hashes_a, hashes_b)
+    return distance is not None and distance[0] <= DHASH_THRESHOLD and distance[1] <= PHASH_THRESHOLD
+
+def find_near_duplicate_groups(photo_hashes: List[Tuple[str, Dict[str, str]]]) -> Dict[str, str]:
+    """Map each near-duplicate photo ID to the ID of the first photo it duplicates"""
+    duplicates: Dict[str, str] = {}
+    originals: List[Tuple[str, Dict[str, str]]] = []
+
+    for photo_id, hashes in photo_hashes:
+        original = next((original_id for original_id, original_hashes in originals
+                         if is_near_duplicate(hashes, original_hashes)), None)
+        if original is not None:
+            duplicates[photo_id] = original
+        else:
+            originals.append((photo_id, hashes))
+
+    return duplicates
+
+class PhotoIndexEntry:
+    def __init__(self, hashes: Dict[str, str], content_hash: str, filename: str):
+        self.hashes = hashes
+        self.content_hash = content_hash
+        self.filename = filename
+        # Resolves to the analysis result once the vision call for this photo finishes
+        self.analysis: asyncio.Future = asyncio.get_running_loop().create_future()
+
+_POPCOUNT_8 = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+def _popcount(values: np.ndarray) -> np.ndarray:
+    """Set bits per uint64 element"""
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(values)
+    return _POPCOUNT_8[values.view(np.uint8)].reshape(-1, 8).sum(axis=1)
+
+class PerceptualHashIndex:
+    """In-memory index of analysed photos so near-duplicates can reuse the original's analysis
+
+    Hashes are kept in fixed-size uint64 arrays so a lookup is one vectorised XOR/popcount pass
+    instead of a Python loop over every indexed photo.
+    """
+
+    def __init__(self, max_entries: int = PHOTO_INDEX_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[int, PhotoIndexEntry]]" = OrderedDict()  # content_hash -> (slot, entry)
+        self._dhashes = np.zeros(max_entries, dtype=np.uint64)
+        self._phashes = np.zeros(max_entries, dtype=np.uint64)
+        self._occupied = np.zeros(max_entries, dtype=bool)
+        self._slots: List[Optional[PhotoIndexEntry]] = [None] * max_entries
+        self._free_slots = list(range(max_entries - 1, -1, -1))
+        self.lookups = 0
+        self.matches = 0
+
+    def find(self, hashes: Dict[str, str]) -> Optional[Tuple[PhotoIndexEntry, int]]:
+        """Closest near-duplicate entry and its dHash distance, including photos still being analysed"""
+        self.lookups += 1
+        if not self._entries:
+            return None
+        try:
+            dhash_value, phash_value = np.uint64(int(hashes["dhash"], 16)), np.uint64(int(hashes["phash"], 16))
+        except (KeyError, TypeError, ValueError):
+            return None
+
+        dhash_distances = _popcount(self._dhashes ^ dhash_value)
+        phash_distances = _popcount(self._phashes ^ phash_value)
+        candidates = np.flatnonzero(self._occupied & (dhash_distances <= DHASH_THRESHOLD)
+                                    & (phash_distances <= PHASH_THRESHOLD))
+        if candidates.size == 0:
+            return None
+
+        slot = candidates[np.argmin(dhash_distances[candidates])]
+        entry = self._slots[slot]
+        self.matches += 1
+        self._entries.move_to_end(entry.content_hash)
+        return entry, int(dhash_distances[slot])
+
+    def reserve(self, hashes: Dict[str, str], content_hash: str, filename: str) -> PhotoIndexEntry:
+        """Register a photo before its analysis starts so concurrent duplicates wait for it"""
+        entry = PhotoIndexEntry(hashes, content_hash, filename)
+        if self.max_entries <= 0:
+            return entry
+        if content_hash in self._entries:
+            self._release(content_hash)
+        while len(self._entries) >= self.max_entries:
+            self._release(next(iter(self._entries)))
+
+        slot = self._free_slots.pop()
+        self._dhashes[slot] = int(hashes["dhash"], 16)
+        self._phashes[slot] = int(hashes["phash"], 16)
+        self._occupied[slot] = True
+        self._slots[slot] = entry
+        self._entries[content_hash] = (slot, entry)
+        return entry
+
+    def complete(self, entry: PhotoIndexEntry, extracted_data: Dict[str, Any]):
+        if not entry.analysis.done():
+            entry.analysis.set_result(extracted_data)
+
+    def discard(self, entry: PhotoIndexEntry):
+        """Drop an entry whose analysis failed so later uploads are analysed themselves"""
+        indexed = self._entries.get(entry.content_hash)
+        if indexed is not None and indexed[1] is entry:
+            self._release(entry.content_hash)
+        if not entry.analysis.done():
+            entry.analysis.set_result(None)
+
+    def _release(self, content_hash: str):
+        slot, _ = self._entries.pop(content_hash)
+        self._occupied[slot] = False
+        self._slots[slot] = None
+        self._free_slots.append(slot)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "lookups": self.lookups,
+            "near_duplicate_matches": self.matches
+        }
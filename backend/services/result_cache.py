@@ -0,0 +1,146 @@
+import json
+from typing import Dict, Any, Optional, Tuple
+from datetime import datetime, timedelta
+from sqlalchemy import func
+from database import CacheEntry, SessionLocal
+
+# Keys per DELETE ... IN (...) statement, below SQLite's bound-parameter limit
+EVICTION_BATCH_SIZE = 500
+
+class ResultCache:
+    """Persistent key/value cache stored in the claims database, with size- and age-based eviction"""
+
+    def __init__(self, namespace: str, max_entries: int = 5000, max_bytes: int = 200 * 1024 * 1024,
+                 max_age_seconds: int = 30 * 24 * 3600):
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_age = timedelta(seconds=max_age_seconds)
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached value for key, or None if missing or expired"""
+        cached = self.get_entry(key)
+        return cached[0] if cached else None
+
+    def get_entry(self, key: str) -> Optional[Tuple[Dict[str, Any], float]]:
+        """Return (value, age in seconds) for key, or None if missing or expired"""
+        db = SessionLocal()
+        try:
+            entry = db.query(CacheEntry).filter(
+                CacheEntry.namespace == self.namespace,
+                CacheEntry.cache_key == key
+            ).first()
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            if datetime.utcnow() - entry.created_at > self.max_age:
+                db.delete(entry)
+                db.commit()
+                self.evictions += 1
+                self.misses += 1
+                return None
+
+            now = datetime.utcnow()
+            entry.last_accessed_at = now
+            entry.hit_count = (entry.hit_count or 0) + 1
+            value = entry.value
+            age_seconds = (now - entry.created_at).total_seconds()
+            db.commit()
+            self.hits += 1
+            return value, age_seconds
+        except Exception as e:
+            print(f"⚠️ Cache read failed ({self.namespace}): {e}")
+            db.rollback()
+            self.misses += 1
+            return None
+        finally:
+            db.close()
+
+    def set(self, key: str, value: Dict[str, Any]):
+        """Store value under key and evict old or excess entries"""
+        db = SessionLocal()
+        try:
+            now = datetime.utcnow()
+            size_bytes = len(json.dumps(value, default=str))
+            entry = db.query(CacheEntry).filter(
+                CacheEntry.namespace == self.namespace,
+                CacheEntry.cache_key == key
+            ).first()
+
+            if entry is None:
+                entry = CacheEntry(namespace=self.namespace, cache_key=key, hit_count=0)
+                db.add(entry)
+
+            entry.value = value
+            entry.size_bytes = size_bytes
+            entry.created_at = now
+            entry.last_accessed_at = now
+            db.commit()
+            self.writes += 1
+
+            self._evict(db)
+        except Exception as e:
+            print(f"⚠️ Cache write failed ({self.namespace}): {e}")
+            db.rollback()
+        finally:
+            db.close()
+
+    def _evict(self, db):
+        """Drop expired entries, then least-recently-used entries until under the size limits"""
+        query = db.query(CacheEntry).filter(CacheEntry.namespace == self.namespace)
+
+        expired = query.filter(CacheEntry.created_at < datetime.utcnow() - self.max_age).delete(synchronize_session=False)
+        self.evictions += expired
+
+        count, total_bytes = db.query(func.count(CacheEntry.cache_key), func.coalesce(func.sum(CacheEntry.size_bytes), 0)).filter(
+            CacheEntry.namespace == self.namespace
+        ).one()
+
+        if count > self.max_entries or total_bytes > self.max_bytes:
+            # Walk keys and sizes only (not the value blobs) in LRU order, then delete the victims in bulk
+            lru = db.query(CacheEntry.cache_key, CacheEntry.size_bytes).filter(
+                CacheEntry.namespace == self.namespace
+            ).order_by(CacheEntry.last_accessed_at.asc()).yield_per(EVICTION_BATCH_SIZE)
+
+            victims = []
+            for cache_key, size_bytes in lru:
+                if count <= self.max_entries and total_bytes <= self.max_bytes:
+                    break
+                count -= 1
+                total_bytes -= size_bytes or 0
+                victims.append(cache_key)
+
+            for start in range(0, len(victims), EVICTION_BATCH_SIZE):
+                self.evictions += query.filter(
+                    CacheEntry.cache_key.in_(victims[start:start + EVICTION_BATCH_SIZE])
+                ).delete(synchronize_session=False)
+
+        db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for this process plus current persistent size"""
+        db = SessionLocal()
+        try:
+            count, total_bytes = db.query(func.count(CacheEntry.cache_key), func.coalesce(func.sum(CacheEntry.size_bytes), 0)).filter(
+                CacheEntry.namespace == self.namespace
+            ).one()
+        finally:
+            db.close()
+
+        lookups = self.hits + self.misses
+        return {
+            "namespace": self.namespace,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "writes": self.writes,
+            "evictions": self.evictions,
+            "entries": count,
+            "size_bytes": int(total_bytes)
+        }
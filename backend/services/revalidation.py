@@ -0,0 +1,375 @@
+import os
+import time
+import uuid
+import asyncio
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+from sqlalchemy import String, cast
+from models.claim import ClaimPacket, ClaimValidation
+from database import ClaimRecord, RevalidationJob, SessionLocal
+from services.bulk_scoring import claim_packet_from_record
+from services.batch_evaluation import BatchJudgeEvaluator
+from services.judge_router import LOCAL_TIER
+
+# Defaults for bulk re-validation jobs - each job can override them when it's created
+REVALIDATION_CHUNK_SIZE = int(os.getenv("REVALIDATION_CHUNK_SIZE", "50"))
+REVALIDATION_CONCURRENCY = int(os.getenv("REVALIDATION_CONCURRENCY", "4"))
+# Judge calls per minute across the job's workers (0 = unlimited); leaves headroom for live traffic
+REVALIDATION_REQUESTS_PER_MINUTE = float(os.getenv("REVALIDATION_REQUESTS_PER_MINUTE", "60"))
+REVALIDATION_RESUME_ON_STARTUP = os.getenv("REVALIDATION_RESUME_ON_STARTUP", "true").lower() == "true"
+MAX_RECORDED_FAILURES = 100
+FALLBACK_ERROR = "Claude unavailable - local rules fallback not written back"
+
+class RateLimiter:
+    """Spaces calls evenly so they never exceed rate_per_minute (0 = unlimited)"""
+
+    def __init__(self, rate_per_minute: float):
+        self.interval = 60.0 / rate_per_minute if rate_per_minute and rate_per_minute > 0 else 0.0
+        self._next_at = 0.0
+
+    async def acquire(self):
+        if not self.interval:
+            return
+        # Reserve the slot before sleeping so concurrent workers queue up behind each other
+        now = time.monotonic()
+        wait = self._next_at - now
+        self._next_at = max(now, self._next_at) + self.interval
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+class RevalidationJobManager:
+    """Background jobs that re-run the AI Judge over stored claims and write the results back
+
+    Claims are read in claim_id order, one chunk at a time. Each chunk is evaluated by a pool of
+    workers, then its results and the job's keyset checkpoint are committed in a single transaction,
+    so a job interrupted by a crash or restart resumes after the last written chunk.
+    """
+
+    def __init__(self, ai_judge):
+        self.ai_judge = ai_judge
+        # evaluation="batch" jobs submit each chunk as one message batch
+        self.batch_evaluator = BatchJudgeEvaluator(ai_judge)
+        self._tasks: Dict[str, asyncio.Task] = {}
+        # Throughput of the current run: job_id -> (monotonic start, claims done when it started)
+        self._runs: Dict[str, Tuple[float, int]] = {}
+
+    def create_job(self, evaluation: str = "llm", analysis_depth: int = 1, chunk_size: Optional[int] = None,
+                   concurrency: Optional[int] = None, requests_per_minute: Optional[float] = None,
+                   include_unvalidated: bool = False) -> Dict[str, Any]:
+        if evaluation not in ("llm", "local", "batch"):
+            raise ValueError("evaluation must be 'llm', 'local' or 'batch'")
+        if not 1 <= analysis_depth <= 4:
+            raise ValueError("analysis_depth must be between 1 and 4")
+        chunk_size = chunk_size or REVALIDATION_CHUNK_SIZE
+        concurrency = concurrency or REVALIDATION_CONCURRENCY
+        if chunk_size < 1 or concurrency < 1:
+            raise ValueError("chunk_size and concurrency must be positive")
+
+        db = SessionLocal()
+        try:
+            job = RevalidationJob(
+                job_id=f"reval_{uuid.uuid4().hex[:12]}",
+                status="pending",
+                evaluation=evaluation,
+                analysis_depth=analysis_depth,
+                chunk_size=chunk_size,
+                concurrency=concurrency,
+                requests_per_minute=REVALIDATION_REQUESTS_PER_MINUTE if requests_per_minute is None else requests_per_minute,
+                include_unvalidated=include_unvalidated,
+                constitution_version=self.ai_judge._constitution_version(),
+                failures={}
+            )
+            db.add(job)
+            db.commit()
+            job_id = job.job_id
+        finally:
+            db.close()
+
+        self.start(job_id)
+        return self.get(job_id)
+
+    def start(self, job_id: str) -> bool:
+        """Run (or continue) a job in the background; False if it's already running"""
+        task = self._tasks.get(job_id)
+        if task and not task.done():
+            return False
+        self._tasks[job_id] = asyncio.create_task(self._run(job_id))
+        return True
+
+    def pause(self, job_id: str) -> bool:
+        task = self._tasks.get(job_id)
+        if not task or task.done():
+            return False
+        # Set the status first - a cancelled run leaves it alone, so an interrupted job stays "running"
+        self._set_status(job_id, "paused")
+        task.cancel()
+        return True
+
+    def resume(self, job_id: str) -> bool:
+        job = self.get(job_id)
+        if job is None or job["status"] == "completed":
+            return False
+        if not self.start(job_id):
+            return False
+        self._set_status(job_id, "running")
+        return True
+
+    def resume_interrupted(self) -> List[str]:
+        """Restart jobs that were running when the process went down"""
+        db = SessionLocal()
+        try:
+            job_ids = [job.job_id for job in db.query(RevalidationJob).filter(RevalidationJob.status == "running")]
+        finally:
+            db.close()
+        for job_id in job_ids:
+            print(f"🔁 Resuming interrupted re-validation job {job_id}")
+            self.start(job_id)
+        return job_ids
+
+    async def shutdown(self):
+        """Stop running jobs without changing their status, so they resume on the next startup"""
+        tasks = [task for task in self._tasks.values() if not task.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        db = SessionLocal()
+        try:
+            job = db.query(RevalidationJob).filter(RevalidationJob.job_id == job_id).first()
+            return self._job_to_dict(job) if job else None
+        finally:
+            db.close()
+
+    def list_jobs(self, limit: int = 20) -> List[Dict[str, Any]]:
+        db = SessionLocal()
+        try:
+            jobs = db.query(RevalidationJob).order_by(RevalidationJob.created_at.desc()).limit(limit).all()
+            return [self._job_to_dict(job) for job in jobs]
+        finally:
+            db.close()
+
+    def _job_to_dict(self, job: RevalidationJob) -> Dict[str, Any]:
+        done = (job.processed or 0) + (job.failed or 0)
+        total = job.total_claims or 0
+        claims_per_second = None
+        eta_seconds = None
+        run = self._runs.get(job.job_id)
+        if run and job.status == "running":
+            elapsed = time.monotonic() - run[0]
+            if elapsed > 0 and done > run[1]:
+                claims_per_second = (done - run[1]) / elapsed
+                eta_seconds = max(total - done, 0) / claims_per_second
+
+        return {
+            "job_id": job.job_id,
+            "status": job.status,
+            "evaluation": job.evaluation,
+            "analysis_depth": job.analysis_depth,
+            "chunk_size": job.chunk_size,
+            "concurrency": job.concurrency,
+            "requests_per_minute": job.requests_per_minute,
+            "include_unvalidated": job.include_unvalidated,
+            "constitution_version": job.constitution_version,
+            "total_claims": total,
+            "processed": job.processed or 0,
+            "failed": job.failed or 0,
+            "progress": done / total if total else (1.0 if job.status == "completed" else 0.0),
+            "claims_per_second": round(claims_per_second, 2) if claims_per_second else None,
+            "eta_seconds": round(eta_seconds) if eta_seconds is not None else None,
+            "last_claim_id": job.last_claim_id,
+            "failures": job.failures or {},
+            "error": job.error,
+            "created_at": job.created_at.isoformat() if job.created_at else None,
+            "started_at": job.started_at.isoformat() if job.started_at else None,
+            "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+            "updated_at": job.updated_at.isoformat() if job.updated_at else None
+        }
+
+    def _set_status(self, job_id: str, status: str, error: Optional[str] = None):
+        db = SessionLocal()
+        try:
+            job = db.query(RevalidationJob).filter(RevalidationJob.job_id == job_id).first()
+            if job:
+                job.status = status
+                job.error = error
+                if status in ("completed", "failed"):
+                    job.finished_at = datetime.utcnow()
+                db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    async def _run(self, job_id: str):
+        try:
+            job = await asyncio.to_thread(self._start_run, job_id)
+            if job is None:
+                return
+            print(f"🔄 Re-validation job {job_id}: {job['total_claims'] - job['done']} claims to go "
+                  f"({job['evaluation']}, chunks of {job['chunk_size']}, {job['concurrency']} workers)")
+
+            limiter = RateLimiter(job["requests_per_minute"] if job["evaluation"] == "llm" else 0)
+            last_claim_id = job["last_claim_id"]
+            while True:
+                chunk = await asyncio.to_thread(self._fetch_chunk, last_claim_id, job["chunk_size"],
+                                                job["include_unvalidated"])
+                if not chunk:
+                    break
+                results = await self._evaluate_chunk(chunk, job, limiter)
+                last_claim_id = chunk[-1][0]
+                await asyncio.to_thread(self._write_chunk, job_id, results, last_claim_id)
+
+            await asyncio.to_thread(self._set_status, job_id, "completed")
+            print(f"✅ Re-validation job {job_id} completed")
+        except asyncio.CancelledError:
+            # Paused or shutting down - the checkpoint already covers every written chunk
+            raise
+        except Exception as e:
+            print(f"❌ Re-validation job {job_id} failed: {e}")
+            await asyncio.to_thread(self._set_status, job_id, "failed", str(e))
+        finally:
+            self._runs.pop(job_id, None)
+
+    def _start_run(self, job_id: str) -> Optional[Dict[str, Any]]:
+        db = SessionLocal()
+        try:
+            job = db.query(RevalidationJob).filter(RevalidationJob.job_id == job_id).first()
+            if job is None:
+                return None
+            remaining = self._claims_query(db, job.last_claim_id, job.include_unvalidated).count()
+            done = (job.processed or 0) + (job.failed or 0)
+            job.total_claims = done + remaining
+            job.status = "running"
+            job.error = None
+            job.started_at = job.started_at or datetime.utcnow()
+            db.commit()
+            self._runs[job_id] = (time.monotonic(), done)
+            return {
+                "evaluation": job.evaluation,
+                "analysis_depth": job.analysis_depth,
+                "chunk_size": job.chunk_size,
+                "concurrency": job.concurrency,
+                "requests_per_minute": job.requests_per_minute,
+                "include_unvalidated": job.include_unvalidated,
+                "last_claim_id": job.last_claim_id,
+                "total_claims": job.total_claims,
+                "done": done
+            }
+        finally:
+            db.close()
+
+    def _claims_query(self, db, after_claim_id: Optional[str], include_unvalidated: bool):
+        query = db.query(ClaimRecord)
+        if after_claim_id is not None:
+            query = query.filter(ClaimRecord.claim_id > after_claim_id)
+        if not include_unvalidated:
+            # A JSON column can hold SQL NULL or a JSON 'null' - neither is a validation
+            query = query.filter(ClaimRecord.validation_result.isnot(None),
+                                 cast(ClaimRecord.validation_result, String) != "null")
+        return query
+
+    def _fetch_chunk(self, after_claim_id: Optional[str], chunk_size: int,
+                     include_unvalidated: bool) -> List[Tuple[str, Optional[ClaimPacket], Optional[str]]]:
+        """Next chunk after the keyset checkpoint as (claim_id, packet, error) - no OFFSET scans"""
+        db = SessionLocal()
+        try:
+            records = (self._claims_query(db, after_claim_id, include_unvalidated)
+                       .order_by(ClaimRecord.claim_id).limit(chunk_size).all())
+            chunk = []
+            for record in records:
+                try:
+                    chunk.append((record.claim_id, claim_packet_from_record(record), None))
+                except Exception as e:
+                    chunk.append((record.claim_id, None, f"Invalid stored claim: {e}"))
+            return chunk
+        finally:
+            db.close()
+
+    async def _evaluate_chunk(self, chunk: List[Tuple[str, Optional[ClaimPacket], Optional[str]]],
+                              job: Dict[str, Any], limiter: RateLimiter
+                              ) -> List[Tuple[str, Optional[ClaimValidation], Optional[str]]]:
+        results = [(claim_id, None, error) for claim_id, claim_packet, error in chunk if claim_packet is None]
+        claim_packets = [claim_packet for _, claim_packet, _ in chunk if claim_packet is not None]
+        if job["evaluation"] == "batch":
+            # One message batch per chunk - polled until it ends, outside the interactive rate limits
+            if claim_packets:
+                for claim_id, validation, error in await self.batch_evaluator.evaluate(claim_packets, job["analysis_depth"]):
+                    if validation is not None and self._is_fallback(validation, job):
+                        validation, error = None, FALLBACK_ERROR
+                    results.append((claim_id, validation, error))
+            return results
+
+        queue: asyncio.Queue = asyncio.Queue()
+        for claim_packet in claim_packets:
+            queue.put_nowait((claim_packet.claim_id, claim_packet))
+
+        async def worker():
+            while not queue.empty():
+                claim_id, claim_packet = queue.get_nowait()
+                try:
+                    await limiter.acquire()
+                    validation = await self._evaluate(claim_packet, job)
+                    results.append((claim_id, validation, None))
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    results.append((claim_id, None, str(e)))
+
+        await asyncio.gather(*(worker() for _ in range(min(job["concurrency"], queue.qsize()))))
+        return results
+
+    async def _evaluate(self, claim_packet: ClaimPacket, job: Dict[str, Any]) -> ClaimValidation:
+        if job["evaluation"] == "local":
+            return await self.ai_judge._evaluate_with_basic_rules(claim_packet)
+        validation = await self.ai_judge.evaluate_with_depth(claim_packet, job["analysis_depth"], [])
+        if self._is_fallback(validation, job):
+            raise RuntimeError(FALLBACK_ERROR)
+        return validation
+
+    def _is_fallback(self, validation: ClaimValidation, job: Dict[str, Any]) -> bool:
+        """A local-rules result the tier router didn't choose - Claude failed, timed out or was unavailable
+
+        Writing it back would replace the stored Claude verdict, so the claim counts as failed instead.
+        """
+        if job["evaluation"] == "local" or validation.evaluation_tier != LOCAL_TIER:
+            return False
+        router = self.ai_judge.router
+        depth = self.ai_judge._get_depth_name(job["analysis_depth"])
+        return not (router.enabled and depth in router.local_depths and router.is_decisive(validation, LOCAL_TIER))
+
+    def _write_chunk(self, job_id: str, results: List[Tuple[str, Optional[ClaimValidation], Optional[str]]],
+                     last_claim_id: str):
+        """Write a chunk's validations and advance the checkpoint in one transaction"""
+        db = SessionLocal()
+        try:
+            now = datetime.utcnow()
+            processed = 0
+            failures = {}
+            for claim_id, validation, error in results:
+                if validation is None:
+                    failures[claim_id] = error
+                    continue
+                db.query(ClaimRecord).filter(ClaimRecord.claim_id == claim_id).update(
+                    {"validation_result": validation.model_dump(mode="json"), "updated_at": now},
+                    synchronize_session=False
+                )
+                processed += 1
+
+            job = db.query(RevalidationJob).filter(RevalidationJob.job_id == job_id).first()
+            job.processed = (job.processed or 0) + processed
+            job.failed = (job.failed or 0) + len(failures)
+            if failures:
+                # Newest errors win and move to the end; only the most recent failures are kept
+                recorded = {claim_id: error for claim_id, error in (job.failures or {}).items()
+                            if claim_id not in failures}
+                recorded.update(failures)
+                job.failures = dict(list(recorded.items())[-MAX_RECORDED_FAILURES:])
+            job.last_claim_id = last_claim_id
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
@@ -0,0 +1,139 @@
+import json
+from typing import Dict, Any, List, Optional, Tuple
+
+# Claude's structured replies are requested as a forced tool call: the tool's input_schema is the
+# output format, and the arguments stream back as JSON fragments (input_json_delta events).
+
+class StructuredOutputError(ValueError):
+    """The model's tool input is missing required fields or has the wrong types"""
+
+def tool_spec(name: str, description: str, properties: Dict[str, Any], required: List[str]) -> Dict[str, Any]:
+    """A tool definition whose input schema is the structured output format"""
+    return {
+        "name": name,
+        "description": description,
+        "input_schema": {"type": "object", "properties": properties, "required": required}
+    }
+
+class StreamingObjectParser:
+    """Parses a JSON object as its text arrives, yielding each top-level field once it is complete
+
+    Only structural characters are tracked (string/escape state and nesting depth), so each
+    fragment is scanned once; a member is decoded with json.loads as soon as its closing `,` or `}`
+    arrives. Fields completed before a reply is cut off stay available in `fields`.
+    """
+
+    def __init__(self):
+        self.fields: Dict[str, Any] = {}
+        self.complete = False
+        self._text = ""
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._member_start: Optional[int] = None
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        completed = []
+        offset = len(self._text)
+        self._text += chunk
+        for i, char in enumerate(chunk, start=offset):
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._depth += 1
+                if self._depth == 1:
+                    self._member_start = i + 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    completed.extend(self._close_member(i))
+                    self.complete = True
+            elif char == "," and self._depth == 1:
+                completed.extend(self._close_member(i))
+                self._member_start = i + 1
+        return completed
+
+    def _close_member(self, end: int) -> List[Tuple[str, Any]]:
+        member = self._text[self._member_start:end].strip() if self._member_start is not None else ""
+        if not member:
+            return []
+        try:
+            parsed = json.loads("{" + member + "}")
+        except json.JSONDecodeError:
+            return []
+        self.fields.update(parsed)
+        return list(parsed.items())
+
+    @property
+    def text(self) -> str:
+        return self._text
+
+_JSON_TYPES = {
+    "string": (str,),
+    "number": (int, float),
+    "integer": (int,),
+    "boolean": (bool,),
+    "array": (list,),
+    "object": (dict,),
+    "null": (type(None),)
+}
+
+def _matches_type(value: Any, expected: Any) -> bool:
+    types = expected if isinstance(expected, list) else [expected]
+    for name in types:
+        if isinstance(value, bool) and name in ("number", "integer"):
+            continue
+        if isinstance(value, _JSON_TYPES.get(name, ())):
+            return True
+    return False
+
+def validate_structured(schema: Dict[str, Any], data: Any) -> Dict[str, Any]:
+    """Check tool input against its (object) schema
+
+    Missing or mistyped required fields raise StructuredOutputError. Mistyped optional fields are
+    dropped and out-of-range numbers are clamped, so a mostly-good reply is still usable.
+    """
+    if not isinstance(data, dict):
+        raise StructuredOutputError(f"expected an object, got {type(data).__name__}")
+
+    properties = schema.get("properties", {})
+    required = schema.get("required", [])
+    problems = [f"missing {name}" for name in required if name not in data]
+    cleaned = {}
+    for name, value in data.items():
+        spec = properties.get(name)
+        if spec is None:
+            cleaned[name] = value
+            continue
+        if "type" in spec and not _matches_type(value, spec["type"]):
+            if name in required:
+                problems.append(f"{name} should be {spec['type']}, got {type(value).__name__}")
+            continue
+        if "enum" in spec and value not in spec["enum"] and name in required:
+            problems.append(f"{name} should be one of {spec['enum']}, got {value!r}")
+            continue
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            if "minimum" in spec:
+                value = max(value, spec["minimum"])
+            if "maximum" in spec:
+                value = min(value, spec["maximum"])
+        if isinstance(value, list) and spec.get("items", {}).get("type") == "object":
+            items = []
+            for item in value:
+                try:
+                    items.append(validate_structured(spec["items"], item))
+                except StructuredOutputError:
+                    items.append(None)
+            value = items
+        cleaned[name] = value
+
+    if problems:
+        raise StructuredOutputError("; ".join(problems))
+    return cleaned
@@ -0,0 +1,75 @@
+import os
+import time
+import asyncio
+import hashlib
+from typing import Optional
+from pydantic import BaseModel
+
+UPLOAD_DIR = os.getenv("UPLOAD_DIR", "uploaded_files")
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(1024 * 1024)))  # 1 MB
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(25 * 1024 * 1024)))  # 25 MB per file
+
+class UploadTooLargeError(ValueError):
+    """Raised when an uploaded file exceeds the configured maximum size"""
+
+    def __init__(self, filename: str, max_bytes: int):
+        self.filename = filename
+        self.max_bytes = max_bytes
+        super().__init__(f"{filename} exceeds the maximum upload size of {max_bytes / (1024 * 1024):.1f} MB")
+
+class StoredUpload(BaseModel):
+    filename: str
+    file_path: str
+    content_hash: str  # SHA-256 hex digest of the file bytes
+    file_size: int
+    blob_id: Optional[str] = None  # Set when the upload was added to a BlobStore
+
+async def save_upload_streaming(upload_file, upload_dir: str = UPLOAD_DIR,
+                                max_bytes: int = UPLOAD_MAX_BYTES,
+                                chunk_size: int = UPLOAD_CHUNK_SIZE, blob_store=None) -> StoredUpload:
+    """Stream an UploadFile to disk in chunks, hashing and sizing it in the same pass
+    
+    When a blob_store is given the finished file is moved into it (deduplicated by hash).
+    """
+    os.makedirs(upload_dir, exist_ok=True)
+
+    file_id = f"{int(time.time() * 1000)}_{os.path.basename(upload_file.filename)}"
+    file_path = f"{upload_dir}/{file_id}"
+    partial_path = f"{file_path}.part"
+
+    sha256 = hashlib.sha256()
+    size = 0
+
+    try:
+        with open(partial_path, 'wb') as f:
+            while True:
+                chunk = await upload_file.read(chunk_size)
+                if not chunk:
+                    break
+
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLargeError(upload_file.filename, max_bytes)
+
+                sha256.update(chunk)
+                await asyncio.to_thread(f.write, chunk)
+
+        os.replace(partial_path, file_path)
+    except BaseException:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+        raise
+
+    content_hash = sha256.hexdigest()
+    blob_id = None
+    if blob_store is not None:
+        blob_id = blob_store.put_file(file_path, content_hash, move=True)
+        file_path = blob_store.path(blob_id)
+
+    return StoredUpload(
+        filename=upload_file.filename,
+        file_path=file_path,
+        content_hash=content_hash,
+        file_size=size,
+        blob_id=blob_id
+    )
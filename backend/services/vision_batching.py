@@ -0,0 +1,93 @@
+import os
+import asyncio
+from typing import Dict, Any, List, Optional, Callable, Awaitable
+
+# Photos from one upload are packed into multi-image vision requests up to these limits
+VISION_BATCH_ENABLED = os.getenv("VISION_BATCH_ENABLED", "true").lower() == "true"
+VISION_BATCH_MAX_IMAGES = int(os.getenv("VISION_BATCH_MAX_IMAGES", "10"))
+VISION_BATCH_MAX_BYTES = int(os.getenv("VISION_BATCH_MAX_BYTES", str(12 * 1024 * 1024)))  # before base64
+# How long the first photo in a batch waits for more photos before the request is sent
+VISION_BATCH_MAX_WAIT_SECONDS = float(os.getenv("VISION_BATCH_MAX_WAIT_SECONDS", "0.5"))
+
+class VisionBatchItem:
+    def __init__(self, data: bytes, media_type: str, label: str):
+        self.data = data
+        self.media_type = media_type
+        self.label = label
+        self.result: asyncio.Future = asyncio.get_running_loop().create_future()
+
+# Takes the packed items and returns one analysis per item (None where the model gave no usable answer)
+BatchAnalyzer = Callable[[List[VisionBatchItem]], Awaitable[List[Optional[Dict[str, Any]]]]]
+
+class VisionBatch:
+    """Collects the photos of one claim upload and analyses them together in multi-image requests"""
+
+    def __init__(self, analyze_batch: BatchAnalyzer, max_images: int = VISION_BATCH_MAX_IMAGES,
+                 max_bytes: int = VISION_BATCH_MAX_BYTES, max_wait_seconds: float = VISION_BATCH_MAX_WAIT_SECONDS):
+        self.analyze_batch = analyze_batch
+        self.max_images = max_images
+        self.max_bytes = max_bytes
+        self.max_wait_seconds = max_wait_seconds
+
+        self._pending: List[VisionBatchItem] = []
+        self._pending_bytes = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: List[asyncio.Task] = []
+
+    async def analyze(self, data: bytes, media_type: str, label: str) -> Optional[Dict[str, Any]]:
+        """Queue one image and wait for its slot of the batched response"""
+        item = VisionBatchItem(data, media_type, label)
+
+        # Start a new batch rather than push the current one over its byte budget
+        if self._pending and self._pending_bytes + len(data) > self.max_bytes:
+            self._flush()
+
+        self._pending.append(item)
+        self._pending_bytes += len(data)
+
+        if len(self._pending) >= self.max_images:
+            self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.max_wait_seconds, self._flush)
+
+        # Shielded so one caller timing out doesn't cancel the request shared with the other photos
+        return await asyncio.shield(item.result)
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+
+        items, self._pending, self._pending_bytes = self._pending, [], 0
+        self._tasks.append(asyncio.create_task(self._run(items)))
+
+    async def _run(self, items: List[VisionBatchItem]):
+        try:
+            results = await self.analyze_batch(items)
+        except asyncio.CancelledError:
+            for item in items:
+                item.result.cancel()
+            raise
+        except Exception as e:
+            # Waiters re-raise it; nobody awaits this task, so don't raise here too
+            for item in items:
+                if not item.result.done():
+                    item.result.set_exception(e)
+            return
+
+        for item, result in zip(items, results):
+            if not item.result.done():
+                item.result.set_result(result)
+
+    def close(self):
+        """Cancel batches still in flight (the upload request went away)"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        for item in self._pending:
+            item.result.cancel()
+        self._pending = []
+        for task in self._tasks:
+            task.cancel()
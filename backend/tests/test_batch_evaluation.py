@@ -0,0 +1,156 @@
+import asyncio
+import pytest
+from services.batch_evaluation import BatchJudgeEvaluator, LocalMessageBatches
+from services.judge_router import FULL_TIER
+from services.revalidation import RevalidationJobManager
+from conftest import make_claim, store_claims, stored_validations, wait_for_job
+
+ANALYSIS = {"overall_score": 0.82, "confidence": 0.9, "approved": True, "detailed_rationale": "batch answer"}
+
+def claims(count):
+    return [make_claim(f"claim_{i}", estimated_damage=1000.0 * (i + 1)) for i in range(count)]
+
+def make_evaluator(ai_judge, respond=None, polls_until_ended=1, **kwargs):
+    """Evaluator over the local batches stand-in; `requests` collects every submitted request's params"""
+    requests = []
+
+    async def answer(custom_id, params):
+        requests.append(params)
+        if respond:
+            return await respond(custom_id, params)
+        return dict(ANALYSIS)
+
+    batches = LocalMessageBatches(answer, polls_until_ended=polls_until_ended)
+    return BatchJudgeEvaluator(ai_judge, batches=batches, poll_interval=0, **kwargs), batches, requests
+
+def user_message(params):
+    return params["messages"][0]["content"]
+
+def test_results_come_back_in_input_order(ai_judge):
+    evaluator, _, requests = make_evaluator(ai_judge, max_requests=4)
+    packets = claims(10)
+    results = asyncio.run(evaluator.evaluate(packets, iteration=3, previous_scores=[0.4]))
+
+    assert [claim_id for claim_id, _, _ in results] == [packet.claim_id for packet in packets]
+    assert all(error is None for _, _, error in results)
+    assert {validation.overall_score for _, validation, _ in results} == {0.82}
+    assert {validation.evaluation_tier for _, validation, _ in results} == {FULL_TIER}
+    assert len(requests) == 10
+    assert {params["tool_choice"]["name"] for params in requests} == {"submit_forensic_analysis"}
+    stats = evaluator.stats()
+    assert (stats["batches_submitted"], stats["requests_submitted"], stats["succeeded"]) == (3, 10, 10)
+    assert stats["in_flight_requests"] == 0
+
+def test_depth_two_builds_prompts_with_and_without_score_history(ai_judge):
+    evaluator, _, requests = make_evaluator(ai_judge)
+    results = asyncio.run(evaluator.evaluate(claims(2), iteration=2))
+    assert all(validation is not None for _, validation, _ in results)
+    assert evaluator.stats()["prompt_errors"] == 0
+    assert not any("PREVIOUS ITERATION" in user_message(params) for params in requests)
+
+    requests.clear()
+    asyncio.run(evaluator.evaluate(claims(2), iteration=2, previous_scores=[0.55]))
+    assert all("PREVIOUS ITERATION" in user_message(params) for params in requests)
+
+def test_errored_and_invalid_requests_are_failures(ai_judge):
+    async def respond(custom_id, params):
+        index = int(custom_id.rsplit("-", 1)[1])
+        if index == 1:
+            raise RuntimeError("overloaded")
+        if index == 2:
+            return {"confidence": 0.9}
+        return dict(ANALYSIS)
+
+    evaluator, _, _ = make_evaluator(ai_judge, respond)
+    results = asyncio.run(evaluator.evaluate(claims(3), iteration=4, previous_scores=[0.5, 0.6, 0.7]))
+
+    assert results[0][1] is not None and results[0][2] is None
+    assert results[1][1] is None and "overloaded" in results[1][2]
+    assert results[2][1] is None and results[2][2].startswith("Invalid submit_expert_review input")
+    stats = evaluator.stats()
+    assert (stats["succeeded"], stats["errored"], stats["invalid"]) == (1, 1, 1)
+
+def test_prompt_build_failure_is_reported(ai_judge, monkeypatch):
+    build = ai_judge._stage_message
+
+    def failing_build(stage, claim_packet, previous_scores):
+        if claim_packet.claim_id == "claim_1":
+            raise ValueError("unreadable claim")
+        return build(stage, claim_packet, previous_scores)
+    monkeypatch.setattr(ai_judge, "_stage_message", failing_build)
+
+    evaluator, _, requests = make_evaluator(ai_judge)
+    results = asyncio.run(evaluator.evaluate(claims(3), iteration=3, previous_scores=[0.5]))
+
+    assert results[1] == ("claim_1", None, "Couldn't build FORENSIC_ANALYSIS request: unreadable claim")
+    assert results[0][1] is not None and results[2][1] is not None
+    assert len(requests) == 2
+    assert evaluator.stats()["prompt_errors"] == 1
+
+def test_decisive_local_results_skip_the_batch(ai_judge, monkeypatch):
+    evaluator, _, requests = make_evaluator(ai_judge)
+    monkeypatch.setattr(ai_judge.router, "is_decisive", lambda validation, tier: True)
+    results = asyncio.run(evaluator.evaluate(claims(4), iteration=1))
+    assert requests == []
+    assert evaluator.stats()["decided_locally"] == 4
+    assert all(validation is not None for _, validation, _ in results)
+
+    monkeypatch.setattr(ai_judge.router, "is_decisive", lambda validation, tier: False)
+    asyncio.run(evaluator.evaluate(claims(4), iteration=1))
+    assert len(requests) == 4
+
+def test_batches_running_past_max_wait_are_cancelled(ai_judge):
+    evaluator, batches, requests = make_evaluator(ai_judge, polls_until_ended=1000, max_wait=0)
+    results = asyncio.run(evaluator.evaluate(claims(3), iteration=3, previous_scores=[0.5]))
+
+    assert [error for _, _, error in results] == ["Batch request canceled"] * 3
+    assert requests == []
+    assert evaluator.stats()["canceled"] == 3
+
+def test_cancelling_the_caller_cancels_the_batch(ai_judge):
+    evaluator, batches, _ = make_evaluator(ai_judge, polls_until_ended=1000)
+    evaluator.poll_interval = 0.01
+
+    async def run():
+        task = asyncio.create_task(evaluator.evaluate(claims(2), iteration=3, previous_scores=[0.5]))
+        while evaluator.stats()["batches_submitted"] == 0:
+            await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+    asyncio.run(run())
+
+    assert [batch["canceled"] for batch in batches._batches.values()] == [True]
+    assert evaluator.stats()["in_flight_requests"] == 0
+
+def test_local_stand_in_answers_from_the_rule_engine(ai_judge):
+    evaluator = BatchJudgeEvaluator(ai_judge, poll_interval=0)
+    evaluator.batches = LocalMessageBatches(evaluator.local_response)
+    packets = claims(3)
+    results = asyncio.run(evaluator.evaluate(packets, iteration=3, previous_scores=[0.5]))
+
+    async def local_scores():
+        return [(await ai_judge._evaluate_with_basic_rules(packet)).overall_score for packet in packets]
+    assert [validation.overall_score for _, validation, _ in results] == asyncio.run(local_scores())
+    assert evaluator.stats()["backend"] == "local"
+
+def test_without_batches_everything_is_evaluated_locally(ai_judge):
+    evaluator = BatchJudgeEvaluator(ai_judge, poll_interval=0)
+    assert evaluator.batches is None
+    results = asyncio.run(evaluator.evaluate(claims(3), iteration=3, previous_scores=[0.5]))
+    assert all(validation is not None and error is None for _, validation, error in results)
+    assert evaluator.stats()["decided_locally"] == 3
+
+def test_revalidation_job_runs_one_batch_per_chunk(ai_judge):
+    store_claims(7)
+
+    async def run():
+        manager = RevalidationJobManager(ai_judge)
+        manager.batch_evaluator, _, _ = make_evaluator(ai_judge)
+        job = manager.create_job(evaluation="batch", analysis_depth=3, chunk_size=3)
+        return manager, await wait_for_job(manager, job["job_id"])
+    manager, job = asyncio.run(run())
+
+    assert (job["status"], job["processed"], job["failed"]) == ("completed", 7, 0)
+    assert manager.batch_evaluator.stats()["batches_submitted"] == 3
+    assert {validation["overall_score"] for validation in stored_validations().values()} == {0.82}
@@ -0,0 +1,15 @@
+import hashlib
+import pytest
+from services.blob_store import BlobStore
+
+def test_blob_ids_must_be_sha256_hex(tmp_path):
+    store = BlobStore(str(tmp_path / "blobs"))
+    blob_id = store.put_bytes(b"photo bytes")
+    assert blob_id == hashlib.sha256(b"photo bytes").hexdigest()
+    assert store.exists(blob_id)
+
+    for bad_id in ("../../etc/passwd", "/etc/passwd", blob_id.upper(), blob_id[:-1], blob_id + "/..", ""):
+        assert not store.exists(bad_id)
+        with pytest.raises(ValueError):
+            store.path(bad_id)
+    assert store.resolve_path({"blob_id": "../claims.db"}) is None
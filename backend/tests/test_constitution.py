@@ -0,0 +1,170 @@
+import os
+import copy
+import time
+import random
+import asyncio
+from datetime import datetime, timedelta
+import numpy as np
+import pytest
+import yaml
+from models.claim import DocumentType
+from services.bulk_scoring import BulkRuleScorer
+from services.claim_features import ClaimFeatureIndex
+from services.constitution import Constitution, ConstitutionError, ConstitutionStore, Expression, load_constitution
+from conftest import make_claim, make_document
+
+NOW = datetime(2026, 6, 1, 12, 0, 0)
+WORDS = ["damage", "fire", "burn", "char", "smoke", "ash", "wildfire", "severe", "total", "complete", "destroyed",
+         "clear", "good", "adequate", "high", "blurry", "poor", "low", "unclear", "minor", "light", "kitchen"]
+
+def random_claims(count, seed=7):
+    """Claims spread over every branch of the rule logic: document mixes, amounts, filing delays, duplicates"""
+    rnd = random.Random(seed)
+    claims = []
+    for i in range(count):
+        documents = []
+        base_hash = rnd.getrandbits(64)
+        for j in range(rnd.randint(0, 20)):
+            document = make_document(j, rnd.choice(list(DocumentType)),
+                                     {"description": " ".join(rnd.sample(WORDS, rnd.randint(0, 4)))})
+            if document.document_type == DocumentType.PHOTO and rnd.random() < 0.6:
+                value = base_hash if rnd.random() < 0.3 else rnd.getrandbits(64)
+                document.perceptual_hash = {"dhash": f"{value:016x}", "phash": f"{value:016x}"}
+                if rnd.random() < 0.2:
+                    document.duplicate_of = {"distance": rnd.randint(0, 6)}
+            documents.append(document)
+        claim = make_claim(f"claim_{i}", documents, estimated_damage=rnd.choice([50, 500, 5000, 60000, 150000, 600000]))
+        # Half-day offsets keep the filing delay away from day boundaries
+        claim.incident_date = NOW - timedelta(days=rnd.choice([0.5, 5.5, 59.5, 60.5, 89.5, 90.5, 200.5]))
+        claims.append(claim)
+    return claims
+
+@pytest.fixture(scope="module")
+def constitution():
+    return load_constitution()
+
+def edited(constitution, edit):
+    data = copy.deepcopy(constitution.data)
+    edit(data)
+    return data
+
+def rule_logic(data, rule_id):
+    return next(rule for rules in data["rules"].values() for rule in rules if rule["id"] == rule_id)["logic"]
+
+def test_shipped_constitution_compiles(constitution):
+    assert constitution.version.startswith(f"{constitution.data['version']}-")
+    assert constitution.local_rules
+    assert constitution.scored_categories
+    assert "COMP_001" in constitution.text
+
+def test_vectorized_rules_match_per_claim_logic(constitution):
+    claims = random_claims(200)
+    scorer = BulkRuleScorer(constitution)
+    scores = scorer.score_matrix(scorer.feature_matrix(claims, NOW)[1])
+
+    for i, claim in enumerate(claims):
+        features = ClaimFeatureIndex(claim, now=NOW).rule_features()
+        for j, (rule, logic) in enumerate(constitution.local_rules):
+            passed, confidence, _ = logic.evaluate(features)
+            assert scores["passed"][i, j] == passed, (claim.claim_id, rule["id"])
+            assert scores["rule_confidence"][i, j] == pytest.approx(confidence), (claim.claim_id, rule["id"])
+        assert scores["fraud_indicators"][i] == len(constitution.fraud_indicators(features))
+
+def test_photos_reused_from_other_uploads_are_a_fraud_indicator(constitution):
+    photos = [make_document(i) for i in range(3)]
+    for photo, value in zip(photos, (0x0F0F0F0F0F0F0F0F, 0x0F0F0F0F0F0F0F0F, 0xF0F0F0F0F0F0F0F0)):
+        photo.perceptual_hash = {"dhash": f"{value:016x}", "phash": f"{value:016x}"}
+    # The second photo copies the first within the claim; the first and third were seen in other uploads
+    photos[0].duplicate_of = {"distance": 2}
+    photos[1].duplicate_of = {"distance": 0}
+    photos[2].duplicate_of = {"distance": 4}
+    features = ClaimFeatureIndex(make_claim(documents=photos), now=NOW).rule_features()
+    assert (features["near_duplicates"], features["reused_photos"]) == (1, 2)
+    assert "2 photos match images previously uploaded outside this claim" in constitution.fraud_indicators(features)
+
+    photos[0].duplicate_of = photos[2].duplicate_of = None
+    features = ClaimFeatureIndex(make_claim(documents=photos), now=NOW).rule_features()
+    assert features["reused_photos"] == 0
+    assert not any("previously uploaded" in indicator for indicator in constitution.fraud_indicators(features))
+
+def test_bulk_scores_match_local_evaluator(constitution, ai_judge):
+    claims = random_claims(100, seed=11)
+    result = BulkRuleScorer(constitution).score(claims, now=NOW)
+
+    async def evaluate_all():
+        return [await ai_judge._evaluate_with_basic_rules(claim, now=NOW) for claim in claims]
+
+    for record, validation in zip(result.records(), asyncio.run(evaluate_all())):
+        assert record["overall_score"] == validation.overall_score
+        assert record["confidence"] == validation.confidence
+        assert record["approved"] == validation.approved
+        assert record["rules_passed"] == sum(rule.passed for rule in validation.rules_evaluated)
+
+def test_chained_comparisons_and_conditionals_vectorize():
+    expression = Expression("1 < photos <= 3 and not receipts if photos else ratio(receipts, photos) > 0",
+                            ["photos", "receipts"], "test")
+    photos = np.array([0, 1, 2, 3, 4, 2], dtype=np.float64)
+    receipts = np.array([1, 0, 0, 0, 0, 1], dtype=np.float64)
+    vector = expression.evaluate_vector({"photos": photos, "receipts": receipts})
+    scalar = [expression.evaluate({"photos": p, "receipts": r}) for p, r in zip(photos, receipts)]
+    assert [bool(value) for value in vector] == [bool(value) for value in scalar]
+
+@pytest.mark.parametrize("source, message", [
+    ("unique_photos.__class__", "Attribute is not allowed"),
+    ("photos[0]", "Subscript is not allowed"),
+    ("open('claims.db')", "can be called"),
+    ("(lambda: 1)()", "can be called"),
+    ("undefined_feature > 1", "unknown name 'undefined_feature'"),
+    ("photos >", "invalid expression"),
+])
+def test_unsafe_or_invalid_expressions_are_rejected(constitution, source, message):
+    def edit(data):
+        rule_logic(data, "COMP_001")["cases"][0]["when"] = source
+    with pytest.raises(ConstitutionError, match=message):
+        Constitution(edited(constitution, edit))
+
+def test_structural_errors_are_rejected(constitution):
+    def no_fallback_case(data):
+        rule_logic(data, "COMP_001")["cases"][-1]["when"] = "photos > 0"
+
+    def duplicate_rule(data):
+        rules = data["rules"]["completeness"]
+        rules.append(copy.deepcopy(rules[0]))
+
+    def unknown_template_name(data):
+        rule_logic(data, "COMP_001")["cases"][0]["rationale"] = "Found {photo_count} photos"
+
+    def unguarded_filing_delay(data):
+        # days_since_incident is None when the date doesn't parse - caught by the load-time dry run
+        rule_logic(data, "COMP_003")["cases"] = [
+            {"passed": "days_since_incident <= 60", "confidence": 0.9, "rationale": "late"}
+        ]
+
+    for edit, message in ((no_fallback_case, "last case must have no `when`"),
+                          (duplicate_rule, "duplicate rule id"),
+                          (unknown_template_name, "unknown name 'photo_count'"),
+                          (unguarded_filing_delay, "fails on a sample claim")):
+        with pytest.raises(ConstitutionError, match=message):
+            Constitution(edited(constitution, edit))
+
+def test_store_reloads_edits_and_keeps_last_good_version(constitution, tmp_path):
+    path = tmp_path / "constitution.yaml"
+    path.write_text(yaml.safe_dump(constitution.data))
+    store = ConstitutionStore(str(path), reload_interval=0.01)
+    original = store.current().version
+
+    broken = edited(constitution, lambda data: rule_logic(data, "COMP_001")["cases"][0].update(when="photos.real"))
+    path.write_text(yaml.safe_dump(broken))
+    os.utime(path, ns=(time.time_ns(), time.time_ns() + 1_000_000_000))
+    time.sleep(0.02)
+    assert store.current().version == original
+    assert "Attribute is not allowed" in store.stats()["last_error"]
+
+    stricter = edited(constitution, lambda data: data["local_evaluation"].update(approval_threshold=0.9))
+    path.write_text(yaml.safe_dump(stricter))
+    os.utime(path, ns=(time.time_ns(), time.time_ns() + 2_000_000_000))
+    time.sleep(0.02)
+    assert store.current().version != original
+    assert store.current().approval_threshold == 0.9
+    assert store.stats()["reloads"] == 1
+    assert store.stats()["last_error"] is None
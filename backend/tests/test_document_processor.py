@@ -0,0 +1,19 @@
+import services.document_processor as document_processor
+from models.claim import DocumentType
+from services.document_processor import DocumentProcessor
+
+def test_extraction_cache_key_tracks_what_the_model_sees(monkeypatch):
+    processor = DocumentProcessor()
+    photo_key = processor._extraction_cache_key("abc", DocumentType.PHOTO)
+    pdf_key = processor._extraction_cache_key("abc", DocumentType.RECEIPT)
+
+    monkeypatch.setattr(document_processor, "VISION_MAX_LONG_EDGE", document_processor.VISION_MAX_LONG_EDGE // 2)
+    resized_key = processor._extraction_cache_key("abc", DocumentType.PHOTO)
+    assert resized_key != photo_key
+    assert processor._extraction_cache_key("abc", DocumentType.RECEIPT) == pdf_key
+
+    monkeypatch.setattr(document_processor, "VISION_JPEG_QUALITY", document_processor.VISION_JPEG_QUALITY - 10)
+    assert processor._extraction_cache_key("abc", DocumentType.PHOTO) not in (photo_key, resized_key)
+
+    monkeypatch.setattr(document_processor, "ANALYSIS_TEXT_CHAR_BUDGET", 1)
+    assert processor._extraction_cache_key("abc", DocumentType.RECEIPT) != pdf_key
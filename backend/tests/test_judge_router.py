@@ -0,0 +1,99 @@
+import asyncio
+from datetime import datetime
+from models.claim import ClaimValidation
+from services.judge_router import JudgeTierRouter, LOCAL_TIER, FAST_TIER, FULL_TIER
+
+def validation(score, confidence, approved=None, tier=None):
+    return ClaimValidation(
+        claim_id="claim_1",
+        overall_score=score,
+        confidence=confidence,
+        approved=score >= 0.75 if approved is None else approved,
+        rules_evaluated=[],
+        missing_documents=[],
+        fraud_indicators=[],
+        rationale="test",
+        timestamp=datetime(2026, 1, 1),
+        evaluation_tier=tier
+    )
+
+def make_router(**kwargs):
+    options = {"full_model": "full", "fast_model": "fast", "min_confidence": 0.8, "local_min_confidence": 0.7,
+               "ambiguous_band": (0.5, 0.85), "local_depths": "BASIC_SCREENING", "enabled": True}
+    return JudgeTierRouter(**{**options, **kwargs})
+
+def route(router, depth, local_result, model_results):
+    """Run router.evaluate with canned tier answers; returns (validation, tiers called in order)"""
+    calls = []
+
+    async def run_local():
+        calls.append(LOCAL_TIER)
+        return local_result
+
+    async def run_model(model):
+        calls.append(model)
+        return model_results[model]
+
+    return asyncio.run(router.evaluate(depth, run_local, run_model)), calls
+
+def test_tiers_per_depth():
+    router = make_router()
+    assert router.tiers_for("BASIC_SCREENING") == [(LOCAL_TIER, None), (FAST_TIER, "fast"), (FULL_TIER, "full")]
+    assert router.tiers_for("FORENSIC_ANALYSIS") == [(FAST_TIER, "fast"), (FULL_TIER, "full")]
+    assert make_router(fast_model="full").tiers_for("FORENSIC_ANALYSIS") == [(FULL_TIER, "full")]
+    assert make_router(enabled=False).tiers_for("BASIC_SCREENING") == [(FULL_TIER, "full")]
+
+def test_decisiveness():
+    router = make_router()
+    assert router.is_decisive(validation(0.9, 0.9))
+    assert router.is_decisive(validation(0.2, 0.9))
+    # Ambiguous score, low confidence, or a high score that was still rejected
+    assert not router.is_decisive(validation(0.6, 0.95))
+    assert not router.is_decisive(validation(0.9, 0.75))
+    assert not router.is_decisive(validation(0.9, 0.9, approved=False))
+    # The rule engine has its own, lower confidence bar
+    assert router.is_decisive(validation(0.9, 0.75), LOCAL_TIER)
+    assert not router.is_decisive(validation(0.9, 0.65), LOCAL_TIER)
+
+def test_decisive_local_answer_skips_the_models():
+    result, calls = route(make_router(), "BASIC_SCREENING", validation(0.1, 0.9), {})
+    assert calls == [LOCAL_TIER]
+    assert result.evaluation_tier == LOCAL_TIER
+
+def test_ambiguous_answers_escalate_to_the_full_model():
+    router = make_router()
+    result, calls = route(router, "BASIC_SCREENING", validation(0.6, 0.9),
+                          {"fast": validation(0.7, 0.9), "full": validation(0.8, 0.6)})
+    assert calls == [LOCAL_TIER, "fast", "full"]
+    # The last tier's answer is returned even if it isn't decisive
+    assert result.overall_score == 0.8
+    assert result.evaluation_tier == FULL_TIER
+    stats = router.stats()["tiers"]
+    assert (stats[LOCAL_TIER]["escalated"], stats[FAST_TIER]["escalated"], stats[FULL_TIER]["decided"]) == (1, 1, 1)
+
+def test_decisive_fast_model_answer_is_returned():
+    result, calls = route(make_router(), "FORENSIC_ANALYSIS", None,
+                          {"fast": validation(0.95, 0.9), "full": validation(0.1, 0.9)})
+    assert calls == ["fast"]
+    assert result.evaluation_tier == FAST_TIER
+
+def test_failed_model_call_escalates_and_is_not_relabelled():
+    # A stage whose model call failed answers with the local rules (tier already set to local)
+    router = make_router()
+    fallback = validation(0.95, 0.95, tier=LOCAL_TIER)
+    result, calls = route(router, "FORENSIC_ANALYSIS", None, {"fast": fallback, "full": validation(0.3, 0.9)})
+    assert calls == ["fast", "full"]
+    assert result.evaluation_tier == FULL_TIER
+    assert router.stats()["tiers"][FAST_TIER]["failed"] == 1
+
+    result, _ = route(router, "FORENSIC_ANALYSIS", None, {"fast": fallback, "full": fallback})
+    assert result.evaluation_tier == LOCAL_TIER
+    assert router.stats()["tiers"][FULL_TIER]["failed"] == 1
+
+def test_signature_tracks_routing_configuration():
+    router = make_router()
+    assert router.signature() == make_router().signature()
+    assert router.signature() != make_router(fast_model="other").signature()
+    assert router.signature() != make_router(ambiguous_band=(0.4, 0.85)).signature()
+    assert router.signature() != make_router(local_depths="").signature()
+    assert make_router(enabled=False).signature() == "full"
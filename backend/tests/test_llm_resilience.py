@@ -0,0 +1,189 @@
+import asyncio
+from types import SimpleNamespace
+import anthropic
+import httpx
+import pytest
+import services.llm_client as llm_client
+from services.judge_router import LOCAL_TIER
+from services.llm_client import LLMClient
+from services.llm_resilience import (
+    CircuitBreaker, CircuitOpenError, LatencyTracker, classify_error, retry_after_seconds, backoff_delay,
+    BREAKER_CLOSED, BREAKER_OPEN, BREAKER_HALF_OPEN
+)
+from conftest import make_claim
+
+def status_error(status_code, headers=None):
+    request = httpx.Request("POST", "https://api.anthropic.com/v1/messages")
+    response = httpx.Response(status_code, request=request, headers=headers or {})
+    error_class = {400: anthropic.BadRequestError, 429: anthropic.RateLimitError,
+                   500: anthropic.InternalServerError}.get(status_code, anthropic.APIStatusError)
+    return error_class("upstream error", response=response, body=None)
+
+class FakeMessages:
+    """messages.create following a script of ("ok", delay) / ("error", exception) steps, then succeeding"""
+
+    def __init__(self, script=()):
+        self.script = list(script)
+        self.calls = 0
+
+    async def create(self, **kwargs):
+        self.calls += 1
+        call = self.calls
+        kind, value = self.script.pop(0) if self.script else ("ok", 0)
+        if kind == "error":
+            raise value
+        await asyncio.sleep(value)
+        return SimpleNamespace(usage=None, call=call)
+
+def make_client(script=(), **kwargs):
+    client = LLMClient("test-key", **kwargs)
+    messages = FakeMessages(script)
+    client.client = SimpleNamespace(messages=messages)
+    return client, messages
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(llm_client, "backoff_delay", lambda attempt: 0.0)
+
+def test_error_classification():
+    assert classify_error(asyncio.TimeoutError()) == "timeout"
+    assert classify_error(status_error(429)) == "rate_limited"
+    assert classify_error(status_error(500)) == "server_error"
+    assert classify_error(status_error(529)) == "server_error"
+    assert classify_error(anthropic.APIConnectionError(request=httpx.Request("POST", "https://x"))) == "connection_error"
+    assert classify_error(status_error(400)) is None
+    assert classify_error(ValueError("bad")) is None
+
+def test_retry_after_and_backoff():
+    assert retry_after_seconds(status_error(429, {"retry-after": "2"})) == 2.0
+    assert retry_after_seconds(status_error(429, {"retry-after-ms": "150"})) == 0.15
+    assert retry_after_seconds(status_error(429)) is None
+    assert all(0 <= backoff_delay(attempt, base=0.5, cap=8) <= min(8, 0.5 * 2 ** attempt) for attempt in range(10))
+
+def test_latency_percentiles():
+    tracker = LatencyTracker(window=100)
+    for value in range(1, 201):
+        tracker.record(value / 100)
+    assert tracker.stats()["samples"] == 100
+    assert tracker.percentile(0.5) == 1.51
+    assert tracker.percentile(0.99) == 2.0
+
+def test_breaker_opens_probes_and_closes(monkeypatch):
+    clock = [0.0]
+    monkeypatch.setattr("services.llm_resilience.time.monotonic", lambda: clock[0])
+    breaker = CircuitBreaker(failure_threshold=3, reset_seconds=30)
+
+    for _ in range(3):
+        breaker.before_call()
+        breaker.record_failure()
+    assert breaker.state == BREAKER_OPEN
+    assert not breaker.available()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    clock[0] = 31
+    assert breaker.available()
+    breaker.before_call()
+    assert breaker.state == BREAKER_HALF_OPEN
+    # Only one probe at a time
+    assert not breaker.available()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    breaker.record_failure()
+    assert breaker.state == BREAKER_OPEN
+    clock[0] = 62
+    breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == BREAKER_CLOSED
+    assert breaker.stats()["opened"] == 2
+    assert breaker.stats()["rejected"] == 2
+
+def test_transient_errors_are_retried():
+    client, messages = make_client([("error", status_error(429, {"retry-after": "0.01"})),
+                                    ("error", status_error(500)), ("ok", 0)])
+    response = asyncio.run(client.create_message(model="m"))
+    assert response.call == 3
+    assert client.metrics["retries"] == 2
+    assert client.metrics["errors"]["rate_limited"] == 1
+    assert client.metrics["errors"]["server_error"] == 1
+    assert client.breaker.state == BREAKER_CLOSED
+
+def test_bad_requests_are_not_retried():
+    client, messages = make_client([("error", status_error(400))])
+    with pytest.raises(anthropic.BadRequestError):
+        asyncio.run(client.create_message(model="m"))
+    assert messages.calls == 1
+    assert client.breaker.consecutive_failures == 0
+
+def test_retries_stop_at_the_limit():
+    client, messages = make_client([("error", status_error(500))] * 10, max_retries=2)
+    with pytest.raises(anthropic.InternalServerError):
+        asyncio.run(client.create_message(model="m"))
+    assert messages.calls == 3
+    assert client.metrics["failed"] == 1
+
+def test_open_breaker_fails_fast():
+    client, messages = make_client([("error", status_error(500))] * 10, max_retries=0)
+    client.breaker.failure_threshold = 2
+
+    async def run():
+        for _ in range(2):
+            with pytest.raises(anthropic.InternalServerError):
+                await client.create_message(model="m")
+        assert not client.available()
+        with pytest.raises(CircuitOpenError):
+            await client.create_message(model="m")
+    asyncio.run(run())
+    assert messages.calls == 2
+    assert client.stats()["circuit_breaker"]["state"] == BREAKER_OPEN
+
+def test_timeout_covers_every_attempt():
+    client, messages = make_client([("error", status_error(500)), ("ok", 5)], timeout_seconds=0.1)
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        with pytest.raises(asyncio.TimeoutError):
+            await client.create_message(model="m")
+        return loop.time() - started
+    assert asyncio.run(run()) < 1
+    assert client.metrics["timeouts"] == 1
+    assert client.in_flight == 0
+
+def test_slow_request_is_hedged(monkeypatch):
+    monkeypatch.setattr(llm_client, "LLM_HEDGE_MIN_SAMPLES", 5)
+    monkeypatch.setattr(llm_client, "LLM_HEDGE_MIN_DELAY_SECONDS", 0.05)
+    client, messages = make_client([("ok", 0.001)] * 5 + [("ok", 5), ("ok", 0.001)], hedge_enabled=True)
+
+    async def run():
+        for _ in range(5):
+            await client.create_message(model="m")
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        response = await client.create_message(model="m")
+        return response, loop.time() - started
+    response, seconds = asyncio.run(run())
+
+    assert response.call == 7
+    assert seconds < 1
+    assert client.metrics["hedged_requests"] == 1
+    assert client.metrics["hedge_wins"] == 1
+    assert client.in_flight == 0
+
+def test_hedging_waits_for_enough_samples():
+    client, messages = make_client([("ok", 0.001)] * 3, hedge_enabled=True)
+    for _ in range(3):
+        asyncio.run(client.create_message(model="m"))
+    assert client.stats()["hedging"]["delay_seconds"] is None
+    assert client.metrics["hedged_requests"] == 0
+
+def test_judge_uses_local_rules_while_breaker_is_open(ai_judge):
+    client, messages = make_client()
+    client.breaker.state = BREAKER_OPEN
+    client.breaker.opened_at = float("inf")
+    ai_judge.client = client
+
+    result = asyncio.run(ai_judge.evaluate_with_depth(make_claim(), 3, [0.5]))
+    assert result.evaluation_tier == LOCAL_TIER
+    assert messages.calls == 0
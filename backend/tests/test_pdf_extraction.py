@@ -0,0 +1,57 @@
+import asyncio
+import pytest
+from reportlab.pdfgen import canvas
+from services.pdf_extraction import PdfTextExtractor
+
+PAGE_TEXT = "Wildfire damage inspection notes " * 4
+
+@pytest.fixture(scope="module")
+def pdf_path(tmp_path_factory):
+    """60-page PDF with about 130 characters of text per page"""
+    path = tmp_path_factory.mktemp("pdf") / "report.pdf"
+    pdf = canvas.Canvas(str(path))
+    for page in range(60):
+        pdf.drawString(40, 800, f"Page {page + 1}: {PAGE_TEXT}")
+        pdf.showPage()
+    pdf.save()
+    return str(path)
+
+@pytest.fixture
+def extractor():
+    extractor = PdfTextExtractor(max_workers=4, pages_per_task=20)
+    yield extractor
+    extractor.shutdown()
+
+def test_every_page_is_extracted_in_order(extractor, pdf_path):
+    result = asyncio.run(extractor.extract_text(pdf_path))
+    assert (result.page_count, result.pages_extracted) == (60, 60)
+    assert not result.truncated and not result.stopped_early
+    lines = [line for line in result.text.splitlines() if line]
+    assert [line.split(":")[0] for line in lines] == [f"Page {page}" for page in range(1, 61)]
+    # One page count task plus a 15-page range per worker
+    assert extractor.metrics["tasks_submitted"] == 5
+
+def test_met_char_budget_stops_submitting_ranges(extractor, pdf_path):
+    result = asyncio.run(extractor.extract_text(pdf_path, char_budget=100))
+    assert result.stopped_early
+    assert result.pages_extracted == 1
+    assert result.text.startswith("Page 1:")
+    # The page count and the single-page first range - nothing is scheduled past the budget
+    assert extractor.metrics["tasks_submitted"] == 2
+    assert extractor.stats()["pages_skipped"] == 59
+
+def test_pages_in_flight_are_sized_from_the_budget(extractor, pdf_path):
+    result = asyncio.run(extractor.extract_text(pdf_path, char_budget=len(PAGE_TEXT) * 6))
+    assert result.stopped_early
+    assert result.pages_extracted == 6
+    # Page count, the first page, then the five pages the first page's length says are still needed
+    # spread over the four workers - nothing past page 6 is ever submitted
+    assert extractor.metrics["tasks_submitted"] == 6
+
+def test_keyword_selection_reads_every_page(extractor, pdf_path):
+    result = asyncio.run(extractor.extract_text(pdf_path, char_budget=300, selection="keyword",
+                                                keywords=["page 42"]))
+    assert result.pages_extracted == 60
+    assert not result.stopped_early
+    assert "Page 42:" in result.text
+    assert len([line for line in result.text.splitlines() if line]) < 60
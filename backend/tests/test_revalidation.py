@@ -0,0 +1,188 @@
+import asyncio
+import pytest
+from database import ClaimRecord, RevalidationJob, SessionLocal
+from services.revalidation import RevalidationJobManager, RateLimiter, FALLBACK_ERROR, MAX_RECORDED_FAILURES
+from conftest import store_claims, stored_validations, wait_for_job
+
+class FakeClaude:
+    """LLMClient stand-in answering every structured judge call with the same analysis"""
+
+    def __init__(self, analysis=None):
+        self.analysis = analysis or {"overall_score": 0.77, "confidence": 0.9, "approved": True}
+        self.calls = 0
+
+    def available(self):
+        return True
+
+    async def create_structured(self, tool, **kwargs):
+        self.calls += 1
+        return dict(self.analysis)
+
+def test_local_job_walks_claims_in_keyset_chunks(ai_judge):
+    claim_ids = store_claims(23)
+    seen = []
+    evaluate = ai_judge._evaluate_with_basic_rules
+
+    async def record_and_evaluate(claim_packet):
+        seen.append(claim_packet.claim_id)
+        return await evaluate(claim_packet)
+    ai_judge._evaluate_with_basic_rules = record_and_evaluate
+
+    async def run():
+        manager = RevalidationJobManager(ai_judge)
+        job = manager.create_job(evaluation="local", chunk_size=5, concurrency=2)
+        return await wait_for_job(manager, job["job_id"])
+    job = asyncio.run(run())
+
+    assert job["status"] == "completed"
+    assert (job["processed"], job["failed"], job["total_claims"]) == (23, 0, 23)
+    assert job["last_claim_id"] == claim_ids[-1]
+    assert sorted(seen) == claim_ids
+    assert not any(validation.get("stale") for validation in stored_validations().values())
+
+def test_unvalidated_claims_are_skipped_unless_requested(ai_judge):
+    store_claims(3)
+    db = SessionLocal()
+    db.add(ClaimRecord(claim_id="C9999", policy_number="POL-123", claimant_name="Test Claimant",
+                       property_address="1 Test Street", estimated_damage=1000.0, documents=[],
+                       validation_result=None))
+    db.commit()
+    db.close()
+
+    async def run(include_unvalidated):
+        manager = RevalidationJobManager(ai_judge)
+        job = manager.create_job(evaluation="local", include_unvalidated=include_unvalidated)
+        return await wait_for_job(manager, job["job_id"])
+
+    assert asyncio.run(run(False))["total_claims"] == 3
+    assert asyncio.run(run(True))["total_claims"] == 4
+
+def test_interrupted_job_resumes_after_last_written_chunk(ai_judge):
+    claim_ids = store_claims(12)
+    seen = []
+    gate = {"block_after": 9, "released": None}
+    evaluate = ai_judge._evaluate_with_basic_rules
+
+    async def gated_evaluate(claim_packet):
+        seen.append(claim_packet.claim_id)
+        if gate["released"] is not None and len(seen) >= gate["block_after"]:
+            await gate["released"].wait()
+        return await evaluate(claim_packet)
+    ai_judge._evaluate_with_basic_rules = gated_evaluate
+
+    async def run():
+        gate["released"] = asyncio.Event()
+        manager = RevalidationJobManager(ai_judge)
+        job_id = manager.create_job(evaluation="local", chunk_size=4, concurrency=1)["job_id"]
+        # Two chunks are written, the third is stuck on its first claim when the process "stops"
+        while manager.get(job_id)["processed"] < 8 or len(seen) < 9:
+            await asyncio.sleep(0.01)
+        await manager.shutdown()
+        interrupted = manager.get(job_id)
+
+        gate["released"] = None
+        seen.clear()
+        restarted = RevalidationJobManager(ai_judge)
+        assert restarted.resume_interrupted() == [job_id]
+        return interrupted, await wait_for_job(restarted, job_id)
+    interrupted, job = asyncio.run(run())
+
+    assert interrupted["status"] == "running"
+    assert interrupted["last_claim_id"] == claim_ids[7]
+    assert interrupted["processed"] == 8
+    assert seen == claim_ids[8:]
+    assert job["status"] == "completed"
+    assert (job["processed"], job["failed"], job["total_claims"]) == (12, 0, 12)
+
+def test_pause_and_resume(ai_judge):
+    store_claims(6)
+    evaluate = ai_judge._evaluate_with_basic_rules
+
+    async def slow_evaluate(claim_packet):
+        await asyncio.sleep(0.02)
+        return await evaluate(claim_packet)
+    ai_judge._evaluate_with_basic_rules = slow_evaluate
+
+    async def run():
+        manager = RevalidationJobManager(ai_judge)
+        job_id = manager.create_job(evaluation="local", chunk_size=2, concurrency=1)["job_id"]
+        while manager.get(job_id)["processed"] < 2:
+            await asyncio.sleep(0.01)
+        assert manager.pause(job_id)
+        await asyncio.sleep(0.05)
+        paused = manager.get(job_id)
+        assert manager.resume(job_id)
+        return paused, await wait_for_job(manager, job_id)
+    paused, job = asyncio.run(run())
+
+    assert paused["status"] == "paused"
+    assert paused["processed"] < 6
+    assert (job["status"], job["processed"]) == ("completed", 6)
+
+def test_local_rules_fallback_is_not_written_back(ai_judge):
+    # No Claude client: every forensic evaluation falls back to the local rules
+    claim_ids = store_claims(5)
+
+    async def run():
+        manager = RevalidationJobManager(ai_judge)
+        job = manager.create_job(evaluation="llm", analysis_depth=3, requests_per_minute=0)
+        return await wait_for_job(manager, job["job_id"])
+    job = asyncio.run(run())
+
+    assert job["status"] == "completed"
+    assert (job["processed"], job["failed"]) == (0, 5)
+    assert set(job["failures"]) == set(claim_ids)
+    assert set(job["failures"].values()) == {FALLBACK_ERROR}
+    assert all(validation["stale"] for validation in stored_validations().values())
+
+def test_model_results_are_written_back_without_score_history(ai_judge):
+    store_claims(4)
+
+    async def run():
+        manager = RevalidationJobManager(ai_judge)
+        ai_judge.client = FakeClaude()
+        # Depth 2 compares against previous scores, which a re-validation job doesn't have
+        job = manager.create_job(evaluation="llm", analysis_depth=2, requests_per_minute=0)
+        return await wait_for_job(manager, job["job_id"])
+    job = asyncio.run(run())
+
+    assert (job["status"], job["processed"], job["failed"]) == ("completed", 4, 0)
+    validations = stored_validations().values()
+    assert {validation["overall_score"] for validation in validations} == {0.77}
+    assert {validation["evaluation_tier"] for validation in validations} <= {"fast_model", "full_model"}
+
+def test_recorded_failures_keep_the_latest_errors(ai_judge):
+    db = SessionLocal()
+    db.add(RevalidationJob(job_id="job_1", failures={"C0000": "old error", "C0001": "other error"}))
+    db.commit()
+    db.close()
+
+    manager = RevalidationJobManager(ai_judge)
+    manager._write_chunk("job_1", [("C0000", None, "new error")], "C0000")
+    failures = manager.get("job_1")["failures"]
+    assert list(failures.items()) == [("C0001", "other error"), ("C0000", "new error")]
+
+    chunk = [(f"C{i:04d}", None, "overloaded") for i in range(2, MAX_RECORDED_FAILURES + 2)]
+    manager._write_chunk("job_1", chunk, chunk[-1][0])
+    job = manager.get("job_1")
+    assert job["failed"] == MAX_RECORDED_FAILURES + 1
+    assert list(job["failures"]) == [claim_id for claim_id, _, _ in chunk]
+
+def test_invalid_job_parameters_are_rejected(ai_judge):
+    manager = RevalidationJobManager(ai_judge)
+    for kwargs in ({"evaluation": "remote"}, {"analysis_depth": 5}, {"chunk_size": -1}):
+        with pytest.raises(ValueError):
+            manager.create_job(**kwargs)
+    db = SessionLocal()
+    assert db.query(RevalidationJob).count() == 0
+    db.close()
+
+def test_rate_limiter_spaces_calls():
+    async def run():
+        limiter = RateLimiter(rate_per_minute=1200)  # one call every 50ms
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        for _ in range(4):
+            await limiter.acquire()
+        return loop.time() - started
+    assert asyncio.run(run()) >= 0.14
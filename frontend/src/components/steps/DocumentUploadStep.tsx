@@ -149,20 +149,50 @@ export default function DocumentUploadStep({ onNext, onDataUpdate, claimData }:
     });
 
     try {
-      const response = await fetch(getApiUrl('/api/upload-documents'), {
+      const response = await fetch(getApiUrl('/api/upload-documents/stream'), {
         method: 'POST',
         body: formData,
       });
 
-      if (!response.ok) {
+      if (!response.ok || !response.body) {
         throw new Error('Upload failed');
       }
 
-      const result = await response.json();
-      setUploadedDocs(result.documents);
-      onDataUpdate({ documents: result.documents });
-      
-      toast.success(`Successfully processed ${result.documents.length} documents with OCR`);
+      // Each line is a JSON event: one per processed file, then a final summary
+      const processedDocs: any[] = [];
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = '';
+
+      const handleEvent = (event: any) => {
+        if (event.event === 'document') {
+          processedDocs.push(event.document);
+          setUploadedDocs([...processedDocs]);
+        } else if (event.event === 'error') {
+          toast.error(`Failed to process ${event.filename}`);
+        }
+      };
+
+      while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        const lines = buffer.split('\n');
+        buffer = lines.pop() || '';
+        lines.filter(line => line.trim()).forEach(line => handleEvent(JSON.parse(line)));
+      }
+      if (buffer.trim()) {
+        handleEvent(JSON.parse(buffer));
+      }
+
+      if (processedDocs.length === 0) {
+        throw new Error('No documents could be processed');
+      }
+
+      onDataUpdate({ documents: processedDocs });
+
+      toast.success(`Successfully processed ${processedDocs.length} documents with OCR`);
       onNext();
     } catch (error) {
       console.error('Upload error:', error);
@@ -43,7 +43,7 @@ export default function ValidationLoopStep({ onNext, onPrev, onDataUpdate, claim
 
       console.log('🔍 Sending validation request:', requestData);
 
-      const response = await fetch(getApiUrl('/api/validation-loop'), {
+      const response = await fetch(getApiUrl('/api/validation-loop/stream'), {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
@@ -53,41 +53,69 @@ export default function ValidationLoopStep({ onNext, onPrev, onDataUpdate, claim
         body: JSON.stringify(requestData),
       });
 
-      if (!response.ok) {
+      if (!response.ok || !response.body) {
         throw new Error('Validation failed');
       }
 
-      const result = await response.json();
-      
-      console.log('🔥 RAW API RESPONSE:', result);
-      console.log('🔥 FINAL VALIDATION SCORE:', result.final_validation.overall_score);
-      console.log('🔥 CLAIM ID:', result.final_validation.claim_id);
-      
-      // Force re-render by clearing state first
-      setValidationHistory([]);
-      setFinalValidation(null);
-      
-      // Wait for React to update
-      setTimeout(() => {
-        console.log('✅ Setting new validation data:', {
-          score: result.final_validation.overall_score,
-          iterations: result.iterations_completed,
-          claimId: result.final_validation.claim_id
-        });
+      // Each line is a JSON event: iteration_start, enhancement_complete, validation (or iteration_skipped
+      // when the claim didn't change since the last judged iteration), then complete
+      const history: any[] = [];
+      let result: any = null;
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = '';
 
-        setValidationHistory(result.validation_history);
-        setFinalValidation(result.final_validation);
-        setCurrentIteration(result.iterations_completed);
-        
-        onDataUpdate({ 
-          validationHistory: result.validation_history,
-          finalValidation: result.final_validation,
-          analysisDepth: result.final_analysis_depth,
-          totalImprovement: result.total_improvement
-        });
-        
-        toast.success(`ENHANCED VALIDATION: ${(result.final_validation.overall_score * 100).toFixed(1)}% via ${result.final_analysis_depth} in ${result.iterations_completed} iterations`);
-      }, 100);
+      const handleEvent = (event: any) => {
+        if (event.event === 'iteration_start') {
+          setCurrentIteration(event.iteration);
+        } else if (event.event === 'enhancement_complete') {
+          console.log(`📄 Iteration ${event.iteration} ${event.enhancement}: ${event.documents_before} → ${event.documents_after} documents`);
+        } else if (event.event === 'validation' || event.event === 'iteration_skipped') {
+          const { event: _type, ...iteration } = event;
+          history.push(iteration);
+          setValidationHistory([...history]);
+        } else if (event.event === 'complete') {
+          result = event;
+        } else if (event.event === 'error') {
+          throw new Error(event.detail);
+        }
+      };
+
+      while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        const lines = buffer.split('\n');
+        buffer = lines.pop() || '';
+        lines.filter(line => line.trim()).forEach(line => handleEvent(JSON.parse(line)));
+      }
+      if (buffer.trim()) {
+        handleEvent(JSON.parse(buffer));
+      }
+
+      if (!result) {
+        throw new Error('Validation stream ended before completion');
+      }
+
+      console.log('✅ Validation complete:', {
+        score: result.final_validation.overall_score,
+        iterations: result.iterations_completed,
+        claimId: result.final_validation.claim_id
+      });
+
+      setValidationHistory(result.validation_history);
+      setFinalValidation(result.final_validation);
+      setCurrentIteration(result.iterations_completed);
+
+      onDataUpdate({
+        validationHistory: result.validation_history,
+        finalValidation: result.final_validation,
+        analysisDepth: result.final_analysis_depth,
+        totalImprovement: result.total_improvement
+      });
+
+      toast.success(`ENHANCED VALIDATION: ${(result.final_validation.overall_score * 100).toFixed(1)}% via ${result.final_analysis_depth} in ${result.iterations_completed} iterations`);
     } catch (error) {
       console.error('❌ Validation error:', error);
       toast.error('Failed to run validation loop');
@@ -159,7 +187,9 @@ export default function ValidationLoopStep({ onNext, onPrev, onDataUpdate, claim
       {validating && (
         <div className="text-center p-8">
           <div className="animate-spin rounded-full h-12 w-12 border-b-2 border-blue-600 mx-auto mb-4"></div>
-          <p className="text-gray-600">Running AI Judge validation loop...</p>
+          <p className="text-gray-600">
+            {currentIteration > 0 ? `Running AI Judge iteration ${currentIteration}...` : 'Running AI Judge validation loop...'}
+          </p>
           <p className="text-sm text-gray-500 mt-2">
             This may take a few moments as we analyze your claim and auto-fetch additional receipts
           </p>
@@ -174,7 +204,24 @@ export default function ValidationLoopStep({ onNext, onPrev, onDataUpdate, claim
             Validation Progress
           </h3>
           
-          {validationHistory.map((iteration, index) => (
+          {validationHistory.map((iteration, index) => iteration.skipped ? (
+            <div key={index} className="border border-dashed rounded-lg p-4">
+              <div className="flex items-center justify-between">
+                <div>
+                  <h4 className="font-medium text-gray-900">
+                    Iteration {iteration.iteration}
+                  </h4>
+                  <p className="text-sm text-gray-500 font-medium">
+                    {iteration.analysis_depth?.replace(/_/g, ' ') || 'Standard Analysis'} skipped
+                  </p>
+                </div>
+                <span className="px-3 py-1 rounded-full text-sm font-medium bg-gray-100 text-gray-600">
+                  {(iteration.score * 100).toFixed(1)}% carried over
+                </span>
+              </div>
+              <p className="text-sm text-gray-600 mt-2">⏭️ Judge call skipped: {iteration.skip_reason}</p>
+            </div>
+          ) : (
             <div key={index} className="border rounded-lg p-4">
               <div className="flex items-center justify-between mb-3">
                 <div>